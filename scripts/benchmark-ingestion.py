@@ -0,0 +1,137 @@
+"""
+Benchmark the ingestion pipeline's parse/split throughput in thread and process mode.
+
+Generates a synthetic repository of markdown and Python files and streams it
+through IngestionPipeline with increasing worker counts, reporting docs/sec.
+
+By default the vector store and embedding model are replaced by a sink, so the
+numbers show how loading and splitting scale with cores. Pass --embeddings to
+run against a real RAGEngine with a temporary vector store instead.
+
+Usage:
+    python scripts/benchmark-ingestion.py --files 2000 --workers 1 2 4 8
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import functools
+from concurrent.futures import Future
+from typing import List, Dict, Any
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+sys.path.append(os.path.join(project_root, 'src'))
+
+from src.backend.chunking import split_documents
+from src.backend.data_ingestion import load_repo_file
+from src.backend.ingestion_pipeline import IngestionPipeline, shutdown_process_pools
+
+WORDS = ("vector store embedding retrieval repository ingestion pipeline chunk model query "
+         "context prompt token latency throughput worker process thread queue batch").split()
+
+
+class SinkEngine:
+    """Engine stand-in that splits for real but discards embeddings and writes."""
+
+    def split_documents(self, documents):
+        return split_documents(documents)
+
+    def existing_chunk_ids(self, chunk_ids):
+        return set()
+
+    def embed_chunks(self, chunks, embed_texts=None):
+        return [[0.0] for _ in chunks]
+
+    def write_chunks(self, chunks, embeddings, stage_stats=None, replace_sources=None):
+        future = Future()
+        future.set_result((len(chunks), 0))
+        return future
+
+
+def generate_corpus(root: str, file_count: int, file_kb: int) -> List[str]:
+    """Write a synthetic repository and return its relative file paths."""
+    rng = random.Random(42)
+    paths = []
+    for i in range(file_count):
+        if i % 2:
+            rel_path = f"src/module_{i // 100}/file_{i}.py"
+            lines = [f"def function_{j}(value):\n    return value * {j}  # {' '.join(rng.choices(WORDS, k=8))}\n"
+                     for j in range(file_kb * 12)]
+        else:
+            rel_path = f"docs/section_{i // 100}/page_{i}.md"
+            lines = [f"## Heading {j}\n\n{' '.join(rng.choices(WORDS, k=60))}\n\n" for j in range(file_kb * 2)]
+        full_path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write("".join(lines))
+        paths.append(rel_path)
+    return paths
+
+
+def run_benchmark(engine, root: str, paths: List[str], executor: str, workers: int, batch_size: int) -> Dict[str, Any]:
+    """Run the pipeline once and return its statistics."""
+    pipeline = IngestionPipeline(
+        engine,
+        load_workers=workers,
+        split_workers=workers,
+        executor=executor,
+        process_workers=workers,
+        process_batch_size=batch_size
+    )
+    start = time.monotonic()
+    stats = pipeline.run(paths, functools.partial(load_repo_file, root, metadata={"source_type": "benchmark"}))
+    stats["seconds"] = time.monotonic() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion parse/split throughput")
+    parser.add_argument("--files", type=int, default=2000, help="Number of synthetic files")
+    parser.add_argument("--file-kb", type=int, default=8, help="Approximate size of each file in KB")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}), help="Worker counts to test")
+    parser.add_argument("--executors", nargs="+", default=["thread", "process"], help="Executors to test")
+    parser.add_argument("--batch-size", type=int, default=32, help="Files per worker process task")
+    parser.add_argument("--embeddings", action="store_true",
+                        help="Use a real RAGEngine with embeddings and a temporary vector store")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="ingestion-benchmark-")
+    try:
+        print(f"Generating {args.files} files of ~{args.file_kb} KB in {root}")
+        paths = generate_corpus(os.path.join(root, "repo"), args.files, args.file_kb)
+
+        print(f"\n{'executor':<10}{'workers':>8}{'docs':>8}{'chunks':>9}{'seconds':>10}{'docs/sec':>11}{'speedup':>9}")
+        for executor in args.executors:
+            baseline = None
+            for workers in args.workers:
+                if args.embeddings:
+                    from src.backend.rag_engine import RAGEngine
+                    # Without the embedding cache, so every run embeds the whole corpus
+                    engine = RAGEngine({
+                        "vector_db_path": os.path.join(root, f"db-{executor}-{workers}"),
+                        "ingestion": {"embedding_cache": {"enabled": False}}
+                    })
+                else:
+                    engine = SinkEngine()
+                if executor == "process":
+                    # Start the worker processes before timing
+                    run_benchmark(SinkEngine(), os.path.join(root, "repo"), paths[:workers * args.batch_size],
+                                  executor, workers, args.batch_size)
+                stats = run_benchmark(engine, os.path.join(root, "repo"), paths, executor, workers, args.batch_size)
+                docs_per_sec = stats["documents"] / stats["seconds"]
+                baseline = baseline or docs_per_sec
+                print(f"{executor:<10}{workers:>8}{stats['documents']:>8}{stats['chunks']:>9}"
+                      f"{stats['seconds']:>10.2f}{docs_per_sec:>11.1f}{docs_per_sec / baseline:>8.2f}x")
+    finally:
+        shutdown_process_pools()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
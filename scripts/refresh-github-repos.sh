@@ -19,17 +19,47 @@ fi
 
 echo "Refreshing GitHub repositories..."
 
-RAG_INGESTION_THREADS=${RAG_INGESTION_THREADS:-"0"}
-echo "Using thread count: $RAG_INGESTION_THREADS"
-
-curl -X POST "$API_URL/repos/ingest-repos" \
+# Ingestion runs as background jobs, so the request returns as soon as the jobs
+# are queued instead of timing out while repositories are embedded.
+RESPONSE=$(curl -sS --fail -X POST "$API_URL/repos/jobs" \
     -H "Content-Type: application/json" \
-    -H "X-RAG-Threads: $RAG_INGESTION_THREADS" \
-    -d '{}'
+    -d '{}')
+
+echo "$RESPONSE"
+JOB_IDS=$(echo "$RESPONSE" | python3 -c 'import json, sys; print(" ".join(j["job_id"] for j in json.load(sys.stdin)["jobs"]))')
+
+# Set WAIT=true to poll until every job has finished (e.g. to log the results from cron)
+WAIT=${WAIT:-"false"}
+POLL_INTERVAL=${POLL_INTERVAL:-"15"}
+FAILED=0
+
+if [ "$WAIT" = "true" ]; then
+    for JOB_ID in $JOB_IDS; do
+        while true; do
+            JOB=$(curl -sS --fail "$API_URL/repos/jobs/$JOB_ID")
+            STATUS=$(echo "$JOB" | python3 -c 'import json, sys; print(json.load(sys.stdin)["status"])')
+            if [ "$STATUS" != "queued" ] && [ "$STATUS" != "running" ]; then
+                break
+            fi
+            echo "$JOB" | python3 -c 'import json, sys; j = json.load(sys.stdin); p = j["progress"]; print("%s: %s %s/%s files, %s chunks, ETA %ss" % (j["repo_url"], j["phase"], p["files"], p["files_total"], p["chunks"], p["eta_seconds"]))'
+            sleep "$POLL_INTERVAL"
+        done
+        echo "Job $JOB_ID finished: $STATUS"
+        if [ "$STATUS" != "succeeded" ]; then
+            FAILED=1
+        fi
+    done
+fi
 
 echo ""
-echo "GitHub repositories refresh completed."
+if [ "$WAIT" = "true" ]; then
+    echo "GitHub repositories refresh completed."
+else
+    echo "GitHub repositories refresh submitted. Track progress with: curl $API_URL/repos/jobs"
+fi
 echo "You can schedule this script in a cron job to periodically update the knowledge base:"
 echo ""
 echo "# Example cron job (runs every day at 2 AM)"
 echo "0 2 * * * $PROJECT_ROOT/scripts/refresh-github-repos.sh >> $PROJECT_ROOT/logs/github-refresh.log 2>&1"
+
+exit $FAILED
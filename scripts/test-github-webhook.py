@@ -0,0 +1,158 @@
+"""
+Test script for the GitHub push webhook of the RAG-LLM Framework.
+
+Replays the recorded push payload in tests/post_deployment/fixtures against a
+local bare git repository: the repository is created, ingested once, the two
+commits of the recorded push are made, and the payload, with its SHAs and URLs
+pointed at the local repository, is signed with GITHUB_WEBHOOK_SECRET and posted
+to /repos/webhook. The API must run on this machine so it can clone the repository.
+"""
+import requests
+import json
+import sys
+import os
+import hmac
+import copy
+import time
+import hashlib
+import tempfile
+import subprocess
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_URL = os.getenv("RAG_API_URL", "http://localhost:8000")
+WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+FIXTURE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "tests", "post_deployment", "fixtures", "github_push_payload.json"
+)
+
+def git(*args, cwd=None):
+    """Run a git command and return its output."""
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+def write_files(work_dir, files):
+    """Write files into the working copy."""
+    for path, content in files.items():
+        full_path = os.path.join(work_dir, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write(content)
+
+def commit_and_push(work_dir, message, files, removed=()):
+    """Commit changes and push them to the bare repository; returns the new SHA."""
+    write_files(work_dir, files)
+    for path in removed:
+        git("rm", "-q", path, cwd=work_dir)
+    git("add", "-A", cwd=work_dir)
+    git("commit", "-q", "-m", message, cwd=work_dir)
+    git("push", "-q", "origin", "HEAD:main", cwd=work_dir)
+    return git("rev-parse", "HEAD", cwd=work_dir)
+
+def post_webhook(payload, secret, event="push"):
+    """Post a signed webhook delivery."""
+    body = json.dumps(payload).encode("utf-8")
+    signature = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return requests.post(
+        f"{BASE_URL}/repos/webhook",
+        data=body,
+        headers={
+            "Content-Type": "application/json",
+            "X-GitHub-Event": event,
+            "X-GitHub-Delivery": "test-delivery",
+            "X-Hub-Signature-256": signature
+        },
+        timeout=10
+    )
+
+def wait_for_job(repo_url, previous_job_id=None, timeout=120):
+    """Wait for the newest job of a repository to finish."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = requests.get(f"{BASE_URL}/repos/jobs", params={"repo_url": repo_url}, timeout=10)
+        jobs = response.json().get("jobs", [])
+        if jobs and jobs[0]["job_id"] != previous_job_id and jobs[0]["status"] not in ("queued", "running"):
+            return jobs[0]
+        time.sleep(1)
+    return None
+
+def main():
+    if not WEBHOOK_SECRET:
+        print("❌ GITHUB_WEBHOOK_SECRET must be set to the secret the API was started with")
+        return False
+
+    with open(FIXTURE_PATH, "r") as f:
+        recorded = json.load(f)
+    original_config = requests.get(f"{BASE_URL}/repos", timeout=10).json()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bare_repo = os.path.join(tmp_dir, "test-repo.git")
+        work_dir = os.path.join(tmp_dir, "work")
+        git("init", "-q", "--bare", "-b", "main", bare_repo)
+        git("clone", "-q", bare_repo, work_dir)
+        git("config", "user.email", "test-mode@users.noreply.github.com", cwd=work_dir)
+        git("config", "user.name", "test-mode", cwd=work_dir)
+        before = commit_and_push(work_dir, "Initial commit", {
+            "README.md": "# Test repository\n",
+            "docs/getting-started.md": "# Getting started\n",
+            "docs/old-setup.md": "# Old setup\n"
+        })
+
+        try:
+            print("\nConfiguring the local repository:")
+            response = requests.post(f"{BASE_URL}/repos/update-config", json={
+                "repositories": [{"repo_url": bare_repo, "branch": "main", "file_extensions": [".md", ".py"]}]
+            }, timeout=10)
+            print(f"Status code: {response.status_code}")
+            requests.post(f"{BASE_URL}/repos/jobs", json={}, timeout=10)
+            initial_job = wait_for_job(bare_repo)
+            print(f"Initial ingestion: {initial_job and initial_job['status']}")
+
+            mid = commit_and_push(work_dir, recorded["commits"][0]["message"], {
+                "docs/configuration.md": "# Configuration\n",
+                "README.md": "# Test repository\n\nUpdated.\n",
+                "docs/getting-started.md": "# Getting started\n\nUpdated.\n"
+            }, removed=["docs/old-setup.md"])
+            after = commit_and_push(work_dir, recorded["commits"][1]["message"], {
+                "examples/ingest.py": "print('ingest')\n",
+                "docs/configuration.md": "# Configuration\n\nUpdated.\n"
+            })
+
+            payload = copy.deepcopy(recorded)
+            payload["before"], payload["after"] = before, after
+            payload["commits"][0]["id"], payload["commits"][1]["id"] = mid, after
+            payload["head_commit"]["id"] = after
+            for key in ("html_url", "url", "git_url", "ssh_url", "clone_url", "svn_url"):
+                payload["repository"][key] = bare_repo
+
+            print("\nTesting an invalid signature:")
+            response = post_webhook(payload, WEBHOOK_SECRET + "-wrong")
+            print(f"Status code: {response.status_code}")
+            if response.status_code != 401:
+                print("❌ Invalid signature was not rejected")
+                return False
+
+            print("\nTesting the recorded push:")
+            response = post_webhook(payload, WEBHOOK_SECRET)
+            print(f"Status code: {response.status_code}")
+            print(f"Response: {json.dumps(response.json(), indent=2)}")
+            if response.status_code != 200 or response.json().get("status") != "queued":
+                print("❌ Push was not queued")
+                return False
+
+            job = wait_for_job(bare_repo, initial_job and initial_job["job_id"])
+            print(f"Job: {json.dumps(job, indent=2)}")
+            result = (job or {}).get("result") or {}
+            if result.get("mode") != "incremental" or result.get("deleted_file_count") != 1 or result.get("document_count") != 4:
+                print("❌ Push was not ingested incrementally")
+                return False
+            print("✅ Push was ingested incrementally")
+            return True
+        finally:
+            requests.post(f"{BASE_URL}/repos/update-config", json={
+                "repositories": original_config.get("repositories", []),
+                "auto_ingest_on_startup": original_config.get("auto_ingest_on_startup")
+            }, timeout=10)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -13,6 +13,7 @@ project_root = os.path.dirname(current_dir)
 sys.path.append(project_root)
 sys.path.append(os.path.join(project_root, 'src'))
 
+from src.backend import ingestion_jobs
 from src.backend.rag_engine import RAGEngine
 from src.backend.repo_management import Repository, ingest_repositories
 
@@ -21,7 +22,7 @@ logger = logging.getLogger(__name__)
 
 async def test_multi_threading():
     """
-    Test the multi-threaded repository ingestion functionality.
+    Test concurrent repository ingestion with different job limits.
     """
     config = {
         "llm": {
@@ -66,10 +67,12 @@ async def test_multi_threading():
 
     os.environ["RAG_TEST_MODE"] = "true"
 
-    thread_counts = [1, 2, 4]
-    for thread_count in thread_counts:
-        os.environ["RAG_INGESTION_THREADS"] = str(thread_count)
-        logger.info(f"Testing with {thread_count} threads")
+    job_limits = [1, 2, 4]
+    for job_limit in job_limits:
+        os.environ["RAG_MAX_CONCURRENT_INGESTION_JOBS"] = str(job_limit)
+        # The job manager reads the limit when it is created
+        ingestion_jobs._job_manager = None
+        logger.info(f"Testing with {job_limit} concurrent ingestion jobs")
 
         start_time = time.time()
         results = await ingest_repositories(test_repos, rag_engine)
@@ -0,0 +1,134 @@
+"""
+Test script for archive ingestion of the RAG-LLM Framework.
+
+Starts a local stand-in for the GitHub tarball API that serves a gzipped
+repository tarball, laid out like GitHub's (a top-level ``owner-repo-sha``
+directory and the commit SHA in the pax header), with an ETag. A repository with
+``"archive": true`` is submitted as an ingestion job twice: the first job must
+ingest the matching files, the second must be answered with 304 and skipped.
+The API must run on this machine with GITHUB_API_URL set to the stand-in,
+e.g. ``GITHUB_API_URL=http://localhost:8765``.
+"""
+import requests
+import json
+import sys
+import os
+import io
+import time
+import tarfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_URL = os.getenv("RAG_API_URL", "http://localhost:8000")
+STANDIN_PORT = int(os.getenv("TARBALL_STANDIN_PORT", "8765"))
+REPO_URL = "https://github.com/test-owner/test-repo"
+COMMIT_SHA = "0123456789abcdef0123456789abcdef01234567"
+FILES = {
+    "README.md": "# Test repository\n",
+    "docs/getting-started.md": "# Getting started\n",
+    "examples/ingest.py": "print('ingest')\n",
+    "assets/logo.bin": "not ingested\n",
+    "node_modules/left-pad/index.js": "module.exports = () => {};\n"
+}
+
+def build_tarball(files, sha):
+    """Build a gzipped tarball the way GitHub lays it out."""
+    buffer = io.BytesIO()
+    top = f"test-owner-test-repo-{sha[:7]}"
+    with tarfile.open(fileobj=buffer, mode="w:gz", format=tarfile.PAX_FORMAT, pax_headers={"comment": sha}) as tar:
+        directory = tarfile.TarInfo(top)
+        directory.type = tarfile.DIRTYPE
+        tar.addfile(directory)
+        for path, content in files.items():
+            data = content.encode("utf-8")
+            info = tarfile.TarInfo(f"{top}/{path}")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+class TarballHandler(BaseHTTPRequestHandler):
+    """Serves the tarball API: redirects to a codeload path and answers If-None-Match with 304."""
+    tarball = build_tarball(FILES, COMMIT_SHA)
+    etag = f'"{COMMIT_SHA}"'
+    requests_seen = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        TarballHandler.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path.startswith("/repos/test-owner/test-repo/tarball/"):
+            self.send_response(302)
+            self.send_header("Location", "/codeload/test-owner/test-repo/tar.gz/" + self.path.rsplit("/", 1)[1])
+            self.end_headers()
+        elif not self.path.startswith("/codeload/"):
+            self.send_response(404)
+            self.end_headers()
+        elif self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-gzip")
+            self.send_header("Content-Length", str(len(self.tarball)))
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            self.wfile.write(self.tarball)
+
+def submit_and_wait(repository, timeout=120):
+    """Submit an ingestion job for one repository and wait for it to finish."""
+    response = requests.post(f"{BASE_URL}/repos/jobs", json={"repositories": [repository]}, timeout=10)
+    response.raise_for_status()
+    job_id = response.json()["jobs"][0]["job_id"]
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = requests.get(f"{BASE_URL}/repos/jobs/{job_id}", timeout=10).json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(1)
+    return None
+
+def main():
+    server = ThreadingHTTPServer(("0.0.0.0", STANDIN_PORT), TarballHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Tarball API stand-in listening on http://localhost:{STANDIN_PORT}")
+    repository = {
+        "repo_url": REPO_URL,
+        "branch": "main",
+        "file_extensions": [".md", ".py", ".js"],
+        "archive": True
+    }
+
+    try:
+        print("\nTesting the first archive ingestion:")
+        job = submit_and_wait(repository)
+        print(f"Job: {json.dumps(job, indent=2)}")
+        result = (job or {}).get("result") or {}
+        if not TarballHandler.requests_seen:
+            print("❌ The API did not request the tarball; is GITHUB_API_URL set to the stand-in?")
+            return False
+        if result.get("mode") != "archive" or result.get("commit_sha") != COMMIT_SHA or result.get("document_count") != 3:
+            print("❌ Archive was not ingested")
+            return False
+        if result.get("skipped_files", {}).get("by_reason", {}).get("vendored", {}).get("files") != 1:
+            print("❌ Vendored file was not skipped")
+            return False
+
+        print("\nTesting an unchanged archive:")
+        job = submit_and_wait(repository)
+        print(f"Job: {json.dumps(job, indent=2)}")
+        result = (job or {}).get("result") or {}
+        if not result.get("not_modified") or TarballHandler.requests_seen[-1][1] != TarballHandler.etag:
+            print("❌ Unchanged archive was downloaded again")
+            return False
+        print("✅ Archive was ingested once and skipped while unchanged")
+        return True
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -2,7 +2,7 @@
 Chat router module for the RAG-LLM Framework.
 This module provides endpoints for interactive chat functionality.
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import logging
@@ -16,11 +16,14 @@ sys.path.append(project_root)
 
 try:
     from src.backend.rag_engine import RAGEngine, get_rag_engine
+    from src.backend.request_cancellation import ClientDisconnected, DeadlineExceeded, parse_deadline, run_cancellable
 except ImportError:
     try:
         from backend.rag_engine import RAGEngine, get_rag_engine
+        from backend.request_cancellation import ClientDisconnected, DeadlineExceeded, parse_deadline, run_cancellable
     except ImportError:
         from rag_engine import RAGEngine, get_rag_engine
+        from request_cancellation import ClientDisconnected, DeadlineExceeded, parse_deadline, run_cancellable
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +43,8 @@ class ChatResponse(BaseModel):
     conversation_id: str
     response: str
     sources: List[Dict[str, Any]]
+    degraded: bool = False
+    route: Optional[str] = None
 
 
 class ChatHistoryRequest(BaseModel):
@@ -77,13 +82,18 @@ class ChatFeedbackResponse(BaseModel):
 )
 async def send_message(
     request: ChatRequest,
+    http_request: Request,
     rag_engine: RAGEngine = Depends(get_rag_engine)
 ) -> Dict[str, Any]:
     """
     Send a message to the chat.
 
+    Generation is cancelled if the client disconnects or the optional
+    X-Request-Deadline header (Unix timestamp in seconds) passes.
+
     Args:
         request: The chat request containing the message and optional conversation ID
+        http_request: The HTTP request, watched for disconnects and deadlines
         rag_engine: The RAG engine instance
 
     Returns:
@@ -107,11 +117,24 @@ async def send_message(
                 "sources": []
             }
 
+        deadline = parse_deadline(http_request)
+
         try:
-            result = rag_engine.query_with_conversation(
-                message,
-                conversation_id=conversation_id
+            result = await run_cancellable(
+                http_request,
+                rag_engine.aquery_with_conversation(
+                    message,
+                    conversation_id=conversation_id,
+                    max_tokens=request.max_tokens,
+                    temperature=request.temperature,
+                    deadline=deadline
+                )
             )
+        except ClientDisconnected:
+            logger.info("Client disconnected, chat generation cancelled")
+            raise HTTPException(status_code=499, detail="Client closed request")
+        except DeadlineExceeded:
+            raise HTTPException(status_code=504, detail="Request deadline exceeded")
         except TypeError as e:
             logger.warning(f"Using fallback query method: {str(e)}")
             result = rag_engine.query(message)
@@ -134,8 +157,12 @@ async def send_message(
         return {
             "conversation_id": result["conversation_id"],
             "response": result["response"],
-            "sources": result.get("sources", [])
+            "sources": result.get("sources", []),
+            "degraded": result.get("degraded", False),
+            "route": result.get("route")
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error sending message: {str(e)}")
         raise HTTPException(
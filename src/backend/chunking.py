@@ -0,0 +1,567 @@
+"""
+Document chunking for the RAG-LLM Framework.
+Splits documents into chunks with deterministic IDs. The strategy is chosen by
+file type: Python is split at definition boundaries, brace languages (JS/TS,
+Java, C-like) at block boundaries and markdown at headings, so chunks hold whole
+functions and sections. Chunks are sized in tokens. The splitter is a plain
+object and the functions are module-level, so they can run in ingestion worker
+processes.
+"""
+import os
+import re
+import ast
+import hashlib
+import logging
+import functools
+from typing import List, Dict, Any, Optional, Callable, NamedTuple
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter, Language
+from langchain.schema import Document
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHUNK_OVERLAP = 200
+
+STRATEGY_AUTO = "auto"
+STRATEGY_RECURSIVE = "recursive"
+STRATEGY_PYTHON = "python"
+STRATEGY_BRACE = "brace"
+STRATEGY_MARKDOWN = "markdown"
+STRATEGY_TEXT = "text"
+
+DEFAULT_CHUNK_TOKENS = 256
+DEFAULT_OVERLAP_TOKENS = 32
+DEFAULT_SEMANTIC_OVERLAP_TOKENS = 0
+TOKENIZER_APPROXIMATE = "approximate"
+
+PYTHON_EXTENSIONS = {".py", ".pyw", ".pyi"}
+MARKDOWN_EXTENSIONS = {".md", ".markdown", ".mdx"}
+# Brace languages and the LangChain language used when a block has no inner structure
+BRACE_LANGUAGES = {
+    ".js": Language.JS, ".jsx": Language.JS, ".mjs": Language.JS, ".cjs": Language.JS,
+    ".ts": Language.TS, ".tsx": Language.TS,
+    ".java": Language.JAVA, ".kt": Language.KOTLIN, ".kts": Language.KOTLIN, ".scala": Language.SCALA,
+    ".c": Language.C, ".h": Language.C, ".cc": Language.CPP, ".cpp": Language.CPP, ".hpp": Language.CPP,
+    ".cs": Language.CSHARP, ".go": Language.GO, ".rs": Language.RUST, ".swift": Language.SWIFT,
+    ".php": Language.PHP
+}
+
+# Roughly one word piece per word, number or punctuation character; identifiers
+# split at underscores like sub-word tokenizers do
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_MARKDOWN_HEADING = re.compile(r"^(#{1,6})\s")
+_MARKDOWN_FENCE = re.compile(r"^\s*(```|~~~)")
+_LEADING_CODE_LINE = ("//", "/*", "*", "@", "#")
+
+
+def source_key(metadata: Dict[str, Any]) -> str:
+    """
+    Get the key identifying the origin of a chunk.
+
+    Args:
+        metadata: Chunk metadata
+
+    Returns:
+        ``repo_url@branch:source`` for repository files, otherwise the source
+    """
+    source = str(metadata.get("source", "unknown"))
+    if metadata.get("repo_url"):
+        return f"{metadata['repo_url']}@{metadata.get('branch', '')}:{source}"
+    return source
+
+
+def assign_chunk_ids(splits: List[Document]) -> List[Document]:
+    """
+    Give chunks deterministic IDs derived from source, position and content hash.
+
+    Adds ``source_key``, ``chunk_index``, ``content_hash`` and ``chunk_id`` to
+    each chunk's metadata. Duplicate chunks within the batch are dropped.
+
+    Args:
+        splits: Chunks in document order
+
+    Returns:
+        The chunks with IDs assigned
+    """
+    positions = {}
+    seen = set()
+    unique_splits = []
+    for doc in splits:
+        key = source_key(doc.metadata)
+        chunk_index = positions.get(key, 0)
+        positions[key] = chunk_index + 1
+
+        content_hash = hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+        chunk_id = hashlib.sha256(f"{key}\0{chunk_index}\0{content_hash}".encode("utf-8")).hexdigest()
+        if chunk_id in seen:
+            continue
+        seen.add(chunk_id)
+
+        doc.metadata.update({
+            "source_key": key,
+            "chunk_index": chunk_index,
+            "content_hash": content_hash,
+            "chunk_id": chunk_id
+        })
+        unique_splits.append(doc)
+    return unique_splits
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text without a tokenizer.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Approximate word-piece token count
+    """
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+@functools.lru_cache(maxsize=4)
+def get_token_counter(tokenizer: str = TOKENIZER_APPROXIMATE) -> Callable[[str], int]:
+    """
+    Get a function counting tokens.
+
+    Args:
+        tokenizer: "approximate", or the name of a HuggingFace tokenizer such as
+            ``sentence-transformers/all-MiniLM-L6-v2`` for exact counts
+
+    Returns:
+        Function returning the token count of a text
+    """
+    if tokenizer == TOKENIZER_APPROXIMATE:
+        return approximate_tokens
+    try:
+        from transformers import AutoTokenizer
+        hf_tokenizer = AutoTokenizer.from_pretrained(tokenizer)
+        return lambda text: len(hf_tokenizer.encode(text, add_special_tokens=False))
+    except Exception as e:
+        logger.warning(f"⚠️ Could not load tokenizer {tokenizer}, approximating token counts: {str(e)}")
+        return approximate_tokens
+
+
+class _Segment(NamedTuple):
+    """Line range of a syntactic unit; ``header`` is the line naming it, if any."""
+    start: int
+    end: int
+    header: Optional[int]
+    node: Any = None
+
+
+class _PythonSegmenter:
+    """Definition and statement boundaries from the Python AST."""
+
+    def __init__(self, text: str, lines: List[str]):
+        self.lines = lines
+        self.tree = ast.parse(text)
+
+    def top(self) -> List["_Segment"]:
+        return self._segments(self.tree.body, 0, len(self.lines))
+
+    def children(self, segment: "_Segment") -> Optional[List["_Segment"]]:
+        if segment.node is None:
+            return None
+        nodes = [
+            child for child in ast.iter_child_nodes(segment.node)
+            if isinstance(child, (ast.stmt, ast.ExceptHandler))
+        ]
+        return self._segments(nodes, segment.start, segment.end) if nodes else None
+
+    def _segments(self, nodes: List[ast.AST], start: int, end: int) -> List["_Segment"]:
+        # Each unit starts where the previous one ended, so leading comments and
+        # decorators belong to the definition that follows them
+        segments = []
+        for node in sorted(nodes, key=lambda n: n.lineno):
+            node_end = min(max(node.end_lineno, start + 1), end)
+            if node_end <= start:
+                continue
+            header = node.lineno - 1 if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) else None
+            segments.append(_Segment(start, node_end, header, node))
+            start = node_end
+        if start < end:
+            if segments:
+                last = segments[-1]
+                segments[-1] = _Segment(last.start, end, last.header, last.node)
+            else:
+                segments.append(_Segment(start, end, None))
+        return segments
+
+
+class _BraceSegmenter:
+    """Block boundaries of brace languages, found by tracking bracket depth outside strings and comments."""
+
+    def __init__(self, text: str, lines: List[str]):
+        self.lines = lines
+        self.depth_before, self.depth_after = self._depths(lines)
+
+    @staticmethod
+    def _depths(lines: List[str]):
+        depth_before, depth_after = [], []
+        depth = 0
+        quote = None
+        block_comment = False
+        for line in lines:
+            depth_before.append(depth)
+            i = 0
+            while i < len(line):
+                char = line[i]
+                pair = line[i:i + 2]
+                if block_comment:
+                    if pair == "*/":
+                        block_comment = False
+                        i += 1
+                elif quote:
+                    if char == "\\":
+                        i += 1
+                    elif char == quote:
+                        quote = None
+                elif pair == "//":
+                    break
+                elif pair == "/*":
+                    block_comment = True
+                    i += 1
+                elif char in "\"'`":
+                    quote = char
+                elif char in "{([":
+                    depth += 1
+                elif char in "})]":
+                    depth = max(0, depth - 1)
+                i += 1
+            if quote != "`":
+                # Unterminated ordinary strings do not span lines
+                quote = None
+            depth_after.append(depth)
+        return depth_before, depth_after
+
+    def top(self) -> List["_Segment"]:
+        return self._segments(0, len(self.lines), 0)
+
+    def children(self, segment: "_Segment") -> Optional[List["_Segment"]]:
+        segments = self._segments(segment.start, segment.end, self.depth_before[segment.start] + 1)
+        if len(segments) > 1 and all(not line.strip(" \t\r\n})];,") for line in self.lines[segments[-1].start:segments[-1].end]):
+            # Closing brackets stay with the last inner unit
+            last = segments.pop()
+            segments[-1] = _Segment(segments[-1].start, last.end, segments[-1].header)
+        return segments if len(segments) > 1 else None
+
+    def _segments(self, start: int, end: int, depth: int) -> List["_Segment"]:
+        segments = []
+        unit_start = start
+        for i in range(start, end):
+            if self.depth_after[i] > depth or i == end - 1:
+                continue
+            if self._is_leading(self.lines[i]) and self.depth_before[i] <= depth:
+                # Comments, annotations and blank lines belong to the next unit
+                continue
+            segments.append(_Segment(unit_start, i + 1, self._header(unit_start, i + 1)))
+            unit_start = i + 1
+        if unit_start < end:
+            segments.append(_Segment(unit_start, end, self._header(unit_start, end)))
+        return segments
+
+    def _header(self, start: int, end: int) -> Optional[int]:
+        for i in range(start, end):
+            if not self._is_leading(self.lines[i]):
+                return i
+        return None
+
+    @staticmethod
+    def _is_leading(line: str) -> bool:
+        stripped = line.strip()
+        return not stripped or stripped.startswith(_LEADING_CODE_LINE)
+
+
+class _MarkdownSegmenter:
+    """Sections at headings of the next level, then paragraphs; fenced code blocks are never cut."""
+
+    def __init__(self, text: str, lines: List[str]):
+        self.lines = lines
+        self.heading_levels: Dict[int, int] = {}
+        self.paragraph_ends = set()
+        in_fence = False
+        for i, line in enumerate(lines):
+            if _MARKDOWN_FENCE.match(line):
+                in_fence = not in_fence
+                continue
+            if in_fence:
+                continue
+            match = _MARKDOWN_HEADING.match(line)
+            if match:
+                self.heading_levels[i] = len(match.group(1))
+            elif not line.strip():
+                self.paragraph_ends.add(i)
+
+    def top(self) -> List["_Segment"]:
+        return self.children(_Segment(0, len(self.lines), None)) or [_Segment(0, len(self.lines), None)]
+
+    def children(self, segment: "_Segment") -> Optional[List["_Segment"]]:
+        own_level = self.heading_levels.get(segment.start, 0)
+        headings = [
+            i for i in range(segment.start, segment.end)
+            if i in self.heading_levels and self.heading_levels[i] > own_level
+        ]
+        if headings:
+            level = min(self.heading_levels[i] for i in headings)
+            cuts = [i for i in headings if self.heading_levels[i] == level and i > segment.start]
+        else:
+            cuts = [i + 1 for i in range(segment.start, segment.end - 1) if i in self.paragraph_ends]
+        if not cuts:
+            return None
+        bounds = [segment.start] + cuts + [segment.end]
+        return [
+            _Segment(a, b, a if a in self.heading_levels else None)
+            for a, b in zip(bounds, bounds[1:]) if a < b
+        ]
+
+
+class DocumentSplitter:
+    """
+    Splits documents into chunks, choosing a strategy by file type.
+
+    Code and markdown are split into syntactic units (definitions, blocks,
+    sections), which are packed into chunks of at most ``chunk_tokens``. Units
+    that are too large are split at their inner boundaries, for example a
+    class into its methods. The name of the enclosing unit (class signature or
+    parent heading) is repeated at the top of such chunks. Chunks that end at a
+    semantic boundary overlap by ``semantic_overlap_tokens`` only. Units with no
+    inner structure, and all other text, fall back to recursive splitting with
+    ``overlap_tokens`` of overlap.
+    """
+
+    def __init__(
+        self,
+        strategy: str = STRATEGY_AUTO,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+        semantic_overlap_tokens: int = DEFAULT_SEMANTIC_OVERLAP_TOKENS,
+        tokenizer: str = TOKENIZER_APPROXIMATE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
+    ):
+        """
+        Initialize the splitter.
+
+        Args:
+            strategy: "auto" to choose by file type, or "recursive" for fixed-size
+                character chunks of ``chunk_size`` with ``chunk_overlap``
+            chunk_tokens: Maximum chunk size in tokens
+            overlap_tokens: Overlap between chunks of plain text and unstructured code
+            semantic_overlap_tokens: Overlap between chunks cut at definition,
+                block or section boundaries
+            tokenizer: "approximate", or a HuggingFace tokenizer name to count
+                tokens exactly (e.g. the embeddings model's)
+            chunk_size: Chunk size in characters for the "recursive" strategy
+            chunk_overlap: Overlap in characters for the "recursive" strategy
+        """
+        self.strategy = strategy
+        self.chunk_tokens = max(16, chunk_tokens)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.chunk_tokens // 2))
+        self.semantic_overlap_tokens = max(0, min(semantic_overlap_tokens, self.chunk_tokens // 2))
+        self.tokenizer = tokenizer
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "DocumentSplitter":
+        """
+        Create a splitter from the ``ingestion.chunking`` config section.
+
+        Args:
+            config: Chunking configuration dictionary
+
+        Returns:
+            A configured DocumentSplitter
+        """
+        return cls(
+            strategy=os.environ.get("RAG_CHUNKING_STRATEGY", config.get("strategy", STRATEGY_AUTO)),
+            chunk_tokens=int(config.get("chunk_tokens", DEFAULT_CHUNK_TOKENS)),
+            overlap_tokens=int(config.get("overlap_tokens", DEFAULT_OVERLAP_TOKENS)),
+            semantic_overlap_tokens=int(config.get("semantic_overlap_tokens", DEFAULT_SEMANTIC_OVERLAP_TOKENS)),
+            tokenizer=config.get("tokenizer", TOKENIZER_APPROXIMATE),
+            chunk_size=int(config.get("chunk_size", DEFAULT_CHUNK_SIZE)),
+            chunk_overlap=int(config.get("chunk_overlap", DEFAULT_CHUNK_OVERLAP))
+        )
+
+    def strategy_for(self, metadata: Dict[str, Any]) -> str:
+        """
+        Choose the splitting strategy for a document.
+
+        Args:
+            metadata: Document metadata; the extension of ``file_path`` or ``source`` decides
+
+        Returns:
+            The strategy name
+        """
+        if self.strategy != STRATEGY_AUTO:
+            return self.strategy
+        extension = os.path.splitext(str(metadata.get("file_path") or metadata.get("source") or ""))[1].lower()
+        if extension in PYTHON_EXTENSIONS:
+            return STRATEGY_PYTHON
+        if extension in BRACE_LANGUAGES:
+            return STRATEGY_BRACE
+        if extension in MARKDOWN_EXTENSIONS:
+            return STRATEGY_MARKDOWN
+        return STRATEGY_TEXT
+
+    def split(self, documents: List[Document]) -> List[Document]:
+        """
+        Split documents into chunks.
+
+        Args:
+            documents: Documents to split
+
+        Returns:
+            Chunks in document order, with ``chunk_strategy`` added to their metadata
+        """
+        chunks = []
+        for document in documents:
+            strategy = self.strategy_for(document.metadata)
+            for text in self._split_text(document.page_content, strategy, document.metadata):
+                if text.strip():
+                    chunks.append(Document(page_content=text, metadata={**document.metadata, "chunk_strategy": strategy}))
+        return chunks
+
+    def _split_text(self, text: str, strategy: str, metadata: Dict[str, Any]) -> List[str]:
+        if strategy == STRATEGY_RECURSIVE:
+            return RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap
+            ).split_text(text)
+
+        count_tokens = get_token_counter(self.tokenizer)
+        extension = os.path.splitext(str(metadata.get("file_path") or metadata.get("source") or ""))[1].lower()
+        language = {
+            STRATEGY_PYTHON: Language.PYTHON,
+            STRATEGY_MARKDOWN: Language.MARKDOWN,
+            STRATEGY_BRACE: BRACE_LANGUAGES.get(extension)
+        }.get(strategy)
+        if count_tokens(text) <= self.chunk_tokens:
+            return [text]
+        if strategy == STRATEGY_TEXT:
+            return self._fallback_split(text, self.chunk_tokens, language, count_tokens)
+
+        lines = text.splitlines(keepends=True)
+        try:
+            segmenter = {
+                STRATEGY_PYTHON: _PythonSegmenter,
+                STRATEGY_BRACE: _BraceSegmenter,
+                STRATEGY_MARKDOWN: _MarkdownSegmenter
+            }[strategy](text, lines)
+        except (SyntaxError, ValueError, RecursionError):
+            # E.g. Python 2 sources; fall back to language-aware separators
+            return self._fallback_split(text, self.chunk_tokens, language, count_tokens)
+        tokens = [count_tokens(line) for line in lines]
+        pieces = self._pack(lines, tokens, segmenter.top(), segmenter, (), language, count_tokens)
+        return self._render(lines, tokens, self._merge(pieces, tokens, count_tokens), count_tokens)
+
+    def _pack(self, lines, tokens, segments, segmenter, context, language, count_tokens) -> List[Any]:
+        # Greedily pack consecutive units into line ranges; units that do not fit
+        # are split at their inner boundaries, or as plain text if they have none.
+        # Ranges are (start, end, context), where context holds the enclosing headers
+        pieces = []
+        budget = max(16, self.chunk_tokens - sum(count_tokens(line) for _, line in context))
+        current = None
+        for segment in segments:
+            segment_tokens = sum(tokens[segment.start:segment.end])
+            if current is not None and current[2] + segment_tokens <= budget:
+                current[1] = segment.end
+                current[2] += segment_tokens
+                continue
+            if current is not None:
+                pieces.append((current[0], current[1], context))
+                current = None
+            if segment_tokens <= budget:
+                current = [segment.start, segment.end, segment_tokens]
+                continue
+            children = segmenter.children(segment)
+            if children and len(children) > 1:
+                inner_context = context
+                if segment.header is not None:
+                    inner_context = context + ((segment.header, lines[segment.header].rstrip()),)
+                pieces.extend(self._pack(lines, tokens, children, segmenter, inner_context, language, count_tokens))
+            else:
+                prefix = self._prefix(context, segment.start, segment.end)
+                text = "".join(lines[segment.start:segment.end])
+                pieces.extend(prefix + piece for piece in self._fallback_split(text, budget, language, count_tokens))
+        if current is not None:
+            pieces.append((current[0], current[1], context))
+        return pieces
+
+    def _merge(self, pieces: List[Any], tokens: List[int], count_tokens) -> List[Any]:
+        # Join adjacent ranges that fit together, such as a class header and its
+        # first method, or a closing brace and the block before it
+        merged = []
+        for piece in pieces:
+            previous = merged[-1] if merged else None
+            if isinstance(piece, tuple) and isinstance(previous, tuple) and previous[1] == piece[0]:
+                shared = []
+                for outer, inner in zip(previous[2], piece[2]):
+                    if outer != inner:
+                        break
+                    shared.append(outer)
+                # Headers that only one side has must be part of the merged range
+                dropped = [index for index, _ in previous[2][len(shared):] + piece[2][len(shared):]]
+                size = sum(tokens[previous[0]:piece[1]]) + sum(
+                    count_tokens(line) for index, line in shared if not previous[0] <= index < piece[1]
+                )
+                if size <= self.chunk_tokens and all(previous[0] <= index < piece[1] for index in dropped):
+                    merged[-1] = (previous[0], piece[1], tuple(shared))
+                    continue
+            merged.append(piece)
+        return merged
+
+    def _render(self, lines: List[str], tokens: List[int], pieces: List[Any], count_tokens) -> List[str]:
+        chunks = []
+        for index, piece in enumerate(pieces):
+            if not isinstance(piece, tuple):
+                chunks.append(piece)
+                continue
+            start, end, context = piece
+            previous = pieces[index - 1] if index else None
+            if self.semantic_overlap_tokens and isinstance(previous, tuple) and previous[1] == start:
+                # Repeat the end of the previous chunk, within the chunk size
+                size = sum(tokens[start:end]) + count_tokens(self._prefix(context, start, end))
+                overlap = 0
+                while (start > previous[0] + 1 and overlap + tokens[start - 1] <= self.semantic_overlap_tokens
+                       and size + tokens[start - 1] <= self.chunk_tokens):
+                    start -= 1
+                    overlap += tokens[start]
+                    size += tokens[start]
+            chunks.append(self._prefix(context, start, end) + "".join(lines[start:end]))
+        return chunks
+
+    @staticmethod
+    def _prefix(context, start: int, end: int) -> str:
+        # Enclosing headers, unless the chunk already contains them
+        return "".join(f"{line}\n" for index, line in context if not start <= index < end)
+
+    def _fallback_split(self, text: str, budget: int, language: Optional[Language], count_tokens) -> List[str]:
+        kwargs = {
+            "chunk_size": budget,
+            "chunk_overlap": min(self.overlap_tokens, budget // 2),
+            "length_function": count_tokens
+        }
+        if language is not None:
+            return RecursiveCharacterTextSplitter.from_language(language, **kwargs).split_text(text)
+        return RecursiveCharacterTextSplitter(**kwargs).split_text(text)
+
+
+def split_documents(
+    documents: List[Document],
+    splitter: Optional[DocumentSplitter] = None
+) -> List[Document]:
+    """
+    Split documents into chunks with deterministic IDs.
+
+    Args:
+        documents: Documents to split
+        splitter: Splitter to use; defaults to a DocumentSplitter with default settings
+
+    Returns:
+        Chunks with ``chunk_id`` and related metadata assigned
+    """
+    return assign_chunk_ids((splitter or DocumentSplitter()).split(documents))
@@ -0,0 +1,210 @@
+"""
+Circuit breaker for calls to the Ollama LLM backend.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_after:.1f}s")
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker with closed, open and half-open states.
+
+    The breaker opens after ``failure_threshold`` consecutive failures and
+    rejects calls until ``recovery_timeout`` seconds have passed. It then
+    lets up to ``half_open_max_calls`` trial calls through; a success closes
+    the circuit again and a failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str = "ollama",
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            name: Name used in logs and status output
+            failure_threshold: Consecutive failures before the circuit opens
+            recovery_timeout: Seconds to wait before allowing trial calls
+            half_open_max_calls: Concurrent trial calls allowed when half-open
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._total_failures = 0
+        self._total_successes = 0
+        self._total_rejected = 0
+        self._last_failure = None
+        self._last_state_change = time.time()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], name: str = "ollama") -> "CircuitBreaker":
+        """
+        Create a circuit breaker from the ``resilience.circuit_breaker`` config section.
+
+        Environment variables take precedence over the config file.
+
+        Args:
+            config: Circuit breaker configuration dictionary
+            name: Name of the protected backend
+
+        Returns:
+            A configured CircuitBreaker
+        """
+        return cls(
+            name=name,
+            failure_threshold=int(os.environ.get(
+                "LLM_CIRCUIT_FAILURE_THRESHOLD", config.get("failure_threshold", 5))),
+            recovery_timeout=float(os.environ.get(
+                "LLM_CIRCUIT_RECOVERY_TIMEOUT", config.get("recovery_timeout", 30))),
+            half_open_max_calls=int(os.environ.get(
+                "LLM_CIRCUIT_HALF_OPEN_MAX_CALLS", config.get("half_open_max_calls", 1)))
+        )
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the timeout has elapsed."""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _set_state(self, state: str):
+        if state != self._state:
+            logger.warning(f"⚡ Circuit '{self.name}' changed state: {self._state} -> {state}")
+            self._state = state
+            self._last_state_change = time.time()
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._set_state(HALF_OPEN)
+            self._half_open_in_flight = 0
+
+    def _retry_after(self) -> float:
+        if self._state != OPEN:
+            return 0.0
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may proceed and reserve a trial slot when half-open.
+
+        Every call that returns True must be followed by ``record_success``,
+        ``record_failure`` or ``release``.
+
+        Returns:
+            True if the call may proceed, False if it should fail fast
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            self._total_rejected += 1
+            return False
+
+    def check(self):
+        """
+        Reserve a call or raise if the circuit is open.
+
+        Raises:
+            CircuitOpenError: If the call is rejected
+        """
+        if not self.allow_request():
+            with self._lock:
+                retry_after = self._retry_after()
+            raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self):
+        """Record a successful call, closing the circuit if it was half-open."""
+        with self._lock:
+            self._total_successes += 1
+            self._consecutive_failures = 0
+            if self._state == HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                self._set_state(CLOSED)
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        """
+        Record a failed call, opening the circuit once the threshold is reached.
+
+        Args:
+            error: Optional exception that caused the failure
+        """
+        with self._lock:
+            self._total_failures += 1
+            self._consecutive_failures += 1
+            self._last_failure = str(error) if error is not None else None
+            if self._state == HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+            elif self._state == CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def release(self):
+        """Release a reserved call that ended without a verdict (e.g. it was cancelled)."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def reset(self):
+        """Force the circuit back to the closed state."""
+        with self._lock:
+            self._consecutive_failures = 0
+            self._half_open_in_flight = 0
+            self._set_state(CLOSED)
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get the breaker state and counters.
+
+        Returns:
+            Dictionary describing the breaker
+        """
+        with self._lock:
+            self._maybe_half_open()
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+                "retry_after": round(self._retry_after(), 2),
+                "total_successes": self._total_successes,
+                "total_failures": self._total_failures,
+                "total_rejected": self._total_rejected,
+                "last_failure": self._last_failure,
+                "last_state_change": self._last_state_change
+            }
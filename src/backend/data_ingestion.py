@@ -2,32 +2,58 @@
 Data ingestion module for the RAG-enabled LLM system.
 """
 import os
+import mmap
+import codecs
 import logging
 import random
-from typing import List, Dict, Any, Optional, Union
+import tarfile
+import zipfile
+import contextlib
+from typing import List, Dict, Any, Optional, Union, Iterator, IO, Tuple
 from pathlib import Path
-import tempfile
-import shutil
-from github import Github
 from langchain_community.document_loaders import (
     TextLoader, 
-    UnstructuredMarkdownLoader,
-    DirectoryLoader,
-    GitLoader
+    UnstructuredMarkdownLoader
 )
 from langchain.schema import Document
+from .repo_cache import RepoCache
+from .file_filters import FileFilter, glob_patterns
+from .generated_files import GeneratedFileFilter, parse_gitattributes
+from .github_archive import TarballDownload
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Files at least this large are read through mmap instead of a buffered read
+MMAP_THRESHOLD = 256 * 1024
+# Bytes of a mapped file decoded at a time
+MMAP_DECODE_CHUNK = 1024 * 1024
+BINARY_SNIFF_BYTES = 8192
+
+TAR_SUFFIXES = (".tar.gz", ".tgz", ".tar.bz2", ".tar.xz", ".tar")
+ZIP_SUFFIXES = (".zip",)
+
 class DataIngestionManager:
     """
     Manager for ingesting data from various sources into the RAG system.
     """
     
-    def __init__(self):
-        """Initialize the data ingestion manager."""
-        pass
+    def __init__(self, repo_cache: Optional[RepoCache] = None):
+        """
+        Initialize the data ingestion manager.
+        
+        Args:
+            repo_cache: Optional clone cache for GitHub repositories. Defaults to
+                the cache configured by RAG_REPO_CACHE_DIR
+        """
+        self._repo_cache = repo_cache
+    
+    @property
+    def repo_cache(self) -> RepoCache:
+        """The persistent clone cache, created on first use."""
+        if self._repo_cache is None:
+            self._repo_cache = RepoCache()
+        return self._repo_cache
     
     def ingest_text(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> List[Document]:
         """
@@ -45,7 +71,7 @@ class DataIngestionManager:
                 metadata = {}
             
             document = Document(page_content=text, metadata=metadata)
-            logger.info(f"Ingested text with metadata: {metadata}")
+            logger.debug(f"Ingested text with metadata: {metadata}")
             return [document]
         except Exception as e:
             logger.error(f"Error ingesting text: {str(e)}")
@@ -97,45 +123,215 @@ class DataIngestionManager:
             logger.error(f"Error ingesting text file: {str(e)}")
             raise
     
-    def ingest_directory(self, dir_path: Union[str, Path], glob: str = "**/*.*") -> List[Document]:
+    def ingest_directory(
+        self,
+        dir_path: Union[str, Path],
+        glob: str = "**/*.*",
+        file_filter: Optional[FileFilter] = None
+    ) -> List[Document]:
         """
         Ingest all files in a directory.
         
+        The directory is walked in parallel and binary or oversized files are
+        skipped. For large directories prefer streaming ``iter_directory_files``
+        into ``RAGEngine.ingest`` with ``load_local_file`` as the loader.
+        
         Args:
             dir_path: Path to the directory
-            glob: Glob pattern for files to include
+            glob: Glob pattern for files to include; supports ``{a,b}`` alternatives
+            file_filter: Optional filter for size and excluded paths
             
         Returns:
             List of Document objects
         """
         try:
-            loader = DirectoryLoader(
-                str(dir_path),
-                glob=glob,
-                loader_cls=TextLoader
-            )
-            documents = loader.load()
+            root = os.path.abspath(str(dir_path))
+            documents = []
+            for rel_path, _ in self.iter_directory_files(root, glob, file_filter):
+                document = load_local_file(root, rel_path)
+                if document is not None:
+                    documents.append(document)
             logger.info(f"Ingested {len(documents)} files from directory: {dir_path}")
             return documents
         except Exception as e:
             logger.error(f"Error ingesting directory: {str(e)}")
             raise
     
+    def iter_directory_files(
+        self,
+        dir_path: Union[str, Path],
+        glob: str = "**/*",
+        file_filter: Optional[FileFilter] = None,
+        workers: Optional[int] = None
+    ) -> Iterator[Tuple[str, os.stat_result]]:
+        """
+        Walk a directory in parallel and yield the files to ingest, without reading them.
+        
+        Args:
+            dir_path: Path to the directory
+            glob: Glob pattern for files to include; supports ``{a,b}`` alternatives
+            file_filter: Optional filter for size and excluded paths. Its include
+                paths are replaced by the glob
+            workers: Number of directories listed concurrently
+            
+        Returns:
+            Iterator of (path relative to the directory, stat result)
+        """
+        walk_args = {"workers": workers} if workers else {}
+        return self.directory_file_filter(glob, file_filter).walk(str(dir_path), **walk_args)
+    
+    @staticmethod
+    def directory_file_filter(glob: str, file_filter: Optional[FileFilter] = None) -> FileFilter:
+        """
+        Combine a directory glob with a filter's extension, size and exclude settings.
+        
+        Args:
+            glob: Glob pattern for files to include; supports ``{a,b}`` alternatives
+            file_filter: Optional filter whose include paths are replaced by the glob
+            
+        Returns:
+            The combined FileFilter
+        """
+        base_filter = file_filter or FileFilter()
+        return FileFilter(
+            extensions=base_filter.extensions,
+            max_file_size_kb=base_filter.max_file_size_kb,
+            include_paths=glob_patterns(glob),
+            exclude_paths=base_filter.exclude_paths
+        )
+    
+    def iter_upload_documents(
+        self,
+        fileobj: IO[bytes],
+        filename: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        file_filter: Optional[FileFilter] = None,
+        skipped: Optional[List[str]] = None
+    ) -> Iterator[Document]:
+        """
+        Lazily turn an uploaded file or archive into Documents.
+        
+        ``.tar.gz``/``.tgz``/``.tar`` archives are read as a stream, one member at a
+        time. ``.zip`` archives are read member by member from the (spooled)
+        upload, since the zip index is stored at the end of the file. Other
+        uploads are treated as a single text file. Members are not extracted to
+        disk; binary, filtered and oversized files are skipped.
+        
+        Document sources are ``<prefix>/<member path>`` for archive members and
+        ``<prefix>/<file name>`` for single files. The prefix is ``metadata["source"]``,
+        or for archives the archive's file name; single files without one use
+        just the file name. Re-uploading the same content therefore replaces its
+        previous chunks instead of duplicating them.
+        
+        Args:
+            fileobj: Binary file object positioned at the start of the upload
+            filename: Name of the uploaded file
+            metadata: Metadata added to every document
+            file_filter: Optional extension, path and size filter for archive members
+            skipped: Optional list collecting the names of skipped files
+            
+        Returns:
+            Iterator of Documents, one per text file
+        """
+        metadata = dict(metadata or {})
+        prefix = str(metadata.pop("source", None) or "").rstrip("/")
+        metadata.setdefault("source_type", "upload")
+        file_filter = file_filter or FileFilter()
+        skipped = skipped if skipped is not None else []
+        lower_name = filename.lower()
+        
+        if lower_name.endswith(TAR_SUFFIXES + ZIP_SUFFIXES):
+            prefix = prefix or filename
+        if lower_name.endswith(TAR_SUFFIXES):
+            members = self._iter_tar_members(fileobj, file_filter, skipped)
+        elif lower_name.endswith(ZIP_SUFFIXES):
+            members = self._iter_zip_members(fileobj, file_filter, skipped)
+        else:
+            max_bytes = file_filter.max_file_size_kb * 1024 if file_filter.max_file_size_kb else -1
+            content = fileobj.read(max_bytes + 1 if max_bytes >= 0 else -1)
+            if max_bytes >= 0 and len(content) > max_bytes:
+                skipped.append(filename)
+                return
+            members = iter([(None, content)])
+        
+        for member_path, content in members:
+            name = member_path or filename
+            source = f"{prefix}/{name}" if prefix else name
+            text = _decode_text(content)
+            if text is None:
+                skipped.append(name)
+                continue
+            doc_metadata = dict(metadata)
+            doc_metadata.update({
+                "source": source,
+                "file_path": source,
+                "file_name": os.path.basename(name),
+                "file_type": Path(name).suffix
+            })
+            if member_path:
+                doc_metadata["archive"] = filename
+            yield from self.ingest_text(text, doc_metadata)
+    
+    @staticmethod
+    def _iter_tar_members(fileobj: IO[bytes], file_filter: FileFilter, skipped: List[str]) -> Iterator[Tuple[str, bytes]]:
+        # "r|*" reads the archive strictly sequentially, whatever its compression
+        with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                member_path = _normalize_member_path(member.name)
+                if not member_path or not file_filter.matches_path(member_path):
+                    continue
+                if not file_filter.matches_size(member.size):
+                    skipped.append(member_path)
+                    continue
+                extracted = archive.extractfile(member)
+                if extracted is not None:
+                    yield member_path, extracted.read()
+    
+    @staticmethod
+    def _iter_zip_members(fileobj: IO[bytes], file_filter: FileFilter, skipped: List[str]) -> Iterator[Tuple[str, bytes]]:
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                member_path = _normalize_member_path(info.filename)
+                if not member_path or not file_filter.matches_path(member_path):
+                    continue
+                if not file_filter.matches_size(info.file_size):
+                    skipped.append(member_path)
+                    continue
+                with archive.open(info) as member:
+                    yield member_path, member.read()
+    
     def ingest_github_repo(
         self, 
         repo_url: str, 
         branch: str = "main",
         github_token: Optional[str] = None,
-        file_filter: Optional[List[str]] = None
+        file_filter: Optional[Union[FileFilter, List[str]]] = None,
+        shallow: bool = True,
+        sparse: bool = False,
+        generated_filter: Optional[GeneratedFileFilter] = None,
+        upstream_url: Optional[str] = None
     ) -> List[Document]:
         """
-        Ingest a GitHub repository.
+        Ingest all files of a GitHub repository.
+        
+        The repository is cloned into (or refreshed in) the persistent clone cache.
+        Files are selected by extension, path and size before they are read, and
+        vendored, generated and minified files are skipped if ``generated_filter`` is given.
         
         Args:
             repo_url: URL of the GitHub repository
             branch: Branch to clone
             github_token: Optional GitHub token for private repos
-            file_filter: Optional list of file extensions to include
+            file_filter: Optional FileFilter or list of file extensions to include
+            shallow: Whether to clone only the latest commit
+            sparse: Whether to use a partial clone that only fetches matching files
+            generated_filter: Optional filter for vendored, generated and minified files
+            upstream_url: URL of the repository this one was forked from, whose
+                clone cache mirror it shares
             
         Returns:
             List of Document objects
@@ -171,45 +367,553 @@ class DataIngestionManager:
         try:
             logger.info(f"📥 Starting ingestion of GitHub repository: {repo_url} (branch: {branch})")
             
-            with tempfile.TemporaryDirectory() as temp_dir:
-                if github_token:
-                    logger.info(f"🔑 Using GitHub token for authentication with repository: {repo_url}")
-                    g = Github(github_token)
-                    repo_name = repo_url.split('/')[-2] + '/' + repo_url.split('/')[-1]
-                    repo = g.get_repo(repo_name)
-                    logger.info(f"✅ Successfully authenticated with GitHub for repository: {repo_name}")
-                    
-                    loader = GitLoader(
-                        clone_url=repo_url,
-                        repo_path=temp_dir,
-                        branch=branch
-                    )
-                else:
-                    logger.info(f"⚠️ No GitHub token provided, attempting public repository access: {repo_url}")
-                    loader = GitLoader(
-                        clone_url=repo_url,
-                        repo_path=temp_dir,
-                        branch=branch
-                    )
-                
-                logger.info(f"🔄 Cloning repository: {repo_url} to temporary directory")
-                documents = loader.load()
-                logger.info(f"✅ Successfully loaded {len(documents)} documents from repository: {repo_url}")
-                
-                if file_filter:
-                    logger.info(f"🔍 Filtering documents by extensions: {file_filter}")
-                    filtered_docs = []
-                    for doc in documents:
-                        file_ext = Path(doc.metadata.get("source", "")).suffix
-                        if file_ext in file_filter:
-                            filtered_docs.append(doc)
-                    
-                    logger.info(f"📊 Filtered from {len(documents)} to {len(filtered_docs)} documents based on extensions")
-                    documents = filtered_docs
-                
-                logger.info(f"📚 Successfully ingested {len(documents)} files from GitHub repo: {repo_url}")
-                logger.info(f"💾 Documents ready to be added to the database")
-                return documents
+            file_filter = FileFilter.coerce(file_filter)
+            repo_path, head_sha = self.repo_cache.sync(
+                repo_url,
+                branch,
+                github_token,
+                shallow=shallow,
+                sparse_patterns=file_filter.sparse_patterns() if sparse else None,
+                upstream_url=upstream_url
+            )
+            selected = file_filter.select_files_with_sizes(repo_path, RepoCache.list_files(repo_path))
+            if generated_filter is not None:
+                selected, _ = generated_filter.filter_files(repo_path, selected)
+            documents = self._load_repo_files(
+                repo_path,
+                [rel_path for rel_path, _ in selected],
+                {"repo_url": repo_url, "branch": branch, "commit_sha": head_sha}
+            )
+            
+            logger.info(f"📚 Successfully ingested {len(documents)} files from GitHub repo: {repo_url}")
+            logger.info(f"💾 Documents ready to be added to the database")
+            return documents
         except Exception as e:
             logger.error(f"❌ Error ingesting GitHub repo {repo_url}: {str(e)}")
             raise
+    
+    def sync_github_repo(
+        self,
+        repo_url: str,
+        branch: str = "main",
+        github_token: Optional[str] = None,
+        file_filter: Optional[Union[FileFilter, List[str]]] = None,
+        shallow: bool = True,
+        sparse: bool = False,
+        known_changes: Optional[Dict[str, Any]] = None,
+        generated_filter: Optional[GeneratedFileFilter] = None,
+        upstream_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Incrementally ingest a GitHub repository using the persistent clone cache.
+        
+        The cached clone is fetched and diffed against the last ingested commit.
+        Only added or modified files are selected. If there is no usable previous
+        commit, or the file filter changed since the last run, every file is
+        selected and ``full_reingest`` is set. Files are selected by extension,
+        path and size; their contents are not read here. Pass ``file_paths`` to
+        ``RAGEngine.ingest`` with ``load_repo_file`` as the loader to stream them
+        into the vector store.
+        
+        ``known_changes`` (e.g. from push webhooks) are used instead of diffing
+        the clone when they span exactly from the last ingested commit to the
+        fetched head, including when the last ingested commit is not in the clone.
+        
+        With a ``generated_filter``, vendored, generated and minified files are
+        dropped from ``file_paths`` and listed in ``skipped_files``. They stay in
+        ``changed_paths``, so chunks of files that became generated are removed.
+        
+        Once the changes are stored, call ``record_ingested_commit`` with the
+        returned ``commit_sha``, so that a failed write is retried on the next run.
+        
+        Args:
+            repo_url: URL of the GitHub repository
+            branch: Branch to ingest
+            github_token: Optional GitHub token for private repos
+            file_filter: Optional FileFilter or list of file extensions to include
+            shallow: Whether to clone and fetch only the latest commit
+            sparse: Whether to use a partial clone that only fetches matching files
+            known_changes: Optional dictionary with ``before`` and ``after`` commit
+                SHAs and the ``changed_paths`` and ``deleted_paths`` between them
+            generated_filter: Optional filter for vendored, generated and minified files
+            upstream_url: URL of the repository this one was forked from, whose
+                clone cache mirror it shares
+            
+        Returns:
+            Dictionary with keys:
+                - repo_path: Working copy path
+                - file_paths: Added or modified files to load
+                - total_bytes: Combined size of ``file_paths``
+                - metadata: Metadata to pass to ``load_repo_file``
+                - changed_paths: Added or modified paths that pass the path filters
+                - deleted_paths: Deleted paths whose chunks should be removed
+                - commit_sha: The new head commit
+                - previous_sha: The previously ingested commit, if any
+                - full_reingest: Whether the whole repository was loaded
+                - filter_signature: Signature of the file filter, to pass to
+                  ``record_ingested_commit``
+                - skipped_files: Vendored, generated and minified files that
+                  were not selected, as {"path", "size", "reason"}
+        """
+        file_filter = FileFilter.coerce(file_filter)
+        if os.environ.get("RAG_TEST_MODE") == "true":
+            return {
+                "repo_path": None,
+                "file_paths": [],
+                "total_bytes": 0,
+                "metadata": {"repo_url": repo_url, "branch": branch},
+                "changed_paths": [],
+                "deleted_paths": [],
+                "commit_sha": "0" * 40,
+                "previous_sha": None,
+                "full_reingest": True,
+                "filter_signature": file_filter.signature(),
+                "skipped_files": []
+            }
+        
+        try:
+            logger.info(f"📥 Syncing GitHub repository: {repo_url} (branch: {branch})")
+            repo_state = self.repo_cache.get_repo_state(repo_url, branch)
+            previous_sha = repo_state.get("last_ingested_sha")
+            filter_signature = file_filter.signature()
+            if generated_filter is not None:
+                filter_signature = generated_filter.combine_signature(filter_signature)
+            filter_changed = bool(previous_sha) and repo_state.get("filter_signature") != filter_signature
+            
+            repo_path, head_sha = self.repo_cache.sync(
+                repo_url,
+                branch,
+                github_token,
+                shallow=shallow,
+                sparse_patterns=file_filter.sparse_patterns() if sparse else None,
+                upstream_url=upstream_url
+            )
+            
+            if previous_sha == head_sha and not filter_changed:
+                logger.info(f"✅ Repository {repo_url} is unchanged at {head_sha[:8]}, nothing to ingest")
+                return {
+                    "repo_path": repo_path,
+                    "file_paths": [],
+                    "total_bytes": 0,
+                    "metadata": {"repo_url": repo_url, "branch": branch, "commit_sha": head_sha},
+                    "changed_paths": [],
+                    "deleted_paths": [],
+                    "commit_sha": head_sha,
+                    "previous_sha": previous_sha,
+                    "full_reingest": False,
+                    "filter_signature": filter_signature,
+                    "skipped_files": []
+                }
+            
+            if (known_changes and previous_sha and not filter_changed
+                    and known_changes["before"] == previous_sha and known_changes["after"] == head_sha):
+                changed_paths = list(known_changes["changed_paths"])
+                deleted_paths = list(known_changes["deleted_paths"])
+                full_reingest = False
+                logger.info(f"🔍 {repo_url}: {len(changed_paths)} changed and {len(deleted_paths)} deleted files "
+                            f"between {previous_sha[:8]} and {head_sha[:8]} (from push events)")
+            elif previous_sha and not filter_changed and RepoCache.has_commit(repo_path, previous_sha):
+                changed_paths, deleted_paths = RepoCache.diff(repo_path, previous_sha, head_sha)
+                full_reingest = False
+                logger.info(f"🔍 {repo_url}: {len(changed_paths)} changed and {len(deleted_paths)} deleted files "
+                            f"between {previous_sha[:8]} and {head_sha[:8]}")
+            else:
+                if filter_changed:
+                    logger.info(f"🔧 File filter of {repo_url} changed, re-ingesting the whole repository")
+                elif previous_sha:
+                    logger.warning(f"⚠️ Previously ingested commit {previous_sha[:8]} of {repo_url} is not in the "
+                                   f"clone, re-ingesting the whole repository")
+                changed_paths, deleted_paths = RepoCache.list_files(repo_path), []
+                full_reingest = True
+            
+            changed_paths = file_filter.filter_paths(changed_paths)
+            deleted_paths = file_filter.filter_paths(deleted_paths)
+            
+            selected = file_filter.select_files_with_sizes(repo_path, changed_paths)
+            skipped_files = []
+            if generated_filter is not None:
+                selected, skipped_files = generated_filter.filter_files(repo_path, selected)
+            return {
+                "repo_path": repo_path,
+                "file_paths": [rel_path for rel_path, _ in selected],
+                "total_bytes": sum(size for _, size in selected),
+                "metadata": {"repo_url": repo_url, "branch": branch, "commit_sha": head_sha},
+                "changed_paths": changed_paths,
+                "deleted_paths": deleted_paths,
+                "commit_sha": head_sha,
+                "previous_sha": previous_sha,
+                "full_reingest": full_reingest,
+                "filter_signature": filter_signature,
+                "skipped_files": skipped_files
+            }
+        except Exception as e:
+            logger.error(f"❌ Error syncing GitHub repo {repo_url}: {str(e)}")
+            raise
+    
+    @contextlib.contextmanager
+    def sync_github_archive(
+        self,
+        repo_url: str,
+        branch: str = "main",
+        github_token: Optional[str] = None,
+        file_filter: Optional[Union[FileFilter, List[str]]] = None,
+        generated_filter: Optional[GeneratedFileFilter] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Download the head of a branch as a tarball and stream its files as Documents.
+        
+        The archive comes from the GitHub tarball API (``GITHUB_API_URL``) and is
+        extracted while it downloads. Nothing is written to disk, and members
+        that fail the filters are skipped without being decoded. If the last
+        ingestion of the branch was a download with the same filter settings, its
+        ETag is sent, and an unchanged branch is not downloaded again. There is
+        no history to diff against, so every matching file is returned; unchanged
+        chunks are still not embedded again.
+        
+        Use as a context manager; the connection stays open until it exits. Once
+        the documents are stored, call ``record_ingested_commit`` with the
+        ``commit_sha`` from ``archive`` and the returned ``etag``.
+        
+        Args:
+            repo_url: URL of the GitHub repository
+            branch: Branch to download
+            github_token: Optional GitHub token for private repos
+            file_filter: Optional FileFilter or list of file extensions to include
+            generated_filter: Optional filter for vendored, generated and minified files
+            
+        Returns:
+            Context manager yielding a dictionary with keys:
+                - not_modified: Whether the branch is unchanged since the last download
+                - documents: Lazy iterator of Documents
+                - skipped_files: Vendored, generated and minified files, filled
+                  while ``documents`` is consumed
+                - archive: Filled with ``commit_sha`` once the archive is opened
+                - etag: ETag of this download
+                - filter_signature: Signature of the file filters
+                - download: The TarballDownload, e.g. for ``bytes_downloaded``
+        """
+        file_filter = FileFilter.coerce(file_filter)
+        filter_signature = file_filter.signature()
+        if generated_filter is not None:
+            filter_signature = generated_filter.combine_signature(filter_signature)
+        if os.environ.get("RAG_TEST_MODE") == "true":
+            yield {
+                "not_modified": False,
+                "documents": iter([]),
+                "skipped_files": [],
+                "archive": {"commit_sha": "0" * 40},
+                "etag": None,
+                "filter_signature": filter_signature,
+                "download": None
+            }
+            return
+        
+        repo_state = self.repo_cache.get_repo_state(repo_url, branch)
+        etag = None
+        if (repo_state.get("filter_signature") == filter_signature
+                and repo_state.get("archive_sha") and repo_state.get("archive_sha") == repo_state.get("last_ingested_sha")):
+            etag = repo_state.get("archive_etag")
+        
+        logger.info(f"📥 Downloading {repo_url} (branch: {branch}) as a tarball")
+        with TarballDownload(repo_url, branch, github_token, etag=etag) as download:
+            if download.not_modified:
+                logger.info(f"✅ Repository {repo_url} is unchanged at {repo_state['last_ingested_sha'][:8]} "
+                            f"(ETag), nothing to ingest")
+            archive = {"commit_sha": repo_state.get("last_ingested_sha") if download.not_modified else None}
+            skipped_files = []
+            documents = iter([]) if download.not_modified else self.iter_archive_documents(
+                download.stream,
+                {"repo_url": repo_url, "branch": branch},
+                file_filter,
+                generated_filter,
+                skipped_files,
+                archive
+            )
+            yield {
+                "not_modified": download.not_modified,
+                "documents": documents,
+                "skipped_files": skipped_files,
+                "archive": archive,
+                "etag": download.etag,
+                "filter_signature": filter_signature,
+                "download": download
+            }
+    
+    def iter_archive_documents(
+        self,
+        fileobj: IO[bytes],
+        metadata: Dict[str, Any],
+        file_filter: FileFilter,
+        generated_filter: Optional[GeneratedFileFilter] = None,
+        skipped_files: Optional[List[Dict[str, Any]]] = None,
+        archive: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Document]:
+        """
+        Lazily turn a repository tarball into Documents.
+        
+        The archive is laid out like ``git archive --prefix`` output, as the GitHub
+        tarball API returns it: one top-level directory holding the repository,
+        with the commit SHA in the pax global header. Members are read strictly
+        in order. The root .gitattributes is applied to the members after it;
+        git archive puts it before the files of ordinary names.
+        
+        Args:
+            fileobj: Binary stream positioned at the start of the archive
+            metadata: Metadata added to every document, e.g. ``repo_url`` and ``branch``
+            file_filter: Extension, path and size filter for members
+            generated_filter: Optional filter for vendored, generated and minified files
+            skipped_files: Optional list collecting skipped files as {"path", "size", "reason"}
+            archive: Optional dictionary that receives the ``commit_sha``
+            
+        Returns:
+            Iterator of Documents with the same metadata as ``load_repo_file``
+        """
+        skipped_files = skipped_files if skipped_files is not None else []
+        archive = archive if archive is not None else {}
+        gitattributes = []
+        too_large = 0
+        # "r|*" reads the archive strictly sequentially, whatever its compression
+        with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+            commit_sha = tar.pax_headers.get("comment")
+            for member in tar:
+                member_path = _normalize_member_path(member.name)
+                prefix, _, rel_path = member_path.partition("/")
+                if not commit_sha and prefix:
+                    # Abbreviated SHA from the owner-repo-<sha> directory name
+                    commit_sha = prefix.rsplit("-", 1)[-1]
+                if not archive.get("commit_sha"):
+                    archive["commit_sha"] = commit_sha
+                if not member.isfile() or not rel_path:
+                    continue
+                is_gitattributes = rel_path == ".gitattributes" and generated_filter is not None
+                if not is_gitattributes and not file_filter.matches_path(rel_path):
+                    continue
+                if not file_filter.matches_size(member.size):
+                    too_large += 1
+                    continue
+                reason = generated_filter.check_path(rel_path, gitattributes) if generated_filter and generated_filter.enabled else None
+                if reason is not None:
+                    skipped_files.append({"path": rel_path, "size": member.size, "reason": reason})
+                    continue
+                extracted = tar.extractfile(member)
+                if extracted is None:
+                    continue
+                content = extracted.read()
+                if is_gitattributes:
+                    gitattributes = parse_gitattributes(content.decode("utf-8", errors="replace"))
+                    if not file_filter.matches_path(rel_path):
+                        continue
+                if generated_filter is not None and generated_filter.should_sample(rel_path, gitattributes):
+                    reason = generated_filter.check_content(rel_path, member.size, content[:generated_filter.sample_bytes])
+                    if reason is not None:
+                        skipped_files.append({"path": rel_path, "size": member.size, "reason": reason})
+                        continue
+                text = _decode_text(content)
+                if text is None:
+                    continue
+                doc_metadata = dict(metadata)
+                doc_metadata.update({
+                    "commit_sha": archive["commit_sha"],
+                    "source": rel_path,
+                    "file_path": rel_path,
+                    "file_name": os.path.basename(rel_path),
+                    "file_type": Path(rel_path).suffix
+                })
+                yield Document(page_content=text, metadata=doc_metadata)
+        
+        if too_large:
+            logger.info(f"⏭️ Skipped {too_large} files larger than {file_filter.max_file_size_kb} KB")
+    
+    def record_ingested_commit(
+        self,
+        repo_url: str,
+        branch: str,
+        sha: str,
+        filter_signature: Optional[str] = None,
+        archive_etag: Optional[str] = None
+    ):
+        """
+        Record that a commit of a repository branch has been fully ingested.
+        
+        Args:
+            repo_url: URL of the GitHub repository
+            branch: Branch name
+            sha: The ingested commit SHA
+            filter_signature: Signature of the file filter used for the ingestion
+            archive_etag: ETag of the tarball the commit was ingested from, if any
+        """
+        if os.environ.get("RAG_TEST_MODE") == "true":
+            return
+        values = {"filter_signature": filter_signature}
+        if archive_etag:
+            values.update({"archive_etag": archive_etag, "archive_sha": sha})
+        self.repo_cache.record_ingested_commit(repo_url, branch, sha, **values)
+    
+    def _load_repo_files(
+        self,
+        repo_path: str,
+        file_paths: List[str],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """
+        Load repository files as Documents.
+        
+        Files that are missing or are not valid UTF-8 text are skipped.
+        
+        Args:
+            repo_path: Working copy path
+            file_paths: Repository-relative paths to load, already filtered
+            metadata: Metadata added to every document
+            
+        Returns:
+            List of Document objects
+        """
+        documents = []
+        for rel_path in file_paths:
+            document = self.load_repo_file(repo_path, rel_path, metadata)
+            if document is not None:
+                documents.append(document)
+        
+        logger.info(f"✅ Loaded {len(documents)} documents from {repo_path}")
+        return documents
+    
+    def load_repo_file(
+        self,
+        repo_path: str,
+        rel_path: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Optional[Document]:
+        """
+        Load a single repository file as a Document.
+        
+        Args:
+            repo_path: Working copy path
+            rel_path: Repository-relative path of the file
+            metadata: Metadata added to the document
+            
+        Returns:
+            The Document, or None if the file is missing or not valid UTF-8 text
+        """
+        return load_repo_file(repo_path, rel_path, metadata)
+
+
+def load_repo_file(
+    repo_path: str,
+    rel_path: str,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Optional[Document]:
+    """
+    Load a single repository file as a Document.
+    
+    This is a module-level function so it can be shipped to ingestion worker
+    processes, e.g. as ``functools.partial(load_repo_file, repo_path, metadata=...)``.
+    
+    Args:
+        repo_path: Working copy path
+        rel_path: Repository-relative path of the file
+        metadata: Metadata added to the document
+        
+    Returns:
+        The Document, or None if the file is missing or not valid UTF-8 text
+    """
+    full_path = os.path.join(repo_path, rel_path)
+    try:
+        with open(full_path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except UnicodeDecodeError:
+        return None
+    except OSError as e:
+        logger.warning(f"Could not read {rel_path}: {str(e)}")
+        return None
+    
+    doc_metadata = dict(metadata or {})
+    doc_metadata.update({
+        "source": rel_path,
+        "file_path": rel_path,
+        "file_name": os.path.basename(rel_path),
+        "file_type": Path(rel_path).suffix
+    })
+    return Document(page_content=content, metadata=doc_metadata)
+
+
+def load_local_file(
+    root: str,
+    rel_path: str,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Optional[Document]:
+    """
+    Load a file from a local directory as a Document.
+    
+    Small files are read with a single bulk read. Large ones are mapped and
+    decoded incrementally from the mapping, so the file's bytes are never copied
+    into a second buffer next to the decoded text. Binary files (NUL bytes in
+    the first 8 KB) and files that are not valid UTF-8 are skipped. Module-level
+    so it can be used as a loader in ingestion worker processes.
+    
+    Args:
+        root: Directory the file belongs to
+        rel_path: Path of the file relative to ``root``
+        metadata: Metadata added to the document
+        
+    Returns:
+        The Document, or None if the file is missing, empty or not text
+    """
+    full_path = os.path.join(root, rel_path)
+    try:
+        with open(full_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return None
+            if size < MMAP_THRESHOLD:
+                text = _decode_text(f.read())
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    if b"\0" in mapped[:BINARY_SNIFF_BYTES]:
+                        return None
+                    text = _decode_mapped_text(mapped)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read {full_path}: {str(e)}")
+        return None
+    if text is None:
+        return None
+    
+    doc_metadata = dict(metadata or {})
+    doc_metadata.update({
+        "source": full_path,
+        "directory": root,
+        "file_path": rel_path,
+        "file_name": os.path.basename(rel_path),
+        "file_type": Path(rel_path).suffix
+    })
+    return Document(page_content=text, metadata=doc_metadata)
+
+
+def _normalize_member_path(name: str) -> str:
+    """Make an archive member name relative, dropping ``./`` and ``..`` parts."""
+    parts = [part for part in name.replace("\\", "/").split("/") if part not in ("", ".", "..")]
+    return "/".join(parts)
+
+
+def _decode_mapped_text(mapped: mmap.mmap) -> Optional[str]:
+    """Decode a mapped file as UTF-8 text in chunks, or return None if it is not valid UTF-8."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts = []
+    try:
+        with memoryview(mapped) as view:
+            for start in range(0, len(view), MMAP_DECODE_CHUNK):
+                with view[start:start + MMAP_DECODE_CHUNK] as chunk:
+                    parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b"", final=True))
+    except UnicodeDecodeError:
+        return None
+    return "".join(parts)
+
+
+def _decode_text(content: bytes) -> Optional[str]:
+    """Decode file content as UTF-8 text, or return None for binary content."""
+    if b"\0" in content[:BINARY_SNIFF_BYTES]:
+        return None
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
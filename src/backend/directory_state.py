@@ -0,0 +1,174 @@
+"""
+Persistent file state for local directory ingestion.
+Records the mtime, size and content hash of every ingested file in SQLite, so
+a rescan only reads files whose mtime or size changed and only re-embeds files
+whose content changed, including after a restart.
+"""
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import List, Dict, Optional, NamedTuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class FileState(NamedTuple):
+    """Recorded state of an ingested file."""
+    mtime_ns: int
+    size: int
+    sha256: str
+
+
+def hash_file(path: str) -> Optional[str]:
+    """
+    Get the SHA-256 of a file's content.
+
+    Args:
+        path: File path
+
+    Returns:
+        The hex digest, or None if the file cannot be read
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class DirectoryStateStore:
+    """
+    SQLite table of ingested files per directory and glob.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the state store.
+
+        Args:
+            path: SQLite database path. Defaults to the RAG_DIRECTORY_STATE_PATH
+                environment variable or ./data/directory_state.db
+        """
+        self.path = path or os.environ.get("RAG_DIRECTORY_STATE_PATH", "./data/directory_state.db")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " directory TEXT NOT NULL,"
+                " glob TEXT NOT NULL,"
+                " path TEXT NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " sha256 TEXT NOT NULL,"
+                " PRIMARY KEY (directory, glob, path))"
+            )
+
+    def load(self, directory: str, glob: str) -> Dict[str, FileState]:
+        """
+        Get the recorded files of a directory.
+
+        Args:
+            directory: Absolute path of the directory
+            glob: Glob the directory is ingested with
+
+        Returns:
+            Mapping of relative path to recorded state
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT path, mtime_ns, size, sha256 FROM files WHERE directory = ? AND glob = ?",
+                (directory, glob)
+            ).fetchall()
+        return {path: FileState(mtime_ns, size, sha256) for path, mtime_ns, size, sha256 in rows}
+
+    def get(self, directory: str, glob: str, paths: List[str]) -> Dict[str, FileState]:
+        """
+        Get the recorded state of specific files.
+
+        Args:
+            directory: Absolute path of the directory
+            glob: Glob the directory is ingested with
+            paths: Relative paths to look up
+
+        Returns:
+            Mapping of relative path to recorded state, for recorded paths only
+        """
+        states = {}
+        batch_size = 500
+        with self._lock:
+            for i in range(0, len(paths), batch_size):
+                batch = paths[i:i + batch_size]
+                rows = self._connection.execute(
+                    f"SELECT path, mtime_ns, size, sha256 FROM files WHERE directory = ? AND glob = ?"
+                    f" AND path IN ({','.join('?' * len(batch))})",
+                    (directory, glob, *batch)
+                ).fetchall()
+                states.update({path: FileState(mtime_ns, size, sha256) for path, mtime_ns, size, sha256 in rows})
+        return states
+
+    def update(self, directory: str, glob: str, files: Dict[str, FileState], deleted: List[str] = ()):
+        """
+        Record ingested files and forget deleted ones in one transaction.
+
+        Args:
+            directory: Absolute path of the directory
+            glob: Glob the directory is ingested with
+            files: Mapping of relative path to new state
+            deleted: Relative paths to forget
+        """
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO files (directory, glob, path, mtime_ns, size, sha256) VALUES (?, ?, ?, ?, ?, ?)",
+                [(directory, glob, path, *state) for path, state in files.items()]
+            )
+            self._connection.executemany(
+                "DELETE FROM files WHERE directory = ? AND glob = ? AND path = ?",
+                [(directory, glob, path) for path in deleted]
+            )
+
+    def clear(self, directory: Optional[str] = None):
+        """
+        Forget recorded files, e.g. after the vector store was flushed.
+
+        Args:
+            directory: Only forget this directory; everything if None
+        """
+        with self._lock, self._connection:
+            if directory is None:
+                self._connection.execute("DELETE FROM files")
+            else:
+                self._connection.execute("DELETE FROM files WHERE directory = ?", (directory,))
+
+    def count(self) -> int:
+        """Get the number of recorded files."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+
+_state_store: Optional[DirectoryStateStore] = None
+_state_store_lock = threading.Lock()
+
+
+def get_directory_state() -> DirectoryStateStore:
+    """
+    Get the process-wide directory state store.
+
+    Returns:
+        The shared DirectoryStateStore
+    """
+    global _state_store
+    with _state_store_lock:
+        if _state_store is None:
+            _state_store = DirectoryStateStore()
+        return _state_store
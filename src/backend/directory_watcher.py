@@ -0,0 +1,345 @@
+"""
+Filesystem watcher for local directory ingestion.
+Picks up changes in the configured local directories within seconds and
+re-ingests only the changed files. Uses inotify through watchdog when it is
+installed, and falls back to polling mtimes and sizes otherwise.
+"""
+import os
+import time
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Set
+
+from src.backend.file_filters import FileFilter
+from src.backend.ingestion_jobs import get_job_manager
+from src.backend.local_directories import LocalDirectory, DataIngestionManager, ingest_local_directory, load_local_directories
+from src.backend.rag_engine import RAGEngine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKEND_AUTO = "auto"
+BACKEND_INOTIFY = "inotify"
+BACKEND_POLLING = "polling"
+
+# Marker for "rescan the whole directory" (directory moves and deletions, overflows)
+_RESCAN = None
+
+
+class _PendingChanges:
+    """Changed paths of one directory waiting for the debounce window to close."""
+
+    def __init__(self):
+        self.paths: Optional[Set[str]] = set()
+        self.first_event = 0.0
+        self.last_event = 0.0
+
+    def add(self, rel_path: Optional[str]):
+        now = time.monotonic()
+        if not self.first_event:
+            self.first_event = now
+        self.last_event = now
+        if rel_path is _RESCAN:
+            self.paths = None
+        elif self.paths is not None:
+            self.paths.add(rel_path)
+
+    def take(self) -> Optional[List[str]]:
+        paths = None if self.paths is None else sorted(self.paths)
+        self.paths = set()
+        self.first_event = self.last_event = 0.0
+        return paths
+
+    @property
+    def empty(self) -> bool:
+        return not self.first_event
+
+
+class DirectoryWatcher:
+    """
+    Watches local directories and re-ingests changed files after a quiet period.
+
+    Events are debounced per directory: changes are ingested once no new event
+    arrived for ``debounce_ms``, or at the latest after ``max_delay_ms`` during a
+    continuous burst. Ingestion runs as a background job, so it shares the
+    one-job-per-directory rule and the global concurrency cap; changes that
+    arrive while a job is running are ingested by the next one.
+    """
+
+    def __init__(
+        self,
+        directories: List[LocalDirectory],
+        rag_engine: RAGEngine,
+        backend: str = BACKEND_AUTO,
+        debounce_ms: float = 2000,
+        max_delay_ms: float = 30000,
+        poll_interval: float = 10.0
+    ):
+        """
+        Initialize the watcher.
+
+        Args:
+            directories: Directories to watch
+            rag_engine: The RAG engine instance
+            backend: "inotify" (requires watchdog), "polling", or "auto" to use
+                inotify when available
+            debounce_ms: Quiet period before changes are ingested
+            max_delay_ms: Longest a change waits during a continuous burst of events
+            poll_interval: Seconds between scans with the polling backend. Each
+                scan lists the directory and compares mtimes and sizes
+        """
+        self.directories = directories
+        self.rag_engine = rag_engine
+        self.debounce = debounce_ms / 1000.0
+        self.max_delay = max(max_delay_ms / 1000.0, self.debounce)
+        self.poll_interval = poll_interval
+        self.backend = self._resolve_backend(backend)
+
+        self._ingestion_manager = DataIngestionManager()
+        self._filters = [
+            self._ingestion_manager.directory_file_filter(
+                d.glob, FileFilter(max_file_size_kb=d.max_file_size_kb, exclude_paths=d.exclude_paths)
+            )
+            for d in directories
+        ]
+        self._pending: Dict[int, _PendingChanges] = {i: _PendingChanges() for i in range(len(directories))}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+        self._snapshots: Dict[int, Dict[str, tuple]] = {}
+        self.events = 0
+        self.flushes = 0
+
+    @classmethod
+    def from_config(cls, directories: List[LocalDirectory], rag_engine: RAGEngine, config: Dict[str, Any]) -> Optional["DirectoryWatcher"]:
+        """
+        Create a watcher from the ``data_sources.watch`` config section.
+
+        Args:
+            directories: Directories to watch
+            rag_engine: The RAG engine instance
+            config: Watch configuration dictionary
+
+        Returns:
+            A DirectoryWatcher, or None if watching is disabled
+        """
+        enabled = os.environ.get("RAG_WATCH_LOCAL_DIRECTORIES", str(config.get("enabled", True)))
+        if enabled.lower() != "true":
+            return None
+        return cls(
+            directories,
+            rag_engine,
+            backend=os.environ.get("RAG_WATCH_BACKEND", config.get("backend", BACKEND_AUTO)),
+            debounce_ms=float(config.get("debounce_ms", 2000)),
+            max_delay_ms=float(config.get("max_delay_ms", 30000)),
+            poll_interval=float(config.get("poll_interval", 10))
+        )
+
+    @staticmethod
+    def _resolve_backend(backend: str) -> str:
+        if backend == BACKEND_POLLING:
+            return BACKEND_POLLING
+        try:
+            import watchdog.observers  # noqa: F401
+            return BACKEND_INOTIFY
+        except ImportError:
+            if backend == BACKEND_INOTIFY:
+                logger.warning("⚠️ watchdog is not installed, falling back to polling for directory changes")
+            return BACKEND_POLLING
+
+    def start(self):
+        """Start watching in the background."""
+        if self._thread is not None:
+            return
+        if self.backend == BACKEND_INOTIFY:
+            self._start_observer()
+        self._thread = threading.Thread(target=self._run, name="directory-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"👀 Watching {len(self.directories)} local directories ({self.backend})")
+
+    def stop(self):
+        """Stop watching. Pending changes are picked up by the next scan after a restart."""
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _start_observer(self):
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def __init__(self, index: int):
+                self.index = index
+
+            def on_any_event(self, event):
+                if event.event_type in ("opened", "closed_no_write"):
+                    return
+                watcher.notify(self.index, event.src_path, event.is_directory, event.event_type)
+                dest_path = getattr(event, "dest_path", "")
+                if dest_path:
+                    watcher.notify(self.index, dest_path, event.is_directory, event.event_type)
+
+        self._observer = Observer()
+        for index, directory in enumerate(self.directories):
+            if os.path.isdir(directory.path):
+                self._observer.schedule(Handler(index), directory.path, recursive=True)
+        self._observer.start()
+
+    def notify(self, index: int, path: str, is_directory: bool = False, event_type: str = "modified"):
+        """
+        Record a filesystem event.
+
+        File events queue the file. Directories that are created, deleted or
+        moved queue a rescan of the whole directory, since the files moved
+        along with them do not get their own events.
+
+        Args:
+            index: Index of the watched directory
+            path: Absolute path the event is about
+            is_directory: Whether the path is a directory
+            event_type: watchdog event type (created, modified, deleted, moved)
+        """
+        root = os.path.abspath(self.directories[index].path)
+        rel_path = os.path.relpath(os.path.abspath(path), root).replace(os.sep, "/")
+        if rel_path.startswith(".."):
+            return
+        if is_directory:
+            if event_type in ("created", "deleted", "moved") and self._filters[index].matches_directory(rel_path):
+                self._add(index, _RESCAN)
+            return
+        if self._filters[index].matches_path(rel_path):
+            self._add(index, rel_path)
+
+    def _add(self, index: int, rel_path: Optional[str]):
+        with self._lock:
+            self._pending[index].add(rel_path)
+            self.events += 1
+
+    def _run(self):
+        if self.backend == BACKEND_POLLING:
+            # Baseline for the first comparison
+            for index in range(len(self.directories)):
+                self._poll(index)
+        next_poll = time.monotonic() + self.poll_interval
+        while not self._stop.wait(min(self.debounce / 2, 0.5)):
+            if self.backend == BACKEND_POLLING and time.monotonic() >= next_poll:
+                for index in range(len(self.directories)):
+                    self._poll(index)
+                next_poll = time.monotonic() + self.poll_interval
+            self._flush_due()
+
+    def _poll(self, index: int):
+        # Compare mtimes and sizes with the previous scan; files are not read
+        directory = self.directories[index]
+        if not os.path.isdir(directory.path):
+            return
+        snapshot = {
+            rel_path: (file_stat.st_mtime_ns, file_stat.st_size)
+            for rel_path, file_stat in self._filters[index].walk(directory.path)
+        }
+        previous = self._snapshots.get(index)
+        self._snapshots[index] = snapshot
+        if previous is None:
+            return
+        for rel_path in previous.keys() | snapshot.keys():
+            if previous.get(rel_path) != snapshot.get(rel_path):
+                self._add(index, rel_path)
+
+    def _flush_due(self):
+        now = time.monotonic()
+        for index, directory in enumerate(self.directories):
+            with self._lock:
+                pending = self._pending[index]
+                if pending.empty:
+                    continue
+                quiet = now - pending.last_event >= self.debounce
+                overdue = now - pending.first_event >= self.max_delay
+                if not (quiet or overdue):
+                    continue
+                paths = pending.take()
+
+            submitted = self._submit(directory, paths)
+            if not submitted:
+                # A job for this directory is still running; retry with the next flush
+                with self._lock:
+                    for rel_path in (paths if paths is not None else [_RESCAN]):
+                        self._pending[index].add(rel_path)
+
+    def _submit(self, directory: LocalDirectory, paths: Optional[List[str]]) -> bool:
+        if not os.path.isdir(directory.path):
+            return True
+        run = lambda job: ingest_local_directory(directory, self.rag_engine, self._ingestion_manager, job, paths=paths)
+        job, created = get_job_manager().submit(os.path.abspath(directory.path), directory.glob, run)
+        if created:
+            self.flushes += 1
+            what = "rescan" if paths is None else f"{len(paths)} changed paths"
+            logger.info(f"🔄 Re-ingesting {what} in {directory.path} (job {job.id})")
+        return created
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get watcher statistics.
+
+        Returns:
+            Dictionary with the backend, watched directories and event counts
+        """
+        with self._lock:
+            pending = sum(1 for p in self._pending.values() if not p.empty)
+        return {
+            "backend": self.backend,
+            "directories": [d.path for d in self.directories],
+            "events": self.events,
+            "ingestion_runs": self.flushes,
+            "pending_directories": pending
+        }
+
+
+_watcher: Optional[DirectoryWatcher] = None
+
+
+def get_directory_watcher() -> Optional[DirectoryWatcher]:
+    """Get the running directory watcher, if any."""
+    return _watcher
+
+
+def start_directory_watcher(rag_engine: RAGEngine) -> Optional[DirectoryWatcher]:
+    """
+    Start watching the configured local directories, unless disabled by
+    data_sources.watch.enabled or RAG_WATCH_LOCAL_DIRECTORIES.
+
+    Args:
+        rag_engine: The RAG engine instance
+
+    Returns:
+        The started watcher, or None if watching is disabled or nothing is configured
+    """
+    global _watcher
+    if os.environ.get("RAG_TEST_MODE") == "true":
+        return None
+    if _watcher is not None:
+        return _watcher
+    data_sources = rag_engine.config.get("data_sources") or {}
+    directories = [d for d in load_local_directories(rag_engine.config) if os.path.isdir(d.path)]
+    if not directories:
+        return None
+    watcher = DirectoryWatcher.from_config(directories, rag_engine, data_sources.get("watch") or {})
+    if watcher is None:
+        logger.info("ℹ️ Watching local directories is disabled")
+        return None
+    watcher.start()
+    _watcher = watcher
+    return watcher
+
+
+def stop_directory_watcher():
+    """Stop the running directory watcher, if any."""
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
@@ -0,0 +1,241 @@
+"""
+Persistent embedding cache for the RAG-LLM Framework.
+Stores chunk embeddings in SQLite keyed by embedding model and a hash of the
+normalized chunk text, so text that was embedded before (forks, vendored docs,
+license headers, re-ingestion after a flush) is not sent to the model again.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Callable
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE_MB = 1024
+# Approximate per-entry overhead on top of the vector (key, row and index)
+ENTRY_OVERHEAD_BYTES = 96
+# Evict down to this fraction of the maximum size, so eviction does not run on every insert
+EVICTION_TARGET = 0.9
+# Hits refresh an entry's last-used time at most this often
+TOUCH_INTERVAL_SECONDS = 3600
+LOOKUP_BATCH_SIZE = 500
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize chunk text before hashing, so line endings and trailing whitespace
+    do not cause cache misses.
+
+    Args:
+        text: Chunk text
+
+    Returns:
+        The normalized text
+    """
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def text_hash(text: str) -> bytes:
+    """Get the SHA-256 digest of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    SQLite cache of float16 embedding vectors.
+
+    Vectors are stored as float16, which halves the size of float32 vectors
+    and does not measurably change cosine similarities. When the cache grows
+    beyond ``max_size_mb``, the least recently used entries are evicted.
+    """
+
+    def __init__(self, model_name: str, path: Optional[str] = None, max_size_mb: float = DEFAULT_MAX_SIZE_MB):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            model_name: Embedding model the vectors belong to; part of the key
+            path: SQLite database path. Defaults to ./data/embedding_cache.db
+            max_size_mb: Size at which least recently used entries are evicted
+        """
+        self.model_name = model_name
+        self.path = path or "./data/embedding_cache.db"
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " hash BLOB NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " last_used INTEGER NOT NULL,"
+                " PRIMARY KEY (model, hash))"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            count, vector_bytes = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+        self.entries = count
+        self.size_bytes = vector_bytes + count * ENTRY_OVERHEAD_BYTES
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], model_name: str) -> Optional["EmbeddingCache"]:
+        """
+        Create an embedding cache from the ``ingestion.embedding_cache`` config section.
+
+        ``RAG_EMBEDDING_CACHE``, ``RAG_EMBEDDING_CACHE_PATH`` and
+        ``RAG_EMBEDDING_CACHE_MAX_MB`` override the config values.
+
+        Args:
+            config: Embedding cache configuration dictionary
+            model_name: Embedding model the vectors belong to
+
+        Returns:
+            An EmbeddingCache, or None if the cache is disabled
+        """
+        enabled = os.environ.get("RAG_EMBEDDING_CACHE", str(config.get("enabled", True)))
+        if enabled.lower() != "true" or os.environ.get("RAG_TEST_MODE") == "true":
+            return None
+        return cls(
+            model_name,
+            path=os.environ.get("RAG_EMBEDDING_CACHE_PATH", config.get("path")),
+            max_size_mb=float(os.environ.get("RAG_EMBEDDING_CACHE_MAX_MB", config.get("max_size_mb", DEFAULT_MAX_SIZE_MB)))
+        )
+
+    def get_many(self, hashes: List[bytes]) -> Dict[bytes, List[float]]:
+        """
+        Look up cached vectors.
+
+        Args:
+            hashes: Text hashes from ``text_hash``
+
+        Returns:
+            Mapping of hash to vector for the hashes that are cached
+        """
+        found = {}
+        stale = []
+        now = int(time.time())
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for i in range(0, len(unique), LOOKUP_BATCH_SIZE):
+                batch = unique[i:i + LOOKUP_BATCH_SIZE]
+                rows = self._connection.execute(
+                    f"SELECT hash, vector, last_used FROM embeddings WHERE model = ?"
+                    f" AND hash IN ({','.join('?' * len(batch))})",
+                    (self.model_name, *batch)
+                ).fetchall()
+                for digest, vector, last_used in rows:
+                    found[digest] = np.frombuffer(vector, dtype=np.float16).astype(np.float32).tolist()
+                    if now - last_used >= TOUCH_INTERVAL_SECONDS:
+                        stale.append(digest)
+            if stale:
+                with self._connection:
+                    self._connection.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+                        [(now, self.model_name, digest) for digest in stale]
+                    )
+        return found
+
+    def put_many(self, vectors: Dict[bytes, List[float]]):
+        """
+        Store vectors, evicting least recently used entries if the cache is full.
+
+        Args:
+            vectors: Mapping of text hash to vector
+        """
+        if not vectors:
+            return
+        now = int(time.time())
+        rows = [
+            (self.model_name, digest, np.asarray(vector, dtype=np.float16).tobytes(), now)
+            for digest, vector in vectors.items()
+        ]
+        with self._lock:
+            with self._connection:
+                cursor = self._connection.executemany(
+                    "INSERT OR IGNORE INTO embeddings (model, hash, vector, last_used) VALUES (?, ?, ?, ?)", rows
+                )
+            inserted = max(cursor.rowcount, 0)
+            self.entries += inserted
+            self.size_bytes += inserted * (len(rows[0][2]) + ENTRY_OVERHEAD_BYTES)
+            if self.size_bytes > self.max_size_bytes:
+                self._evict()
+
+    def _evict(self):
+        entry_bytes = self.size_bytes / max(self.entries, 1)
+        count = int((self.size_bytes - self.max_size_bytes * EVICTION_TARGET) / entry_bytes) + 1
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (count,)
+            )
+            entries, vector_bytes = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+        self.evictions += self.entries - entries
+        self.entries = entries
+        self.size_bytes = vector_bytes + entries * ENTRY_OVERHEAD_BYTES
+        logger.info(f"🧹 Evicted least recently used embeddings, {self.entries} cached "
+                    f"({self.size_bytes / (1024 * 1024):.1f} MB)")
+
+    def embed(self, texts: List[str], embed_texts: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """
+        Get the embeddings of texts, computing only those that are not cached.
+
+        Texts that normalize to the same content are embedded once.
+
+        Args:
+            texts: Texts to embed
+            embed_texts: Function computing the embeddings of a list of texts
+
+        Returns:
+            One embedding vector per text
+        """
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.get_many(hashes)
+        missing = {}
+        for digest, text in zip(hashes, texts):
+            if digest not in vectors and digest not in missing:
+                missing[digest] = text
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            computed = dict(zip(missing, embed_texts(list(missing.values()))))
+            self.put_many(computed)
+            vectors.update(computed)
+        return [vectors[digest] for digest in hashes]
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with the hit rate, entry count, size and evictions
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_name": self.model_name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "entries": self.entries,
+                "size_mb": round(self.size_bytes / (1024 * 1024), 2),
+                "max_size_mb": round(self.max_size_bytes / (1024 * 1024), 2),
+                "evictions": self.evictions
+            }
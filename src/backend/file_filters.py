@@ -0,0 +1,296 @@
+"""
+File selection for repository ingestion.
+Decides which files are loaded from extension, path and size alone, so files
+that would be thrown away are never read (or, with sparse clones, never fetched).
+"""
+import os
+import json
+import stat
+import hashlib
+import fnmatch
+import logging
+import concurrent.futures
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple, Union, Iterator
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_FILE_SIZE_KB = 1024
+DEFAULT_WALK_WORKERS = 8
+
+
+def expand_braces(pattern: str) -> List[str]:
+    """
+    Expand shell-style brace alternatives, which fnmatch does not support.
+
+    ``"**/*.{py,js}"`` becomes ``["**/*.py", "**/*.js"]``. Nested braces are expanded
+    recursively; a pattern without a complete brace group is returned unchanged.
+
+    Args:
+        pattern: Glob pattern
+
+    Returns:
+        The expanded patterns
+    """
+    start = pattern.find("{")
+    if start == -1:
+        return [pattern]
+    depth = 0
+    options, option_start = [], start + 1
+    for i in range(start, len(pattern)):
+        if pattern[i] == "{":
+            depth += 1
+        elif pattern[i] == "}":
+            depth -= 1
+            if depth == 0:
+                options.append(pattern[option_start:i])
+                prefix, suffix = pattern[:start], pattern[i + 1:]
+                return [expanded
+                        for option in options
+                        for expanded in expand_braces(f"{prefix}{option}{suffix}")]
+        elif pattern[i] == "," and depth == 1:
+            options.append(pattern[option_start:i])
+            option_start = i + 1
+    return [pattern]
+
+
+def glob_patterns(glob: str) -> List[str]:
+    """
+    Turn a directory glob such as ``"**/*.{md,txt}"`` into FileFilter include patterns.
+
+    Braces are expanded, and a leading ``**/`` also matches files at the top level.
+
+    Args:
+        glob: Glob pattern relative to the directory
+
+    Returns:
+        Patterns for ``FileFilter(include_paths=...)``; empty if the glob matches everything
+    """
+    patterns = []
+    for pattern in expand_braces(glob.strip("/")):
+        if pattern in ("**", "**/*", "*"):
+            return []
+        patterns.append(pattern)
+        if pattern.startswith("**/"):
+            patterns.append(pattern[3:])
+    return patterns
+
+
+class FileFilter:
+    """
+    Extension, path and size filter applied before file contents are read.
+    """
+
+    def __init__(
+        self,
+        extensions: Optional[List[str]] = None,
+        max_file_size_kb: Optional[int] = DEFAULT_MAX_FILE_SIZE_KB,
+        include_paths: Optional[List[str]] = None,
+        exclude_paths: Optional[List[str]] = None
+    ):
+        """
+        Initialize the file filter.
+
+        Args:
+            extensions: File extensions to include, e.g. [".md", ".py"]; all if empty
+            max_file_size_kb: Largest file to load in KB; no limit if None or 0
+            include_paths: Glob patterns or directory prefixes a path must match; all if empty
+            exclude_paths: Glob patterns or directory prefixes that exclude a path
+        """
+        self.extensions = [ext if ext.startswith(".") else f".{ext}" for ext in (extensions or [])]
+        self.max_file_size_kb = max_file_size_kb or None
+        self.include_paths = [p.strip("/") for p in (include_paths or []) if p.strip("/")]
+        self.exclude_paths = [p.strip("/") for p in (exclude_paths or []) if p.strip("/")]
+
+    @classmethod
+    def coerce(cls, file_filter: Optional[Union["FileFilter", List[str]]]) -> "FileFilter":
+        """
+        Build a filter from a FileFilter, a list of extensions or None.
+
+        Args:
+            file_filter: Existing filter, list of file extensions, or None
+
+        Returns:
+            A FileFilter
+        """
+        if isinstance(file_filter, FileFilter):
+            return file_filter
+        return cls(extensions=file_filter)
+
+    @staticmethod
+    def _matches_pattern(path: str, pattern: str) -> bool:
+        return fnmatch.fnmatchcase(path, pattern) or path.startswith(f"{pattern}/")
+
+    def matches_path(self, path: str) -> bool:
+        """
+        Check a repository-relative path against the extension and path filters.
+
+        Args:
+            path: Repository-relative file path
+
+        Returns:
+            True if the file should be loaded
+        """
+        if self.extensions and Path(path).suffix not in self.extensions:
+            return False
+        if self.include_paths and not any(self._matches_pattern(path, p) for p in self.include_paths):
+            return False
+        return not any(self._matches_pattern(path, p) for p in self.exclude_paths)
+
+    def matches_directory(self, path: str) -> bool:
+        """
+        Check whether a directory may contain selected files, so excluded trees are not walked.
+
+        Args:
+            path: Directory path relative to the walk root
+
+        Returns:
+            False if the directory is excluded
+        """
+        return not any(self._matches_pattern(path, p) for p in self.exclude_paths)
+
+    def matches_size(self, size: int) -> bool:
+        """Check a file size in bytes against the size limit."""
+        return self.max_file_size_kb is None or size <= self.max_file_size_kb * 1024
+
+    def filter_paths(self, paths: List[str]) -> List[str]:
+        """Keep the paths that pass the extension and path filters."""
+        return [p for p in paths if self.matches_path(p)]
+
+    def sparse_patterns(self) -> List[str]:
+        """
+        Get non-cone sparse-checkout patterns selecting at least the files this filter accepts.
+
+        Include paths take precedence over extensions, since sparse patterns can only
+        be combined as a union. The exact filter is still applied after checkout.
+
+        Returns:
+            gitignore-style patterns for ``git sparse-checkout set --no-cone``
+        """
+        if self.include_paths:
+            patterns = [f"/{p}" for p in self.include_paths]
+        elif self.extensions:
+            patterns = [f"*{ext}" for ext in self.extensions]
+        else:
+            patterns = ["/*"]
+        for path in self.exclude_paths:
+            patterns.extend([f"!/{path}", f"!/{path}/**"])
+        return patterns
+
+    def signature(self) -> str:
+        """
+        Get a stable hash of the filter settings.
+
+        A changed signature means previously skipped files may now be included,
+        so the repository has to be fully re-ingested.
+        """
+        settings = json.dumps(self.to_dict(), sort_keys=True)
+        return hashlib.sha1(settings.encode("utf-8")).hexdigest()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the filter settings as a dictionary."""
+        return {
+            "extensions": sorted(self.extensions),
+            "max_file_size_kb": self.max_file_size_kb,
+            "include_paths": sorted(self.include_paths),
+            "exclude_paths": sorted(self.exclude_paths)
+        }
+
+    def select_files(self, root: str, paths: List[str]) -> List[str]:
+        """
+        Select the files to load from a working copy without reading them.
+
+        Args:
+            root: Working copy path
+            paths: Repository-relative candidate paths
+
+        Returns:
+            Repository-relative paths of regular files that pass every filter
+        """
+        return [rel_path for rel_path, _ in self.select_files_with_sizes(root, paths)]
+
+    def select_files_with_sizes(self, root: str, paths: List[str]) -> List[Tuple[str, int]]:
+        """
+        Select the files to load from a working copy, with their sizes.
+
+        Paths failing the path filters are dropped first, then the remaining files
+        are checked for existence and size with a single stat call each.
+
+        Args:
+            root: Working copy path
+            paths: Repository-relative candidate paths
+
+        Returns:
+            (path, size in bytes) of regular files that pass every filter
+        """
+        selected = []
+        too_large = 0
+        for rel_path in self.filter_paths(paths):
+            try:
+                file_stat = os.stat(os.path.join(root, rel_path))
+            except OSError:
+                continue
+            if not stat.S_ISREG(file_stat.st_mode):
+                continue
+            if not self.matches_size(file_stat.st_size):
+                too_large += 1
+                continue
+            selected.append((rel_path, file_stat.st_size))
+
+        if too_large:
+            logger.info(f"⏭️ Skipped {too_large} files larger than {self.max_file_size_kb} KB")
+        return selected
+
+    def walk(self, root: str, workers: int = DEFAULT_WALK_WORKERS) -> Iterator[Tuple[str, os.stat_result]]:
+        """
+        Walk a directory tree in parallel and yield the files that pass every filter.
+
+        Directories are listed concurrently by a thread pool. Files are yielded as
+        soon as their directory has been listed, without being opened. Excluded
+        directories and symlinks are not followed.
+
+        Args:
+            root: Directory to walk
+            workers: Number of directories listed concurrently
+
+        Returns:
+            Iterator of (path relative to ``root``, stat result)
+        """
+        too_large = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers),
+                                                   thread_name_prefix="walk") as executor:
+            pending = {executor.submit(self._scan_directory, root, "")}
+            while pending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    files, subdirectories, skipped = future.result()
+                    too_large += skipped
+                    pending.update(executor.submit(self._scan_directory, root, rel_dir)
+                                   for rel_dir in subdirectories)
+                    yield from files
+
+        if too_large:
+            logger.info(f"⏭️ Skipped {too_large} files larger than {self.max_file_size_kb} KB in {root}")
+
+    def _scan_directory(self, root: str, rel_dir: str) -> Tuple[List[Tuple[str, os.stat_result]], List[str], int]:
+        files, subdirectories, too_large = [], [], 0
+        try:
+            with os.scandir(os.path.join(root, rel_dir)) as entries:
+                for entry in entries:
+                    rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.matches_directory(rel_path):
+                                subdirectories.append(rel_path)
+                        elif entry.is_file(follow_symlinks=False) and self.matches_path(rel_path):
+                            file_stat = entry.stat(follow_symlinks=False)
+                            if self.matches_size(file_stat.st_size):
+                                files.append((rel_path, file_stat))
+                            else:
+                                too_large += 1
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.warning(f"Could not list {os.path.join(root, rel_dir)}: {str(e)}")
+        return files, subdirectories, too_large
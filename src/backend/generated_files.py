@@ -0,0 +1,414 @@
+"""
+Vendored, generated and minified file detection for repository ingestion.
+Files such as node_modules, minified bundles, lockfiles, protobuf output and
+large fixtures pass the extension filter but are never useful answers, while
+dominating chunk counts. They are recognised from their path, the repository's
+.gitattributes and the first few KB of their content, before they are loaded.
+"""
+import os
+import json
+import math
+import fnmatch
+import hashlib
+import logging
+import concurrent.futures
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REASON_VENDORED = "vendored"
+REASON_GENERATED = "generated"
+REASON_MINIFIED = "minified"
+REASON_ENCODED = "encoded"
+REASON_LARGE_DATA = "large_data"
+
+DEFAULT_VENDORED_PATHS = [
+    "node_modules", "bower_components", "jspm_packages", "vendor", "third_party", "third-party",
+    "external", ".yarn", "site-packages", ".venv", "venv", "dist",
+    "*.min.js", "*.min.css", "*.bundle.js", "*.chunk.js", "*.map"
+]
+DEFAULT_GENERATED_PATHS = [
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock",
+    "Pipfile.lock", "Cargo.lock", "composer.lock", "Gemfile.lock", "go.sum", "*.lock",
+    "*_pb2.py", "*_pb2_grpc.py", "*_pb2.pyi", "*.pb.go", "*.pb.cc", "*.pb.h", "*_pb.js", "*_pb.d.ts",
+    "*.generated.*", "*.g.dart", "*.designer.cs", "*.g.cs"
+]
+# Content markers of generated files, looked for in the first lines
+GENERATED_MARKERS = (
+    "@generated", "do not edit", "code generated by", "auto-generated", "autogenerated",
+    "automatically generated", "generated by the protocol buffer compiler"
+)
+DATA_EXTENSIONS = {".json", ".csv", ".tsv", ".xml", ".yaml", ".yml", ".sql", ".svg", ".ndjson", ".jsonl"}
+MARKER_LINES = 10
+MIN_ENTROPY_SAMPLE = 1024
+# Minified code has almost no whitespace; long prose lines (unwrapped markdown) do
+MAX_MINIFIED_WHITESPACE_RATIO = 0.08
+# Embedding size of the default all-MiniLM-L6-v2 model (384 float32 values), for storage estimates
+EMBEDDING_BYTES_PER_CHUNK = 384 * 4
+DEFAULT_CHECK_WORKERS = 8
+
+
+def _matches(path: str, pattern: str) -> bool:
+    # Patterns without a slash match the file name or any directory name, like .gitignore
+    if "/" not in pattern.strip("/") and not pattern.startswith("**/"):
+        parts = path.split("/")
+        return any(fnmatch.fnmatchcase(part, pattern) for part in parts)
+    pattern = pattern.strip("/")
+    if pattern.startswith("**/"):
+        return _matches(path, pattern[3:]) or fnmatch.fnmatchcase(path, pattern)
+    return fnmatch.fnmatchcase(path, pattern) or path.startswith(f"{pattern}/")
+
+
+def parse_gitattributes(content: str) -> List[Tuple[str, Dict[str, bool]]]:
+    """
+    Parse the linguist attributes of a .gitattributes file.
+
+    Args:
+        content: File content
+
+    Returns:
+        (pattern, {"linguist-generated": bool, "linguist-vendored": bool}) in file
+        order, for lines that set either attribute
+    """
+    rules = []
+    for line in content.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        pattern, *attributes = line.split()
+        values = {}
+        for attribute in attributes:
+            name, _, value = attribute.partition("=")
+            unset = name.startswith(("-", "!"))
+            name = name.lstrip("-!")
+            if name in ("linguist-generated", "linguist-vendored"):
+                values[name] = not unset and value.lower() not in ("false", "0")
+        if values:
+            rules.append((pattern, values))
+    return rules
+
+
+def shannon_entropy(data: bytes) -> float:
+    """Get the Shannon entropy of a byte string in bits per byte."""
+    if not data:
+        return 0.0
+    total = len(data)
+    return -sum(count / total * math.log2(count / total) for count in Counter(data).values())
+
+
+def is_utf8(data: bytes) -> bool:
+    """Check whether a sample decodes as UTF-8, allowing a character cut off at its end."""
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        return e.reason == "unexpected end of data" and e.start >= len(data) - 3
+    return True
+
+
+class GeneratedFileFilter:
+    """
+    Skips vendored, generated and minified files before they are loaded.
+
+    Path checks come first: built-in and configured vendored and generated
+    patterns, and ``linguist-vendored``/``linguist-generated`` in the root
+    .gitattributes, which can also un-mark files (``-linguist-generated``).
+    Files that pass are sampled (the first ``sample_kb``) and skipped if they
+    carry a generated-file marker, contain a long line with almost no
+    whitespace (minified), have the byte entropy of encoded data (checked
+    for ASCII content, e.g. base64, and content that is not UTF-8, so that
+    non-Latin text is not flagged), or are data
+    files (JSON, CSV, XML, ...) larger than ``max_data_file_kb``. Paths matching
+    ``keep_paths`` are never skipped.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_line_length: int = 1000,
+        max_entropy: float = 5.7,
+        max_data_file_kb: Optional[int] = 256,
+        sample_kb: int = 16,
+        use_gitattributes: bool = True,
+        vendored_paths: Optional[List[str]] = None,
+        generated_paths: Optional[List[str]] = None,
+        keep_paths: Optional[List[str]] = None
+    ):
+        """
+        Initialize the filter.
+
+        Args:
+            enabled: Whether files are checked at all
+            max_line_length: A longer line with almost no whitespace marks a file as minified
+            max_entropy: Bits per byte above which ASCII or non-UTF-8 content is treated as encoded data
+            max_data_file_kb: Size above which data files are treated as fixtures; no limit if None or 0
+            sample_kb: KB read from the start of each file for the content checks
+            use_gitattributes: Whether to honour linguist attributes in .gitattributes
+            vendored_paths: Patterns added to the built-in vendored paths
+            generated_paths: Patterns added to the built-in generated paths
+            keep_paths: Glob patterns or directories that are never skipped
+        """
+        self.enabled = enabled
+        self.max_line_length = max_line_length
+        self.max_entropy = max_entropy
+        self.max_data_file_kb = max_data_file_kb or None
+        self.sample_bytes = int(sample_kb * 1024)
+        self.use_gitattributes = use_gitattributes
+        self.vendored_paths = DEFAULT_VENDORED_PATHS + list(vendored_paths or [])
+        self.generated_paths = DEFAULT_GENERATED_PATHS + list(generated_paths or [])
+        self.keep_paths = [p.strip("/") for p in (keep_paths or []) if p.strip("/")]
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Dict[str, Any],
+        enabled: bool = True,
+        keep_paths: Optional[List[str]] = None
+    ) -> "GeneratedFileFilter":
+        """
+        Create a filter from the ``ingestion.generated_files`` config section.
+
+        Args:
+            config: Generated file detection configuration dictionary
+            enabled: Per-repository switch; detection runs only if this and the config allow it
+            keep_paths: Per-repository paths that are never skipped, added to the configured ones
+
+        Returns:
+            A configured GeneratedFileFilter
+        """
+        configured = os.environ.get("RAG_SKIP_GENERATED_FILES", str(config.get("enabled", True)))
+        return cls(
+            enabled=enabled and configured.lower() == "true",
+            max_line_length=int(config.get("max_line_length", 1000)),
+            max_entropy=float(config.get("max_entropy", 5.7)),
+            max_data_file_kb=config.get("max_data_file_kb", 256),
+            sample_kb=float(config.get("sample_kb", 16)),
+            use_gitattributes=bool(config.get("use_gitattributes", True)),
+            vendored_paths=config.get("vendored_paths"),
+            generated_paths=config.get("generated_paths"),
+            keep_paths=list(config.get("keep_paths") or []) + list(keep_paths or [])
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the filter settings as a dictionary."""
+        return {
+            "enabled": self.enabled,
+            "max_line_length": self.max_line_length,
+            "max_entropy": self.max_entropy,
+            "max_data_file_kb": self.max_data_file_kb,
+            "sample_bytes": self.sample_bytes,
+            "use_gitattributes": self.use_gitattributes,
+            "vendored_paths": sorted(self.vendored_paths),
+            "generated_paths": sorted(self.generated_paths),
+            "keep_paths": sorted(self.keep_paths)
+        }
+
+    def signature(self) -> str:
+        """Get a stable hash of the filter settings, like ``FileFilter.signature``."""
+        settings = json.dumps(self.to_dict(), sort_keys=True)
+        return hashlib.sha1(settings.encode("utf-8")).hexdigest()
+
+    def combine_signature(self, file_filter_signature: str) -> str:
+        """
+        Combine a FileFilter signature with these settings.
+
+        A disabled filter leaves the signature unchanged, so turning detection
+        off does not force a full re-ingest by itself.
+        """
+        if not self.enabled:
+            return file_filter_signature
+        return hashlib.sha1(f"{file_filter_signature}:{self.signature()}".encode("utf-8")).hexdigest()
+
+    def load_gitattributes(self, root: str) -> List[Tuple[str, Dict[str, bool]]]:
+        """Read the linguist rules of the .gitattributes file in ``root``, if any."""
+        if not self.use_gitattributes:
+            return []
+        try:
+            with open(os.path.join(root, ".gitattributes"), "r", encoding="utf-8", errors="replace") as f:
+                return parse_gitattributes(f.read())
+        except OSError:
+            return []
+
+    def is_kept(self, rel_path: str) -> bool:
+        """Check whether a path matches ``keep_paths`` and is never skipped."""
+        return any(_matches(rel_path, p) for p in self.keep_paths)
+
+    @staticmethod
+    def _attributes(rel_path: str, gitattributes: Optional[List[Tuple[str, Dict[str, bool]]]]) -> Dict[str, bool]:
+        # Later lines override earlier ones, as in git
+        attributes = {}
+        for pattern, values in gitattributes or []:
+            if _matches(rel_path, pattern):
+                attributes.update(values)
+        return attributes
+
+    def check_path(self, rel_path: str, gitattributes: Optional[List[Tuple[str, Dict[str, bool]]]] = None) -> Optional[str]:
+        """
+        Check a path without reading the file.
+
+        Args:
+            rel_path: Repository-relative path
+            gitattributes: Rules from ``load_gitattributes``
+
+        Returns:
+            The reason to skip the file, or None
+        """
+        if self.is_kept(rel_path):
+            return None
+        attributes = self._attributes(rel_path, gitattributes)
+        if attributes.get("linguist-vendored"):
+            return REASON_VENDORED
+        if attributes.get("linguist-generated"):
+            return REASON_GENERATED
+        if "linguist-vendored" not in attributes and any(_matches(rel_path, p) for p in self.vendored_paths):
+            return REASON_VENDORED
+        if "linguist-generated" not in attributes and any(_matches(rel_path, p) for p in self.generated_paths):
+            return REASON_GENERATED
+        return None
+
+    def should_sample(self, rel_path: str, gitattributes: Optional[List[Tuple[str, Dict[str, bool]]]] = None) -> bool:
+        """
+        Check whether a file that passed ``check_path`` still needs the content checks.
+
+        Kept paths and files marked ``-linguist-generated`` or ``-linguist-vendored``
+        are not sampled.
+        """
+        return self.enabled and not self.is_kept(rel_path) and False not in self._attributes(rel_path, gitattributes).values()
+
+    def check_content(self, rel_path: str, size: int, sample: bytes) -> Optional[str]:
+        """
+        Check the start of a file's content.
+
+        Args:
+            rel_path: Repository-relative path
+            size: File size in bytes
+            sample: The first ``sample_kb`` of the file
+
+        Returns:
+            The reason to skip the file, or None
+        """
+        extension = Path(rel_path).suffix.lower()
+        if self.max_data_file_kb and extension in DATA_EXTENSIONS and size > self.max_data_file_kb * 1024:
+            return REASON_LARGE_DATA
+        if b"\0" in sample:
+            # Binary; the loader skips it
+            return None
+        text = sample.decode("utf-8", errors="replace")
+        head = "\n".join(text.split("\n", MARKER_LINES)[:MARKER_LINES]).lower()
+        if any(marker in head for marker in GENERATED_MARKERS):
+            return REASON_GENERATED
+        for line in text.split("\n"):
+            if len(line) > self.max_line_length:
+                whitespace = sum(1 for char in line if char.isspace())
+                if whitespace / len(line) < MAX_MINIFIED_WHITESPACE_RATIO:
+                    return REASON_MINIFIED
+        # Multi-byte UTF-8 text (CJK, Cyrillic, ...) has a high byte entropy without being encoded
+        if (len(sample) >= MIN_ENTROPY_SAMPLE and (sample.isascii() or not is_utf8(sample))
+                and shannon_entropy(sample) > self.max_entropy):
+            return REASON_ENCODED
+        return None
+
+    def filter_files(
+        self,
+        root: str,
+        files: List[Tuple[str, int]],
+        workers: int = DEFAULT_CHECK_WORKERS
+    ) -> Tuple[List[Tuple[str, int]], List[Dict[str, Any]]]:
+        """
+        Split selected files into those to load and those to skip.
+
+        Path checks run first; the remaining files are sampled in parallel.
+
+        Args:
+            root: Working copy path
+            files: (repository-relative path, size in bytes), e.g. from
+                ``FileFilter.select_files_with_sizes``
+            workers: Number of files sampled concurrently
+
+        Returns:
+            (files to load, skipped files as {"path", "size", "reason"}), both in input order
+        """
+        if not self.enabled or not files:
+            return list(files), []
+        gitattributes = self.load_gitattributes(root)
+        reasons = [self.check_path(rel_path, gitattributes) for rel_path, _ in files]
+        unchecked = [
+            i for i, reason in enumerate(reasons)
+            if reason is None and self.should_sample(files[i][0], gitattributes)
+        ]
+
+        def check(index: int) -> Optional[str]:
+            rel_path, size = files[index]
+            try:
+                with open(os.path.join(root, rel_path), "rb") as f:
+                    sample = f.read(self.sample_bytes)
+            except OSError:
+                return None
+            return self.check_content(rel_path, size, sample)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers),
+                                                   thread_name_prefix="generated-check") as executor:
+            for index, reason in zip(unchecked, executor.map(check, unchecked)):
+                reasons[index] = reason
+
+        kept, skipped = [], []
+        for (rel_path, size), reason in zip(files, reasons):
+            if reason is None:
+                kept.append((rel_path, size))
+            else:
+                skipped.append({"path": rel_path, "size": size, "reason": reason})
+        if skipped:
+            counts = Counter(entry["reason"] for entry in skipped)
+            logger.info(f"⏭️ Skipped {len(skipped)} vendored, generated or minified files in {root} "
+                        f"({', '.join(f'{count} {reason}' for reason, count in sorted(counts.items()))})")
+        return kept, skipped
+
+
+def skip_report(
+    skipped: List[Dict[str, Any]],
+    ingested_bytes: int = 0,
+    chunk_count: int = 0,
+    seconds: float = 0.0,
+    max_paths: int = 20
+) -> Dict[str, Any]:
+    """
+    Summarize skipped files and estimate what skipping them saved.
+
+    Savings are extrapolated from the files that were ingested in the same run:
+    skipped bytes times its chunks per byte and seconds per byte. Storage covers
+    chunk text and float32 embeddings of the default model.
+
+    Args:
+        skipped: Skipped files from ``GeneratedFileFilter.filter_files``
+        ingested_bytes: Bytes loaded in the same run
+        chunk_count: Chunks produced from them
+        seconds: Time spent ingesting them
+        max_paths: Number of example paths to include
+
+    Returns:
+        Dictionary with counts and bytes per reason, example paths and the
+        estimated chunks, seconds and storage saved (None without a baseline)
+    """
+    by_reason: Dict[str, Dict[str, int]] = {}
+    for entry in skipped:
+        totals = by_reason.setdefault(entry["reason"], {"files": 0, "bytes": 0})
+        totals["files"] += 1
+        totals["bytes"] += entry["size"]
+    skipped_bytes = sum(entry["size"] for entry in skipped)
+    estimated_chunks = estimated_seconds = estimated_storage = None
+    if skipped and ingested_bytes > 0:
+        chunks_per_byte = chunk_count / ingested_bytes
+        estimated_chunks = int(round(skipped_bytes * chunks_per_byte))
+        estimated_seconds = round(skipped_bytes * seconds / ingested_bytes, 1)
+        estimated_storage = skipped_bytes + estimated_chunks * EMBEDDING_BYTES_PER_CHUNK
+    return {
+        "files": len(skipped),
+        "bytes": skipped_bytes,
+        "by_reason": by_reason,
+        "paths": [entry["path"] for entry in skipped[:max_paths]],
+        "estimated_chunks_saved": estimated_chunks,
+        "estimated_seconds_saved": estimated_seconds,
+        "estimated_storage_bytes_saved": estimated_storage
+    }
@@ -0,0 +1,450 @@
+"""
+GitHub push webhooks for the RAG-LLM Framework.
+Verifies push event signatures, extracts the changed and removed paths for
+configured repositories and branches, and queues incremental ingestion jobs.
+Bursts of pushes to the same repository are coalesced into one job.
+"""
+import os
+import re
+import hmac
+import json
+import time
+import hashlib
+import logging
+import functools
+import threading
+from urllib.parse import parse_qs
+from typing import List, Dict, Any, Optional, Set, Tuple
+from fastapi import APIRouter, HTTPException, Request, Depends
+
+from src.backend.data_ingestion import DataIngestionManager
+from src.backend.file_filters import FileFilter
+from src.backend.ingestion_jobs import get_job_manager
+from src.backend.rag_engine import RAGEngine, get_rag_engine
+from src.backend.repo_management import Repository, load_repository_config, ingest_repository, _simulate_ingestion_job
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Repository Management"])
+
+SIGNATURE_HEADER = "X-Hub-Signature-256"
+EVENT_HEADER = "X-GitHub-Event"
+DELIVERY_HEADER = "X-GitHub-Delivery"
+
+NULL_SHA = "0" * 40
+# GitHub lists at most this many commits in a push payload
+MAX_PAYLOAD_COMMITS = 2048
+
+DEFAULT_DEBOUNCE_MS = 5000
+DEFAULT_MAX_DELAY_MS = 60000
+
+
+def verify_signature(body: bytes, signature: str, secret: str) -> bool:
+    """
+    Check a ``X-Hub-Signature-256`` header against the request body.
+
+    Args:
+        body: Raw request body
+        signature: Header value, ``sha256=<hex digest>``
+        secret: The webhook secret
+
+    Returns:
+        True if the signature matches
+    """
+    expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature.strip())
+
+
+def normalize_repo_url(url: str) -> str:
+    """
+    Normalize a repository URL so HTTPS, SSH and git URLs of the same repository compare equal.
+
+    Args:
+        url: Repository URL, e.g. ``git@github.com:owner/repo.git``
+
+    Returns:
+        The normalized URL, e.g. ``github.com/owner/repo``
+    """
+    url = url.strip().rstrip("/")
+    if url.endswith(".git"):
+        url = url[:-4]
+    url = re.sub(r"^[a-z+]+://", "", url)
+    url = re.sub(r"^[^@/]+@", "", url)
+    url = re.sub(r"^([^/:]+):(?!\d)", r"\1/", url)
+    return url.lower()
+
+
+class PushChanges:
+    """
+    Changed and removed paths between two commits, accumulated from push events.
+
+    The changes are complete when every push between ``before`` and ``after`` was
+    seen. Forced pushes, new branches, truncated payloads and gaps between
+    coalesced pushes make them incomplete; ingestion then diffs the clone instead.
+    """
+
+    def __init__(self, before: str, after: str, changed: Optional[Set[str]] = None,
+                 removed: Optional[Set[str]] = None, complete: bool = True):
+        """
+        Initialize the changes.
+
+        Args:
+            before: Commit the changes start from
+            after: Commit the changes lead to
+            changed: Added or modified paths
+            removed: Removed paths
+            complete: Whether the paths cover every commit between ``before`` and ``after``
+        """
+        self.before = before
+        self.after = after
+        self.changed = set(changed or ())
+        self.removed = set(removed or ())
+        self.complete = complete
+        self.pushes = 1
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "PushChanges":
+        """
+        Collect the paths of a push event payload.
+
+        Commits are applied oldest first, so a file that is added and later
+        removed within the push ends up removed.
+
+        Args:
+            payload: The push event payload
+
+        Returns:
+            The changes of the push
+        """
+        commits = payload.get("commits") or []
+        changes = cls(
+            payload.get("before", NULL_SHA),
+            payload.get("after", NULL_SHA),
+            complete=(
+                not payload.get("forced")
+                and payload.get("before", NULL_SHA) != NULL_SHA
+                and len(commits) < MAX_PAYLOAD_COMMITS
+            )
+        )
+        for commit in commits:
+            changes._apply(commit.get("added", []) + commit.get("modified", []), commit.get("removed", []))
+        return changes
+
+    def _apply(self, changed: List[str], removed: List[str]):
+        for path in removed:
+            self.changed.discard(path)
+            self.removed.add(path)
+        for path in changed:
+            self.removed.discard(path)
+            self.changed.add(path)
+
+    def merge(self, newer: "PushChanges"):
+        """
+        Add the changes of a later push.
+
+        Args:
+            newer: Changes pushed after these
+        """
+        if newer.before != self.after or not newer.complete:
+            self.complete = False
+        self._apply(sorted(newer.changed), sorted(newer.removed))
+        self.after = newer.after
+        self.pushes += newer.pushes
+
+    def filter(self, file_filter: FileFilter) -> "PushChanges":
+        """Keep only the paths that pass a repository's extension and path filters."""
+        changes = PushChanges(self.before, self.after, set(file_filter.filter_paths(sorted(self.changed))),
+                              set(file_filter.filter_paths(sorted(self.removed))), self.complete)
+        changes.pushes = self.pushes
+        return changes
+
+    @property
+    def empty(self) -> bool:
+        """Whether no paths changed."""
+        return not self.changed and not self.removed
+
+    def known_changes(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the changes in the form ``DataIngestionManager.sync_github_repo`` accepts.
+
+        Returns:
+            The changes, or None if they are incomplete
+        """
+        if not self.complete:
+            return None
+        return {
+            "before": self.before,
+            "after": self.after,
+            "changed_paths": sorted(self.changed),
+            "deleted_paths": sorted(self.removed)
+        }
+
+
+def parse_push_event(payload: Dict[str, Any]) -> Tuple[List[str], Optional[str], PushChanges]:
+    """
+    Extract the repository, branch and paths of a push event.
+
+    Args:
+        payload: The push event payload
+
+    Returns:
+        Tuple of (repository URLs as normalized by ``normalize_repo_url``, branch
+        name or None for tag pushes, changes)
+    """
+    repository = payload.get("repository") or {}
+    urls = {
+        normalize_repo_url(repository[key])
+        for key in ("html_url", "clone_url", "ssh_url", "git_url", "svn_url", "url")
+        if isinstance(repository.get(key), str) and repository[key]
+    }
+    ref = payload.get("ref", "")
+    branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else None
+    return sorted(urls), branch, PushChanges.from_payload(payload)
+
+
+class _PendingPush:
+    """Coalesced pushes of one repository branch waiting to be ingested."""
+
+    def __init__(self, repo: Repository, rag_engine: RAGEngine, changes: PushChanges):
+        self.repo = repo
+        self.rag_engine = rag_engine
+        self.changes = changes
+        self.first_event = self.last_event = time.monotonic()
+
+
+class PushCoalescer:
+    """
+    Coalesces pushes per repository branch and submits them as ingestion jobs.
+
+    A push is ingested once no further push to the same branch arrived for
+    ``debounce_ms``, or at the latest after ``max_delay_ms``. While a job for
+    the branch is queued or running, pushes keep accumulating and are submitted
+    as the next job.
+    """
+
+    def __init__(self, debounce_ms: float = DEFAULT_DEBOUNCE_MS, max_delay_ms: float = DEFAULT_MAX_DELAY_MS):
+        """
+        Initialize the coalescer.
+
+        Args:
+            debounce_ms: Quiet period before pushes are ingested
+            max_delay_ms: Longest a push waits during a continuous burst of pushes
+        """
+        self.debounce = debounce_ms / 1000.0
+        self.max_delay = max(max_delay_ms / 1000.0, self.debounce)
+        self._pending: Dict[str, _PendingPush] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._ingestion_manager = DataIngestionManager()
+        self.pushes = 0
+        self.jobs = 0
+
+    @classmethod
+    def from_env(cls) -> "PushCoalescer":
+        """
+        Create a coalescer configured from ``RAG_WEBHOOK_DEBOUNCE_MS`` and ``RAG_WEBHOOK_MAX_DELAY_MS``.
+
+        Returns:
+            A configured PushCoalescer
+        """
+        debounce_ms = os.environ.get("RAG_WEBHOOK_DEBOUNCE_MS", "")
+        max_delay_ms = os.environ.get("RAG_WEBHOOK_MAX_DELAY_MS", "")
+        return cls(
+            debounce_ms=int(debounce_ms) if debounce_ms.isdigit() else DEFAULT_DEBOUNCE_MS,
+            max_delay_ms=int(max_delay_ms) if max_delay_ms.isdigit() else DEFAULT_MAX_DELAY_MS
+        )
+
+    @staticmethod
+    def _key(repo: Repository) -> str:
+        return f"{normalize_repo_url(repo.repo_url)}@{repo.branch}"
+
+    def add(self, repo: Repository, rag_engine: RAGEngine, changes: PushChanges) -> int:
+        """
+        Queue the changes of a push.
+
+        Args:
+            repo: The configured repository the push belongs to
+            rag_engine: The RAG engine instance
+            changes: Changes of the push
+
+        Returns:
+            Number of pushes now pending for the repository branch
+        """
+        key = self._key(repo)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = _PendingPush(repo, rag_engine, changes)
+            else:
+                pending.changes.merge(changes)
+                pending.repo = repo
+                pending.last_event = time.monotonic()
+            self.pushes += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="webhook-coalescer", daemon=True)
+                self._thread.start()
+            return pending.changes.pushes
+
+    def _run(self):
+        while True:
+            time.sleep(min(self.debounce / 2, 0.5))
+            self._flush_due()
+
+    def _flush_due(self):
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                key for key, pending in self._pending.items()
+                if now - pending.last_event >= self.debounce or now - pending.first_event >= self.max_delay
+            ]
+            flushing = [(key, self._pending.pop(key)) for key in due]
+
+        for key, pending in flushing:
+            if self._submit(pending):
+                continue
+            # A job for this branch is still active; retry with the next flush
+            with self._lock:
+                newer = self._pending.get(key)
+                if newer is not None:
+                    pending.changes.merge(newer.changes)
+                    pending.repo = newer.repo
+                    pending.last_event = newer.last_event
+                self._pending[key] = pending
+
+    def _submit(self, pending: _PendingPush) -> bool:
+        repo, changes = pending.repo, pending.changes
+        if os.environ.get("RAG_TEST_MODE") == "true":
+            run = _simulate_ingestion_job
+        else:
+            run = functools.partial(
+                ingest_repository, repo, pending.rag_engine, self._ingestion_manager,
+                os.environ.get("GITHUB_TOKEN"), known_changes=changes.known_changes()
+            )
+        job, created = get_job_manager().submit(repo.repo_url, repo.branch, run)
+        if created:
+            self.jobs += 1
+            logger.info(f"🔔 Ingesting {changes.pushes} pushes to {repo.repo_url} (branch: {repo.branch}): "
+                        f"{len(changes.changed)} changed and {len(changes.removed)} removed files "
+                        f"up to {changes.after[:8]} (job {job.id})")
+        return created
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get coalescer statistics.
+
+        Returns:
+            Dictionary with the number of received pushes, submitted jobs and pending branches
+        """
+        with self._lock:
+            pending = len(self._pending)
+        return {"pushes": self.pushes, "ingestion_runs": self.jobs, "pending_branches": pending}
+
+
+_coalescer: Optional[PushCoalescer] = None
+_coalescer_lock = threading.Lock()
+
+
+def get_push_coalescer() -> PushCoalescer:
+    """
+    Get the process-wide push coalescer.
+
+    Returns:
+        The shared PushCoalescer
+    """
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = PushCoalescer.from_env()
+        return _coalescer
+
+
+def _parse_payload(body: bytes, content_type: str) -> Dict[str, Any]:
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        body = (parse_qs(body.decode("utf-8")).get("payload") or [""])[0].encode("utf-8")
+    return json.loads(body)
+
+
+@router.post(
+    "/repos/webhook",
+    summary="GitHub push webhook",
+    description="This endpoint receives GitHub push webhooks. The X-Hub-Signature-256 header is verified with GITHUB_WEBHOOK_SECRET. Pushes to configured repositories and branches queue an incremental ingestion job for the changed files; bursts of pushes are coalesced per repository.",
+    response_description="The repositories the push was queued for"
+)
+async def github_webhook(request: Request, rag_engine: RAGEngine = Depends(get_rag_engine)) -> Dict[str, Any]:
+    """
+    Receive a GitHub webhook delivery.
+
+    Args:
+        request: The webhook request
+        rag_engine: The RAG engine instance
+
+    Returns:
+        Dict[str, Any]: Whether the push was queued or ignored, and for which repositories
+
+    Raises:
+        HTTPException(400): If the payload is not valid JSON
+        HTTPException(401): If the signature is missing or does not match
+        HTTPException(503): If GITHUB_WEBHOOK_SECRET is not set
+    """
+    body = await request.body()
+    signature = request.headers.get(SIGNATURE_HEADER)
+    if not signature:
+        raise HTTPException(status_code=401, detail=f"Missing {SIGNATURE_HEADER} header")
+    secret = os.environ.get("GITHUB_WEBHOOK_SECRET")
+    if not secret:
+        logger.error("❌ Received a GitHub webhook, but GITHUB_WEBHOOK_SECRET is not set")
+        raise HTTPException(status_code=503, detail="GITHUB_WEBHOOK_SECRET is not configured")
+    if not verify_signature(body, signature, secret):
+        logger.warning(f"⚠️ Rejected GitHub webhook delivery {request.headers.get(DELIVERY_HEADER)}: invalid signature")
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    event = request.headers.get(EVENT_HEADER, "")
+    if event == "ping":
+        return {"status": "ok", "message": "pong"}
+    if event != "push":
+        return {"status": "ignored", "message": f"Event {event or 'unknown'} is not handled"}
+
+    try:
+        payload = _parse_payload(body, request.headers.get("content-type", ""))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid webhook payload: {str(e)}")
+
+    urls, branch, changes = parse_push_event(payload)
+    if branch is None:
+        return {"status": "ignored", "message": f"Push to {payload.get('ref')} is not a branch"}
+    if payload.get("deleted"):
+        return {"status": "ignored", "message": f"Branch {branch} was deleted"}
+
+    repositories = [
+        repo for repo in load_repository_config().repositories
+        if normalize_repo_url(repo.repo_url) in urls and repo.branch == branch
+    ]
+    if not repositories:
+        return {"status": "ignored", "message": f"{', '.join(urls) or 'Repository'} ({branch}) is not configured"}
+
+    coalescer = get_push_coalescer()
+    queued = []
+    for repo in repositories:
+        repo_changes = changes.filter(FileFilter(
+            extensions=repo.file_extensions,
+            include_paths=repo.include_paths,
+            exclude_paths=repo.exclude_paths
+        ))
+        if repo_changes.empty and repo_changes.complete:
+            # Nothing to ingest; the next ingestion diffs from the last ingested commit
+            continue
+        pending_pushes = coalescer.add(repo, rag_engine, repo_changes)
+        queued.append({
+            "repo_url": repo.repo_url,
+            "branch": repo.branch,
+            "changed_file_count": len(repo_changes.changed),
+            "removed_file_count": len(repo_changes.removed),
+            "complete": repo_changes.complete,
+            "pending_pushes": pending_pushes
+        })
+
+    if not queued:
+        return {"status": "ignored", "message": "No ingested files changed", "repositories": []}
+    logger.info(f"🔔 Push to {branch} up to {changes.after[:8]} queued for {len(queued)} repositories")
+    return {"status": "queued", "message": f"Push queued for {len(queued)} repositories", "repositories": queued}
@@ -0,0 +1,208 @@
+"""
+Ingestion checkpoints for the RAG-LLM Framework.
+Records, per repository branch, the commit being ingested and every file whose
+chunks have all been written to the vector store, in SQLite. A run that is
+interrupted (the process is killed or restarted) resumes from the checkpoint:
+files that were completed are neither loaded nor embedded again.
+"""
+import os
+import json
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class IngestionCheckpointStore:
+    """
+    SQLite table of in-progress ingestion runs and their completed files.
+
+    A run is identified by repository and branch, and is only resumed while it
+    targets the same commit with the same file filters. Finished runs are removed.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the checkpoint store.
+
+        Args:
+            path: SQLite database path. Defaults to the RAG_INGESTION_CHECKPOINT_PATH
+                environment variable or ./data/ingestion_checkpoints.db
+        """
+        self.path = path or os.environ.get("RAG_INGESTION_CHECKPOINT_PATH", "./data/ingestion_checkpoints.db")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " repo_url TEXT NOT NULL,"
+                " branch TEXT NOT NULL,"
+                " commit_sha TEXT NOT NULL,"
+                " filter_signature TEXT,"
+                " started_at TEXT NOT NULL,"
+                " updated_at TEXT NOT NULL,"
+                " PRIMARY KEY (repo_url, branch))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " repo_url TEXT NOT NULL,"
+                " branch TEXT NOT NULL,"
+                " path TEXT NOT NULL,"
+                " chunk_ids TEXT NOT NULL,"
+                " PRIMARY KEY (repo_url, branch, path))"
+            )
+
+    def begin(
+        self,
+        repo_url: str,
+        branch: str,
+        commit_sha: str,
+        filter_signature: Optional[str] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Start or resume the ingestion run of a repository branch.
+
+        An existing checkpoint is resumed if it targets the same commit and
+        filter signature; otherwise it is discarded and a new run is started.
+
+        Args:
+            repo_url: URL of the repository
+            branch: Branch name
+            commit_sha: Commit being ingested
+            filter_signature: Signature of the file filters in effect
+
+        Returns:
+            Mapping of the already completed files to the IDs of their chunks;
+            empty for a new run
+        """
+        now = datetime.utcnow().isoformat()
+        with self._lock, self._connection:
+            run = self._connection.execute(
+                "SELECT commit_sha, filter_signature FROM runs WHERE repo_url = ? AND branch = ?",
+                (repo_url, branch)
+            ).fetchone()
+            if run is not None and tuple(run) == (commit_sha, filter_signature):
+                self._connection.execute(
+                    "UPDATE runs SET updated_at = ? WHERE repo_url = ? AND branch = ?", (now, repo_url, branch)
+                )
+                rows = self._connection.execute(
+                    "SELECT path, chunk_ids FROM files WHERE repo_url = ? AND branch = ?", (repo_url, branch)
+                ).fetchall()
+                return {path: json.loads(chunk_ids) for path, chunk_ids in rows}
+            self._connection.execute("DELETE FROM files WHERE repo_url = ? AND branch = ?", (repo_url, branch))
+            self._connection.execute(
+                "INSERT OR REPLACE INTO runs (repo_url, branch, commit_sha, filter_signature, started_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (repo_url, branch, commit_sha, filter_signature, now, now)
+            )
+        return {}
+
+    def complete_file(self, repo_url: str, branch: str, path: str, chunk_ids: List[str]):
+        """
+        Record that all chunks of a file have been written.
+
+        Args:
+            repo_url: URL of the repository
+            branch: Branch name
+            path: Repository-relative file path
+            chunk_ids: IDs of the file's chunks
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files (repo_url, branch, path, chunk_ids) VALUES (?, ?, ?, ?)",
+                (repo_url, branch, path, json.dumps(chunk_ids))
+            )
+
+    def finish(self, repo_url: str, branch: str):
+        """
+        Remove the checkpoint of a repository branch once its commit is recorded.
+
+        Args:
+            repo_url: URL of the repository
+            branch: Branch name
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM files WHERE repo_url = ? AND branch = ?", (repo_url, branch))
+            self._connection.execute("DELETE FROM runs WHERE repo_url = ? AND branch = ?", (repo_url, branch))
+
+    def list_runs(self) -> List[Dict[str, Any]]:
+        """
+        Get the unfinished ingestion runs.
+
+        Returns:
+            One dictionary per run with the repository, branch, commit, start and
+            last update time and the number of completed files
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT r.repo_url, r.branch, r.commit_sha, r.started_at, r.updated_at, COUNT(f.path)"
+                " FROM runs r LEFT JOIN files f ON f.repo_url = r.repo_url AND f.branch = r.branch"
+                " GROUP BY r.repo_url, r.branch ORDER BY r.started_at"
+            ).fetchall()
+        return [
+            {
+                "repo_url": repo_url,
+                "branch": branch,
+                "commit_sha": commit_sha,
+                "started_at": started_at,
+                "updated_at": updated_at,
+                "completed_files": completed_files
+            }
+            for repo_url, branch, commit_sha, started_at, updated_at, completed_files in rows
+        ]
+
+    def clear(self):
+        """Remove all checkpoints."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM files")
+            self._connection.execute("DELETE FROM runs")
+
+
+def verify_completed_files(
+    completed: Dict[str, List[str]],
+    existing_chunk_ids: Callable[[List[str]], Set[str]]
+) -> Set[str]:
+    """
+    Get the checkpointed files whose chunks are all still in the vector store.
+
+    Files with missing chunks, e.g. because the store was flushed or lost writes
+    in the crash, are ingested again.
+
+    Args:
+        completed: Mapping of completed files to their chunk IDs, from ``begin``
+        existing_chunk_ids: Function returning which of the given chunk IDs are stored
+
+    Returns:
+        Paths of the files that do not need to be ingested again
+    """
+    existing = existing_chunk_ids([chunk_id for ids in completed.values() for chunk_id in ids])
+    verified = {path for path, ids in completed.items() if all(chunk_id in existing for chunk_id in ids)}
+    if len(verified) < len(completed):
+        logger.warning(f"⚠️ {len(completed) - len(verified)} checkpointed files have missing chunks "
+                       f"and will be ingested again")
+    return verified
+
+
+_checkpoint_store: Optional[IngestionCheckpointStore] = None
+_checkpoint_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> IngestionCheckpointStore:
+    """
+    Get the process-wide ingestion checkpoint store.
+
+    Returns:
+        The shared IngestionCheckpointStore
+    """
+    global _checkpoint_store
+    with _checkpoint_store_lock:
+        if _checkpoint_store is None:
+            _checkpoint_store = IngestionCheckpointStore()
+        return _checkpoint_store
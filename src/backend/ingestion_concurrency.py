@@ -0,0 +1,429 @@
+"""
+Resource-aware ingestion concurrency for the RAG-LLM Framework.
+Inside a container ``os.cpu_count()`` reports the cores of the node, not the
+container's CPU limit. This module reads the cgroup CPU and memory limits,
+splits the CPUs between the embedding model's torch threads and the ingestion
+I/O workers, and adjusts the number of active load workers of every run from
+its measured throughput and the memory headroom.
+"""
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _read_stat(path: str, key: str) -> int:
+    for line in (_read(path) or "").splitlines():
+        name, _, value = line.partition(" ")
+        if name == key and value.strip().isdigit():
+            return int(value)
+    return 0
+
+
+def _meminfo() -> Dict[str, int]:
+    info = {}
+    for line in (_read("/proc/meminfo") or "").splitlines():
+        name, _, value = line.partition(":")
+        fields = value.split()
+        if fields and fields[0].isdigit():
+            info[name] = int(fields[0]) * 1024
+    return info
+
+
+def _physical_memory() -> Optional[int]:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return _meminfo().get("MemTotal")
+
+
+def cpu_limit(cgroup_root: str = CGROUP_ROOT) -> float:
+    """
+    Get the number of CPUs this process may use.
+
+    This is the cgroup CPU quota (v2 ``cpu.max`` or v1 ``cpu.cfs_quota_us``),
+    capped by the CPUs the process is pinned to.
+
+    Args:
+        cgroup_root: Mount point of the cgroup filesystem
+
+    Returns:
+        The CPU limit, possibly fractional (e.g. 1.5 for ``cpu: 1500m``)
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = float(len(os.sched_getaffinity(0)))
+    else:
+        cpus = float(os.cpu_count() or 1)
+
+    quota = None
+    cpu_max = _read(os.path.join(cgroup_root, "cpu.max"))
+    if cpu_max:
+        fields = cpu_max.split()
+        if fields[0] != "max" and len(fields) == 2 and int(fields[1]) > 0:
+            quota = int(fields[0]) / int(fields[1])
+    else:
+        for directory in ("cpu", "cpu,cpuacct"):
+            quota_us = _read(os.path.join(cgroup_root, directory, "cpu.cfs_quota_us"))
+            period_us = _read(os.path.join(cgroup_root, directory, "cpu.cfs_period_us"))
+            if quota_us and period_us and int(quota_us) > 0 and int(period_us) > 0:
+                quota = int(quota_us) / int(period_us)
+                break
+    return min(cpus, quota) if quota else cpus
+
+
+def memory_usage(cgroup_root: str = CGROUP_ROOT) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Get the memory limit of this process's cgroup and its working set.
+
+    The working set leaves out inactive page cache, which the kernel reclaims
+    before the OOM killer runs, the same way the kubelet counts it. Without a
+    cgroup memory limit, physical memory and the memory in use on the machine
+    are returned.
+
+    Args:
+        cgroup_root: Mount point of the cgroup filesystem
+
+    Returns:
+        Tuple of the limit and the working set in bytes; (None, None) if unknown
+    """
+    physical = _physical_memory()
+    limit = usage = None
+    memory_max = _read(os.path.join(cgroup_root, "memory.max"))
+    if memory_max is not None:
+        if memory_max.isdigit():
+            limit = int(memory_max)
+            current = _read(os.path.join(cgroup_root, "memory.current"))
+            if current and current.isdigit():
+                usage = int(current) - _read_stat(os.path.join(cgroup_root, "memory.stat"), "inactive_file")
+    else:
+        limit_in_bytes = _read(os.path.join(cgroup_root, "memory", "memory.limit_in_bytes"))
+        # cgroup v1 reports a huge number when there is no limit
+        if limit_in_bytes and limit_in_bytes.isdigit() and (physical is None or int(limit_in_bytes) < physical):
+            limit = int(limit_in_bytes)
+            current = _read(os.path.join(cgroup_root, "memory", "memory.usage_in_bytes"))
+            if current and current.isdigit():
+                usage = int(current) - _read_stat(os.path.join(cgroup_root, "memory", "memory.stat"),
+                                                  "total_inactive_file")
+
+    if limit is None or usage is None:
+        info = _meminfo()
+        if "MemTotal" not in info or "MemAvailable" not in info:
+            return None, None
+        return info["MemTotal"], info["MemTotal"] - info["MemAvailable"]
+    return limit, max(0, usage)
+
+
+def memory_headroom(cgroup_root: str = CGROUP_ROOT) -> Optional[float]:
+    """
+    Get the share of the memory limit that is still free.
+
+    Args:
+        cgroup_root: Mount point of the cgroup filesystem
+
+    Returns:
+        Free memory as a fraction of the limit, or None if unknown
+    """
+    limit, usage = memory_usage(cgroup_root)
+    if not limit:
+        return None
+    return max(0.0, 1.0 - usage / limit)
+
+
+class AdaptiveWorkerLimit:
+    """
+    Number of workers of one ingestion run allowed to work at the same time.
+
+    The run starts more worker threads than it lets work at once; every worker
+    holds a slot while it processes an item. Every ``adjust_interval`` seconds
+    the limit is moved by one worker, hill-climbing on the throughput measured
+    in the last interval: a move that raised throughput is repeated, one that
+    lowered it is reversed, and without a clear difference the limit drifts
+    down, since extra workers only cost memory. While less than
+    ``min_memory_headroom`` of the memory limit is free the limit is halved.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 0,
+        adaptive: bool = True,
+        adjust_interval: float = 5.0,
+        min_memory_headroom: float = 0.15,
+        tolerance: float = 0.05,
+        headroom: Callable[[], Optional[float]] = memory_headroom
+    ):
+        """
+        Initialize the limit.
+
+        Args:
+            initial: Workers allowed at the start
+            minimum: Fewest workers the limit goes down to
+            maximum: Most workers the limit goes up to; defaults to ``initial``
+            adaptive: Whether to adjust the limit at all
+            adjust_interval: Seconds of throughput measured before each adjustment
+            min_memory_headroom: Free share of the memory limit below which the limit is halved
+            tolerance: Relative throughput change treated as no change
+            headroom: Function returning the free share of the memory limit
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum or initial)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.adaptive = adaptive
+        self.adjust_interval = max(0.1, adjust_interval)
+        self.min_memory_headroom = min_memory_headroom
+        self.tolerance = tolerance
+        self._headroom = headroom
+        self._condition = threading.Condition()
+        self._active = 0
+        self._direction = 1
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+        self._last_throughput: Optional[float] = None
+        self.throughput: Optional[float] = None
+        self.memory_headroom: Optional[float] = None
+        self.adjustments = 0
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the worker slots, waiting while all of them are taken."""
+        with self._condition:
+            while self._active >= self.limit:
+                self._condition.wait()
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify()
+
+    def record(self, size: int):
+        """
+        Add processed bytes to the throughput and adjust the limit when due.
+
+        Args:
+            size: Bytes processed
+        """
+        with self._condition:
+            self._window_bytes += size
+            elapsed = time.monotonic() - self._window_start
+            if not self.adaptive or elapsed < self.adjust_interval:
+                return
+            throughput = self._window_bytes / elapsed
+            self._window_start, self._window_bytes = time.monotonic(), 0
+            self.throughput = throughput
+            self.memory_headroom = self._headroom()
+            self._adjust(throughput)
+            self._condition.notify_all()
+
+    def _adjust(self, throughput: float):
+        previous = self.limit
+        if self.memory_headroom is not None and self.memory_headroom < self.min_memory_headroom:
+            self.limit = max(self.minimum, self.limit // 2)
+            self._direction = 1
+            self._last_throughput = None
+            if self.limit != previous:
+                logger.warning(f"⚠️ Only {self.memory_headroom:.0%} of the memory limit is free, "
+                               f"reducing ingestion workers from {previous} to {self.limit}")
+        else:
+            if self._last_throughput is not None:
+                if throughput < self._last_throughput * (1 - self.tolerance):
+                    self._direction = -self._direction
+                elif throughput <= self._last_throughput * (1 + self.tolerance):
+                    self._direction = -1
+            self._last_throughput = throughput
+            self.limit = min(self.maximum, max(self.minimum, self.limit + self._direction))
+        if self.limit != previous:
+            self.adjustments += 1
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get the current limit and the measurements it is based on.
+
+        Returns:
+            Dictionary with the limit and its bounds, the active workers, the
+            throughput of the last interval and the memory headroom
+        """
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "minimum": self.minimum,
+                "maximum": self.maximum,
+                "active": self._active,
+                "adaptive": self.adaptive,
+                "adjustments": self.adjustments,
+                "mb_per_second": round(self.throughput / (1024 * 1024), 2) if self.throughput is not None else None,
+                "memory_headroom": round(self.memory_headroom, 3) if self.memory_headroom is not None else None
+            }
+
+
+class ConcurrencyController:
+    """
+    Sizes ingestion from the CPUs and memory the process may actually use.
+
+    ``embed_share`` of the CPUs go to the torch threads that compute
+    embeddings; the rest run load workers, ``io_workers_per_cpu`` per CPU since
+    loading mostly waits on the disk or network. Each ingestion run gets an
+    ``AdaptiveWorkerLimit`` that starts at the limit the previous run settled on.
+    """
+
+    def __init__(
+        self,
+        cpus: float = 0,
+        embed_share: float = 0.5,
+        embed_threads: int = 0,
+        io_workers_per_cpu: int = 2,
+        min_load_workers: int = 1,
+        max_load_workers: int = 0,
+        adaptive: bool = True,
+        adjust_interval: float = 5.0,
+        min_memory_headroom: float = 0.15
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            cpus: CPUs to plan for; 0 detects the cgroup CPU limit
+            embed_share: Share of the CPUs given to the embedding model's torch threads
+            embed_threads: Torch threads for embedding; 0 derives them from ``embed_share``
+            io_workers_per_cpu: Load workers per CPU not used for embedding
+            min_load_workers: Fewest load workers a run is reduced to
+            max_load_workers: Most load workers a run is raised to; 0 derives them
+                from the CPUs
+            adaptive: Whether to adjust the load workers at runtime
+            adjust_interval: Seconds of throughput measured before each adjustment
+            min_memory_headroom: Free share of the memory limit below which the
+                load workers are halved
+        """
+        self.detected_cpus = cpu_limit()
+        self.cpus = cpus if cpus > 0 else self.detected_cpus
+        whole_cpus = max(1, int(self.cpus))
+        self.embed_threads = embed_threads if embed_threads > 0 else max(1, round(whole_cpus * embed_share))
+        io_cpus = max(1, whole_cpus - self.embed_threads)
+        self.min_load_workers = max(1, min_load_workers)
+        self.max_load_workers = max(self.min_load_workers, max_load_workers or io_cpus * max(1, io_workers_per_cpu))
+        self.adaptive = adaptive
+        self.adjust_interval = adjust_interval
+        self.min_memory_headroom = min_memory_headroom
+        self.memory_limit, _ = memory_usage()
+        self._lock = threading.Lock()
+        self._runs = []
+        self._last_limit: Optional[int] = None
+        logger.info(f"🧵 Ingestion sized for {self.cpus:g} CPUs (of {os.cpu_count()} reported): "
+                    f"{self.embed_threads} embedding threads, up to {self.max_load_workers} load workers")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ConcurrencyController":
+        """
+        Create a controller from the ``ingestion.concurrency`` config section.
+
+        Args:
+            config: Concurrency configuration dictionary
+
+        Returns:
+            A configured ConcurrencyController
+        """
+        adaptive = os.environ.get("RAG_INGESTION_ADAPTIVE", str(config.get("adaptive", True)))
+        return cls(
+            cpus=float(os.environ.get("RAG_INGESTION_CPUS", config.get("cpus", 0))),
+            embed_share=float(config.get("embed_share", 0.5)),
+            embed_threads=int(os.environ.get("RAG_INGESTION_EMBED_THREADS", config.get("embed_threads", 0))),
+            io_workers_per_cpu=int(config.get("io_workers_per_cpu", 2)),
+            min_load_workers=int(config.get("min_load_workers", 1)),
+            max_load_workers=int(config.get("max_load_workers", 0)),
+            adaptive=adaptive.lower() == "true",
+            adjust_interval=float(config.get("adjust_interval", 5)),
+            min_memory_headroom=float(config.get("min_memory_headroom", 0.15))
+        )
+
+    def apply_torch_threads(self):
+        """Limit torch's intra-op thread pool, used to embed in this process, to ``embed_threads``."""
+        try:
+            import torch
+            torch.set_num_threads(self.embed_threads)
+        except ImportError:
+            pass
+
+    def start_run(self, load_workers: int, maximum: Optional[int] = None) -> AdaptiveWorkerLimit:
+        """
+        Get the worker limit of a new ingestion run.
+
+        Args:
+            load_workers: Load workers the run is configured with; used as the
+                starting point of the first run
+            maximum: Most workers the run can use, e.g. its worker processes;
+                defaults to the larger of ``max_load_workers`` and ``load_workers``
+
+        Returns:
+            The run's AdaptiveWorkerLimit; the run starts ``maximum`` workers
+        """
+        if maximum is None:
+            maximum = max(self.max_load_workers, load_workers)
+        with self._lock:
+            initial = min(self._last_limit or load_workers, maximum)
+        limit = AdaptiveWorkerLimit(
+            initial,
+            minimum=self.min_load_workers,
+            maximum=maximum if self.adaptive else initial,
+            adaptive=self.adaptive,
+            adjust_interval=self.adjust_interval,
+            min_memory_headroom=self.min_memory_headroom
+        )
+        with self._lock:
+            self._runs.append(limit)
+        return limit
+
+    def finish_run(self, limit: AdaptiveWorkerLimit):
+        """
+        Remove a finished run, remembering the limit it settled on for the next run.
+
+        Args:
+            limit: The run's AdaptiveWorkerLimit from ``start_run``
+        """
+        with self._lock:
+            if limit in self._runs:
+                self._runs.remove(limit)
+            if limit.adjustments:
+                self._last_limit = limit.limit
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get the resource limits, the CPU split and the worker limits of running ingestions.
+
+        Returns:
+            Dictionary with the detected and planned CPUs, memory limit and
+            headroom, embedding threads, load worker bounds and one status per
+            running ingestion
+        """
+        with self._lock:
+            runs = list(self._runs)
+            last_limit = self._last_limit
+        headroom = memory_headroom()
+        return {
+            "detected_cpus": round(self.detected_cpus, 2),
+            "cpus": round(self.cpus, 2),
+            "memory_limit_mb": round(self.memory_limit / (1024 * 1024), 1) if self.memory_limit else None,
+            "memory_headroom": round(headroom, 3) if headroom is not None else None,
+            "embed_threads": self.embed_threads,
+            "min_load_workers": self.min_load_workers,
+            "max_load_workers": self.max_load_workers,
+            "adaptive": self.adaptive,
+            "last_load_worker_limit": last_limit,
+            "runs": [run.get_status() for run in runs]
+        }
@@ -0,0 +1,332 @@
+"""
+Background ingestion jobs for the RAG-LLM Framework.
+Repository ingestion runs outside the HTTP request as a job with an ID, live
+progress and cancellation. At most one job runs per repository and branch, and
+a global cap limits how many jobs run at the same time.
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from .ingestion_pipeline import IngestionCancelled
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+DEFAULT_MAX_CONCURRENT_JOBS = 2
+DEFAULT_MAX_HISTORY = 100
+
+
+class IngestionJob:
+    """
+    A single repository ingestion job and its progress.
+    """
+
+    def __init__(self, repo_url: str, branch: str):
+        """
+        Initialize the job.
+
+        Args:
+            repo_url: Repository being ingested
+            branch: Branch being ingested
+        """
+        self.id = uuid.uuid4().hex
+        self.repo_url = repo_url
+        self.branch = branch
+        self.status = JOB_QUEUED
+        self.phase = JOB_QUEUED
+        self.created_at = datetime.utcnow().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.cancel_event = threading.Event()
+        self._done = threading.Event()
+
+        self._lock = threading.Lock()
+        self._ingest_started = None
+        self.files_total = 0
+        self.bytes_total = 0
+        self.progress = {"files": 0, "bytes": 0, "documents": 0, "chunks": 0, "embedded": 0, "skipped": 0}
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def active(self) -> bool:
+        """Whether the job is queued or running."""
+        return self.status in ACTIVE_STATUSES
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancellation was requested."""
+        return self.cancel_event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the job has finished.
+
+        Args:
+            timeout: Maximum number of seconds to wait; waits indefinitely if None
+
+        Returns:
+            Whether the job finished within the timeout
+        """
+        return self._done.wait(timeout)
+
+    def set_phase(self, phase: str):
+        """
+        Record the current phase (syncing, ingesting, finalizing).
+
+        Raises:
+            IngestionCancelled: If the job was cancelled, so callers stop between phases
+        """
+        if self.cancelled:
+            raise IngestionCancelled("Ingestion cancelled")
+        with self._lock:
+            self.phase = phase
+            if phase == "ingesting":
+                self._ingest_started = time.monotonic()
+
+    def set_totals(self, files: int, total_bytes: int):
+        """Record how many files and bytes the job is going to load."""
+        with self._lock:
+            self.files_total = files
+            self.bytes_total = total_bytes
+
+    def update_progress(self, stats: Dict[str, Any]):
+        """Pipeline progress callback; takes a snapshot of the pipeline counters and stage timings."""
+        with self._lock:
+            for key in self.progress:
+                if key in stats:
+                    self.progress[key] = stats[key]
+            self.stages.update(stats.get("stages", {}))
+
+    def _eta_seconds(self) -> Optional[float]:
+        if self._ingest_started is None or self.phase != "ingesting":
+            return None
+        done, total = self.progress["bytes"], self.bytes_total
+        if not total:
+            done, total = self.progress["files"], self.files_total
+        if not done or not total:
+            return None
+        elapsed = time.monotonic() - self._ingest_started
+        return round(max(0.0, elapsed / done * (total - done)), 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the job state as a dictionary."""
+        with self._lock:
+            progress = dict(self.progress)
+            progress["files_total"] = self.files_total
+            progress["bytes_total"] = self.bytes_total
+            progress["percent"] = round(100.0 * self.progress["bytes"] / self.bytes_total, 1) if self.bytes_total else None
+            progress["eta_seconds"] = self._eta_seconds()
+            return {
+                "job_id": self.id,
+                "repo_url": self.repo_url,
+                "branch": self.branch,
+                "status": self.status,
+                "phase": self.phase,
+                "cancel_requested": self.cancelled,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "progress": progress,
+                "stages": dict(self.stages),
+                "result": self.result,
+                "error": self.error
+            }
+
+
+class IngestionJobManager:
+    """
+    Runs ingestion jobs on a bounded thread pool.
+
+    Submitting a repository that already has a queued or running job returns
+    that job instead of starting a second one. Finished jobs are kept for
+    ``max_history`` jobs so their results can still be queried.
+    """
+
+    def __init__(self, max_concurrent_jobs: int = DEFAULT_MAX_CONCURRENT_JOBS, max_history: int = DEFAULT_MAX_HISTORY):
+        """
+        Initialize the job manager.
+
+        Args:
+            max_concurrent_jobs: Maximum number of jobs running at the same time
+            max_history: Number of finished jobs to keep
+        """
+        self.max_concurrent_jobs = max(1, max_concurrent_jobs)
+        self.max_history = max(1, max_history)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent_jobs,
+                                            thread_name_prefix="ingestion-job")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._active: Dict[str, IngestionJob] = {}
+
+    @classmethod
+    def from_env(cls) -> "IngestionJobManager":
+        """
+        Create a job manager configured from ``RAG_MAX_CONCURRENT_INGESTION_JOBS``.
+
+        Returns:
+            A configured IngestionJobManager
+        """
+        max_jobs = os.environ.get("RAG_MAX_CONCURRENT_INGESTION_JOBS", "")
+        return cls(max_concurrent_jobs=int(max_jobs) if max_jobs.isdigit() else DEFAULT_MAX_CONCURRENT_JOBS)
+
+    @staticmethod
+    def _key(repo_url: str, branch: str) -> str:
+        return f"{repo_url.rstrip('/')}@{branch}"
+
+    def submit(
+        self,
+        repo_url: str,
+        branch: str,
+        run: Callable[[IngestionJob], Dict[str, Any]]
+    ) -> Tuple[IngestionJob, bool]:
+        """
+        Submit an ingestion job for a repository.
+
+        Args:
+            repo_url: Repository to ingest
+            branch: Branch to ingest
+            run: Function performing the ingestion; receives the job to report
+                progress on and check for cancellation, and returns the result
+
+        Returns:
+            The job, and whether it was newly created (False if a job for the
+            repository was already queued or running)
+        """
+        key = self._key(repo_url, branch)
+        with self._lock:
+            existing = self._active.get(key)
+            if existing is not None and existing.active:
+                return existing, False
+            job = IngestionJob(repo_url, branch)
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._trim_history()
+
+        self._executor.submit(self._run_job, job, key, run)
+        logger.info(f"📥 Queued ingestion job {job.id} for {repo_url} (branch: {branch})")
+        return job, True
+
+    def _run_job(self, job: IngestionJob, key: str, run: Callable[[IngestionJob], Dict[str, Any]]):
+        try:
+            if job.cancelled:
+                raise IngestionCancelled("Ingestion cancelled")
+            job.started_at = datetime.utcnow().isoformat()
+            job.status = JOB_RUNNING
+            job.result = run(job)
+            if isinstance(job.result, dict) and job.result.get("stages"):
+                job.update_progress({"stages": job.result["stages"]})
+            job.status = JOB_SUCCEEDED
+            logger.info(f"✅ Ingestion job {job.id} for {job.repo_url} succeeded")
+        except IngestionCancelled:
+            job.status = JOB_CANCELLED
+            logger.info(f"🛑 Ingestion job {job.id} for {job.repo_url} cancelled")
+        except Exception as e:
+            job.status = JOB_FAILED
+            job.error = str(e)
+            logger.error(f"❌ Ingestion job {job.id} for {job.repo_url} failed: {str(e)}")
+        finally:
+            job.phase = "done"
+            job.finished_at = datetime.utcnow().isoformat()
+            with self._lock:
+                if self._active.get(key) is job:
+                    del self._active[key]
+            job._done.set()
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Get a job by ID, or None if it is unknown."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, repo_url: Optional[str] = None, status: Optional[str] = None) -> List[IngestionJob]:
+        """
+        List jobs, newest first.
+
+        Args:
+            repo_url: Only jobs for this repository
+            status: Only jobs in this status
+
+        Returns:
+            Matching jobs
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if repo_url:
+            jobs = [job for job in jobs if job.repo_url.rstrip("/") == repo_url.rstrip("/")]
+        if status:
+            jobs = [job for job in jobs if job.status == status]
+        return list(reversed(jobs))
+
+    def cancel(self, job_id: str) -> Optional[IngestionJob]:
+        """
+        Request cancellation of a job.
+
+        A queued job is cancelled before it starts. A running job stops at the
+        next phase boundary or pipeline item; chunks already handed to the vector
+        store writer are still written, and the commit is not recorded, so the
+        next run picks the same changes up again.
+
+        Args:
+            job_id: Job to cancel
+
+        Returns:
+            The job, or None if it is unknown
+        """
+        job = self.get(job_id)
+        if job is not None and job.active:
+            job.cancel_event.set()
+            logger.info(f"🛑 Cancellation requested for ingestion job {job.id}")
+        return job
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get job manager statistics.
+
+        Returns:
+            Dictionary with the concurrency cap and job counts per status
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {s: 0 for s in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)}
+        for job in jobs:
+            counts[job.status] += 1
+        return {"max_concurrent_jobs": self.max_concurrent_jobs, "job_counts": counts}
+
+
+_job_manager: Optional[IngestionJobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> IngestionJobManager:
+    """
+    Get the process-wide ingestion job manager.
+
+    Returns:
+        The shared IngestionJobManager
+    """
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = IngestionJobManager.from_env()
+        return _job_manager
@@ -0,0 +1,203 @@
+"""
+Ingestion timing and throughput metrics for the RAG-LLM Framework.
+Every ingestion run records, per stage (sync, walk, load, split, embed, write),
+the time spent working, the CPU time, the time spent waiting for input, for
+room downstream or for the ingestion throttle, and the items and bytes processed. Finished runs are added up
+per repository and exported in the Prometheus text format.
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STAGE_COUNTERS = ("busy_seconds", "cpu_seconds", "idle_seconds", "blocked_seconds", "throttled_seconds", "items",
+                  "bytes")
+
+# Prometheus metric name, help text and stage counter
+_METRICS = (
+    ("rag_ingestion_stage_busy_seconds_total", "Wall time ingestion stages spent working.", "busy_seconds"),
+    ("rag_ingestion_stage_cpu_seconds_total", "CPU time of the threads running ingestion stages.", "cpu_seconds"),
+    ("rag_ingestion_stage_idle_seconds_total", "Time ingestion stage workers waited for input.", "idle_seconds"),
+    ("rag_ingestion_stage_blocked_seconds_total", "Time ingestion stage workers waited for the next stage.",
+     "blocked_seconds"),
+    ("rag_ingestion_stage_throttled_seconds_total", "Time ingestion stage workers waited for the ingestion throttle.",
+     "throttled_seconds"),
+    ("rag_ingestion_stage_items_total", "Items (files, documents or chunks) processed by ingestion stages.", "items"),
+    ("rag_ingestion_stage_bytes_total", "Bytes of text processed by ingestion stages.", "bytes"),
+)
+
+
+class StageStats:
+    """
+    Thread-safe per-stage counters of one ingestion run.
+
+    ``busy_seconds`` is wall time summed over a stage's workers, so a stage with
+    four busy workers accumulates four seconds per second. ``cpu_seconds`` is the
+    CPU time of the stage's own threads (and of worker processes in process mode);
+    native thread pools, such as the one torch uses to embed, only show up in the
+    run's ``process_cpu_seconds``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    def add(self, stage: str, **values: float):
+        """
+        Add to the counters of a stage.
+
+        Args:
+            stage: Stage name
+            **values: Amounts to add, keyed by counter name (see ``STAGE_COUNTERS``)
+        """
+        with self._lock:
+            counters = self._stages.setdefault(stage, dict.fromkeys(STAGE_COUNTERS, 0))
+            for key, value in values.items():
+                counters[key] += value
+
+    def merge(self, stages: Dict[str, Dict[str, Any]]):
+        """Add the counters of another run's ``to_dict`` output."""
+        for stage, counters in stages.items():
+            self.add(stage, **{key: counters.get(key, 0) for key in STAGE_COUNTERS})
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Add the wall and CPU time of the enclosed block to a stage."""
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(stage, busy_seconds=time.perf_counter() - start, cpu_seconds=time.thread_time() - cpu_start)
+
+    def timed(self, stage: str, iterator: Iterable[Any]) -> Iterator[Any]:
+        """
+        Iterate while adding the time spent producing each item to a stage.
+
+        Time the consumer spends between items (e.g. blocked on a full queue) is
+        not counted.
+        """
+        iterator = iter(iterator)
+        while True:
+            start, cpu_start = time.perf_counter(), time.thread_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.add(stage, busy_seconds=time.perf_counter() - start, cpu_seconds=time.thread_time() - cpu_start)
+            yield item
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the counters of every stage.
+
+        Returns:
+            Mapping of stage name to its counters, rounded, with ``items_per_second``
+            and ``mb_per_second`` of busy time
+        """
+        with self._lock:
+            stages = {stage: dict(counters) for stage, counters in self._stages.items()}
+        result = {}
+        for stage, counters in stages.items():
+            busy = counters["busy_seconds"]
+            result[stage] = {
+                **{key: round(value, 3) if key.endswith("seconds") else int(value) for key, value in counters.items()},
+                "items_per_second": round(counters["items"] / busy, 1) if busy > 0 else None,
+                "mb_per_second": round(counters["bytes"] / (1024 * 1024) / busy, 2) if busy > 0 else None
+            }
+        return result
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class IngestionMetrics:
+    """
+    Process-wide totals of finished ingestion runs, per repository and branch.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[Tuple[str, str, str], Dict[str, float]] = {}
+        self._runs: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def record(
+        self,
+        source: str,
+        branch: str,
+        stages: Dict[str, Dict[str, Any]],
+        seconds: float,
+        process_cpu_seconds: float = 0.0
+    ):
+        """
+        Add a finished ingestion run.
+
+        Args:
+            source: Repository URL or directory path
+            branch: Branch, or glob for directories
+            stages: Per-stage counters from ``StageStats.to_dict``
+            seconds: Wall time of the run
+            process_cpu_seconds: CPU time of the whole process during the run
+        """
+        with self._lock:
+            for stage, counters in stages.items():
+                totals = self._stages.setdefault((source, branch, stage), dict.fromkeys(STAGE_COUNTERS, 0))
+                for key in STAGE_COUNTERS:
+                    totals[key] += counters.get(key, 0) or 0
+            run = self._runs.setdefault((source, branch), {"runs": 0, "seconds": 0.0, "process_cpu_seconds": 0.0})
+            run["runs"] += 1
+            run["seconds"] += seconds
+            run["process_cpu_seconds"] += process_cpu_seconds
+
+    def render(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            The metrics text
+        """
+        with self._lock:
+            stages = {key: dict(totals) for key, totals in self._stages.items()}
+            runs = {key: dict(totals) for key, totals in self._runs.items()}
+
+        lines: List[str] = []
+        for name, help_text, counter in _METRICS:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (source, branch, stage), totals in sorted(stages.items()):
+                lines.append(f'{name}{{repo="{_escape_label(source)}",branch="{_escape_label(branch)}",'
+                             f'stage="{_escape_label(stage)}"}} {totals[counter]:g}')
+        for name, help_text, key in (
+            ("rag_ingestion_runs_total", "Finished ingestion runs.", "runs"),
+            ("rag_ingestion_run_seconds_total", "Wall time of finished ingestion runs.", "seconds"),
+            ("rag_ingestion_process_cpu_seconds_total", "CPU time of the process during ingestion runs.",
+             "process_cpu_seconds"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (source, branch), totals in sorted(runs.items()):
+                lines.append(f'{name}{{repo="{_escape_label(source)}",branch="{_escape_label(branch)}"}} {totals[key]:g}')
+        return "\n".join(lines) + "\n"
+
+
+_metrics: Optional[IngestionMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_ingestion_metrics() -> IngestionMetrics:
+    """
+    Get the process-wide ingestion metrics.
+
+    Returns:
+        The shared IngestionMetrics
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = IngestionMetrics()
+        return _metrics
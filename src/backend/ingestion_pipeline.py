@@ -0,0 +1,677 @@
+"""
+Streaming ingestion pipeline for the RAG-LLM Framework.
+Files flow through walker → loader → splitter → embedding batcher → vector writer
+stages connected by bounded queues, so memory stays bounded regardless of the
+size of the source and embedding overlaps with loading and splitting.
+"""
+import os
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from contextlib import nullcontext
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from langchain.schema import Document
+
+from .chunking import split_documents, source_key, DocumentSplitter
+from .ingestion_metrics import StageStats
+from .ingestion_concurrency import AdaptiveWorkerLimit, ConcurrencyController, cpu_limit
+from .ingestion_throttle import IngestionThrottle
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXECUTOR_THREAD = "thread"
+EXECUTOR_PROCESS = "process"
+
+_DONE = object()
+
+
+class IngestionCancelled(Exception):
+    """Raised when an ingestion run is cancelled before it finished."""
+
+
+_process_pools: Dict[int, ProcessPoolExecutor] = {}
+_process_pools_lock = threading.Lock()
+_worker_embeddings = None
+
+
+def get_process_pool(workers: int, cpus: float = 0) -> ProcessPoolExecutor:
+    """
+    Get the shared worker process pool of the given size, starting it on first use.
+
+    Pools are kept for the lifetime of the server so worker start-up (imports and,
+    with process embeddings, model loading) is paid once.
+
+    Args:
+        workers: Number of worker processes
+        cpus: CPUs shared by the worker processes; 0 detects the cgroup CPU limit
+
+    Returns:
+        The process pool
+    """
+    with _process_pools_lock:
+        if workers not in _process_pools:
+            logger.info(f"🧵 Starting ingestion process pool with {workers} workers")
+            _process_pools[workers] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(workers, cpus)
+            )
+        return _process_pools[workers]
+
+
+def shutdown_process_pools():
+    """Shut down all ingestion worker process pools."""
+    with _process_pools_lock:
+        for pool in _process_pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _process_pools.clear()
+
+
+def _init_worker(workers: int, cpus: float = 0):
+    # Share the CPUs between the worker processes instead of every process
+    # starting one torch thread per core of the node
+    try:
+        import torch
+        torch.set_num_threads(max(1, int(cpus or cpu_limit()) // workers))
+    except ImportError:
+        pass
+
+
+def _load_and_split(
+    items: List[Any],
+    loader: Optional[Callable[[Any], Optional[Document]]],
+    splitter: Optional[DocumentSplitter] = None
+) -> Tuple[List[Tuple[str, Dict[str, Any]]], Dict[str, Any]]:
+    """Load and split a batch of items in a worker process."""
+    cpu_start = time.thread_time()
+    documents = []
+    for item in items:
+        document = loader(item) if loader else item
+        if document is not None:
+            documents.append(document)
+    chunks = split_documents(documents, splitter)
+    stats = {
+        "files": len(documents),
+        "documents": len(documents),
+        "bytes": sum(len(doc.page_content.encode("utf-8")) for doc in documents),
+        "sources": [doc.metadata.get("source", "unknown") for doc in documents],
+        "source_keys": [source_key(doc.metadata) for doc in documents],
+        "cpu_seconds": time.thread_time() - cpu_start
+    }
+    return [(chunk.page_content, chunk.metadata) for chunk in chunks], stats
+
+
+def _embed_texts(model_name: str, texts: List[str]) -> Tuple[List[List[float]], float]:
+    """Embed texts in a worker process with the process's own model instance; also returns the CPU time."""
+    global _worker_embeddings
+    cpu_start = time.process_time()
+    if _worker_embeddings is None:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        _worker_embeddings = HuggingFaceEmbeddings(model_name=model_name)
+    return _worker_embeddings.embed_documents(texts), time.process_time() - cpu_start
+
+
+def _torch_threads() -> int:
+    """Get the size of torch's intra-op thread pool, 1 without torch."""
+    try:
+        import torch
+        return max(1, torch.get_num_threads())
+    except ImportError:
+        return 1
+
+
+def _measure_embedding_cpu(embed_texts: Callable[[List[str]], List[List[float]]], charge: Callable[[float], None]):
+    """
+    Wrap an in-process embedding function so the CPU time of each call is charged.
+
+    The process CPU time would include every other thread, such as loaders,
+    queries and concurrent pipelines. The calling thread's CPU time is measured
+    instead, plus the wall time of torch's other intra-op threads, which work on
+    the call while it runs.
+    """
+    def measured(texts: List[str]) -> List[List[float]]:
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        vectors = embed_texts(texts)
+        charge(time.thread_time() - cpu_start + (time.perf_counter() - start) * (_torch_threads() - 1))
+        return vectors
+    return measured
+
+
+class IngestionPipeline:
+    """
+    Bounded, multi-stage ingestion pipeline feeding a RAG engine's vector store.
+
+    Each stage runs in its own worker threads and hands work to the next stage
+    through a queue of at most ``queue_size`` items, which applies backpressure to
+    the upstream stages when embedding or writing falls behind. A pipeline
+    instance runs once.
+    """
+
+    def __init__(
+        self,
+        rag_engine,
+        queue_size: int = 8,
+        load_workers: int = 4,
+        split_workers: int = 2,
+        embed_workers: int = 1,
+        embed_batch_size: int = 64,
+        executor: str = EXECUTOR_THREAD,
+        process_workers: int = 0,
+        process_batch_size: int = 32,
+        process_embeddings: bool = False,
+        embeddings_model: Optional[str] = None,
+        controller: Optional[ConcurrencyController] = None,
+        throttle: Optional[IngestionThrottle] = None
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            rag_engine: RAG engine providing split, embed and write operations
+            queue_size: Maximum number of items waiting between two stages
+            load_workers: Threads reading files
+            split_workers: Threads splitting documents into chunks
+            embed_workers: Threads computing embeddings
+            embed_batch_size: Number of chunks embedded and handed to the writer per batch
+            executor: 'thread' to load and split in threads, or 'process' to load
+                and split in a pool of worker processes, which avoids the GIL
+            process_workers: Worker processes in process mode; 0 uses all CPUs
+                the process may use
+            process_batch_size: Items shipped to a worker process per task
+            process_embeddings: In process mode, also embed in the worker
+                processes, each with its own instance of ``embeddings_model``
+            embeddings_model: HuggingFace model name for process embeddings
+            controller: Optional concurrency controller; when given, the load
+                (or, in process mode, parse) workers working at the same time
+                are adjusted at runtime
+            throttle: Optional ingestion throttle every embedding batch waits for
+        """
+        self.rag_engine = rag_engine
+        self.queue_size = max(1, queue_size)
+        self.load_workers = max(1, load_workers)
+        self.split_workers = max(1, split_workers)
+        self.embed_workers = max(1, embed_workers)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.executor = executor if executor in (EXECUTOR_THREAD, EXECUTOR_PROCESS) else EXECUTOR_THREAD
+        self.controller = controller
+        self.throttle = throttle
+        self.cpus = controller.cpus if controller is not None else cpu_limit()
+        self.process_workers = process_workers if process_workers > 0 else max(1, int(self.cpus))
+        self.process_batch_size = max(1, process_batch_size)
+        self.process_embeddings = (
+            self.executor == EXECUTOR_PROCESS and process_embeddings and bool(embeddings_model)
+        )
+        self.embeddings_model = embeddings_model
+
+        self._stats_lock = threading.Lock()
+        self._write_futures: List[Tuple[Future, List[Document]]] = []
+        self._cancel_event: Optional[threading.Event] = None
+        self._on_progress: Optional[Callable[[Dict[str, int]], None]] = None
+        self._on_file_written: Optional[Callable[[str, List[str]], None]] = None
+        self._file_chunks: Dict[str, Tuple[List[str], set]] = {}
+        # Chunks of each source not yet handed to the writer, and all of its chunk IDs
+        self._source_chunks: Dict[str, Tuple[List[int], set]] = {}
+        self._abort = threading.Event()
+        self._error: Optional[BaseException] = None
+        self.loaded_sources = set()
+        self.stage_stats = StageStats()
+        self.worker_limit: Optional[AdaptiveWorkerLimit] = None
+        self.stats = {
+            "files": 0,
+            "documents": 0,
+            "bytes": 0,
+            "chunks": 0,
+            "embedded": 0,
+            "skipped": 0,
+            "removed": 0
+        }
+
+    @classmethod
+    def from_config(
+        cls,
+        rag_engine,
+        config: Dict[str, Any],
+        embeddings_model: Optional[str] = None,
+        controller: Optional[ConcurrencyController] = None,
+        throttle: Optional[IngestionThrottle] = None
+    ) -> "IngestionPipeline":
+        """
+        Create a pipeline from the ``ingestion.pipeline`` config section.
+
+        Args:
+            rag_engine: RAG engine providing split, embed and write operations
+            config: Pipeline configuration dictionary
+            embeddings_model: HuggingFace model name for process embeddings
+            controller: Optional concurrency controller adjusting the load workers
+            throttle: Optional ingestion throttle every embedding batch waits for
+
+        Returns:
+            A configured IngestionPipeline
+        """
+        return cls(
+            rag_engine,
+            queue_size=int(config.get("queue_size", 8)),
+            load_workers=int(config.get("load_workers", 4)),
+            split_workers=int(config.get("split_workers", 2)),
+            embed_workers=int(config.get("embed_workers", 1)),
+            embed_batch_size=int(config.get("embed_batch_size", 64)),
+            executor=os.environ.get("RAG_INGESTION_EXECUTOR", config.get("executor", EXECUTOR_THREAD)),
+            process_workers=int(os.environ.get("RAG_INGESTION_PROCESS_WORKERS", config.get("process_workers", 0))),
+            process_batch_size=int(config.get("process_batch_size", 32)),
+            process_embeddings=bool(config.get("process_embeddings", False)),
+            embeddings_model=embeddings_model,
+            controller=controller,
+            throttle=throttle
+        )
+
+    def run(
+        self,
+        items: Iterable[Any],
+        loader: Optional[Callable[[Any], Optional[Document]]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+        on_file_written: Optional[Callable[[str, List[str]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Stream items through the pipeline into the vector store.
+
+        Args:
+            items: Documents, or arbitrary items (e.g. file paths) turned into
+                Documents by ``loader``. Consumed lazily
+            loader: Optional function loading an item; returning None skips it
+            cancel_event: Optional event that stops the run when set. Work
+                already handed to the writer is still written
+            on_progress: Optional callback receiving a snapshot of the counters
+                whenever they change. Called from pipeline threads
+            on_file_written: Optional callback receiving a source and its chunk IDs
+                once all chunks of the source are in the vector store (written or
+                already stored), e.g. to checkpoint progress. Called from pipeline
+                and writer threads
+
+        Returns:
+            Dictionary with files, documents, bytes, chunks, embedded, skipped and
+            removed counts, the loaded ``sources``, the elapsed ``seconds``, the
+            ``process_cpu_seconds`` used meanwhile, per-stage timings and
+            throughput in ``stages`` (see ``StageStats``) and, with a controller,
+            the final load worker limit in ``concurrency``
+
+        Raises:
+            IngestionCancelled: If ``cancel_event`` was set before the run finished
+            Exception: The first error raised by any stage
+        """
+        start, cpu_start = time.monotonic(), time.process_time()
+        self._cancel_event = cancel_event
+        self._on_progress = on_progress
+        self._on_file_written = on_file_written
+        load_queue = queue.Queue(self.queue_size)
+        split_queue = queue.Queue(self.queue_size)
+        chunk_queue = queue.Queue(self.queue_size)
+        embed_queue = queue.Queue(self.queue_size)
+        write_queue = queue.Queue(self.queue_size)
+
+        if self.executor == EXECUTOR_PROCESS:
+            # Items go to the worker processes in batches; a thread per worker
+            # process keeps the pool busy
+            pool = get_process_pool(self.process_workers, self.cpus)
+            walk_batch, load_workers = self.process_batch_size, self.process_workers
+            if self.controller is not None:
+                self.worker_limit = self.controller.start_run(load_workers, maximum=load_workers)
+            load_stages = [("parse", self._process_load_split(pool, loader), load_queue, chunk_queue, load_workers, 1)]
+        else:
+            walk_batch, load_workers = 0, self.load_workers
+            if self.controller is not None:
+                # Start as many load threads as the limit may grow to; the limit
+                # decides how many of them work at the same time
+                self.worker_limit = self.controller.start_run(load_workers)
+                load_workers = self.worker_limit.maximum
+            load_stages = [
+                ("load", self._load(loader), load_queue, split_queue, load_workers, self.split_workers),
+                ("split", self._split, split_queue, chunk_queue, self.split_workers, 1)
+            ]
+        embed_workers = self.process_workers if self.process_embeddings else self.embed_workers
+
+        threads = [threading.Thread(target=self._walk, args=(items, load_queue, walk_batch, load_workers),
+                                    name="ingest-walker", daemon=True)]
+        threads += self._start_stage(*load_stages[0], limit=self.worker_limit)
+        for stage in load_stages[1:]:
+            threads += self._start_stage(*stage)
+        threads += self._start_stage("batch", None, chunk_queue, embed_queue, 1, embed_workers)
+        threads += self._start_stage("embed", self._embed, embed_queue, write_queue, embed_workers, 1)
+        # Writes are timed by the vector store writer, which attributes its upserts to the runs
+        threads += self._start_stage("write", self._write, write_queue, None, 1, 0, timed=False)
+
+        threads[0].start()
+        for thread in threads:
+            thread.join()
+        if self.worker_limit is not None:
+            self.controller.finish_run(self.worker_limit)
+
+        # Wait for the vector store writer to write everything this run submitted
+        for future, chunks in self._write_futures:
+            try:
+                written, removed = future.result()
+                self._count(embedded=written, removed=removed)
+                self._chunks_written(chunks)
+            except Exception as e:
+                self._fail("write", e)
+
+        if self._error is not None:
+            raise self._error
+        if cancel_event is not None and cancel_event.is_set():
+            raise IngestionCancelled("Ingestion cancelled")
+
+        result = dict(self.stats)
+        result["sources"] = sorted(self.loaded_sources)
+        result["seconds"] = round(time.monotonic() - start, 3)
+        result["process_cpu_seconds"] = round(time.process_time() - cpu_start, 3)
+        result["stages"] = self.stage_stats.to_dict()
+        if self.worker_limit is not None:
+            result["concurrency"] = self.worker_limit.get_status()
+        logger.info(f"✅ Ingestion pipeline finished: {result['documents']} documents, {result['chunks']} chunks, "
+                    f"{result['embedded']} embedded, {result['skipped']} unchanged in {result['seconds']}s")
+        return result
+
+    def _stopped(self) -> bool:
+        return self._abort.is_set() or (self._cancel_event is not None and self._cancel_event.is_set())
+
+    def _fail(self, stage: str, error: BaseException):
+        with self._stats_lock:
+            if self._error is None:
+                self._error = error
+                logger.error(f"❌ Ingestion pipeline stage '{stage}' failed: {str(error)}")
+        self._abort.set()
+
+    def _count(self, **values):
+        with self._stats_lock:
+            for key, value in values.items():
+                self.stats[key] += value
+            snapshot = dict(self.stats)
+        if self._on_progress is not None:
+            snapshot["stages"] = self.stage_stats.to_dict()
+            try:
+                self._on_progress(snapshot)
+            except Exception as e:
+                logger.warning(f"Ingestion progress callback failed: {str(e)}")
+
+    def _track_files(self, chunks: List[Document]):
+        """Start tracking the chunks of new sources; sources without chunks complete once their old chunks are deleted."""
+        if self._on_file_written is None:
+            return
+        chunk_ids: Dict[str, List[str]] = {}
+        for chunk in chunks:
+            chunk_ids.setdefault(chunk.metadata.get("source", "unknown"), []).append(chunk.metadata["chunk_id"])
+        with self._stats_lock:
+            for source, ids in chunk_ids.items():
+                self._file_chunks[source] = (ids, set(ids))
+
+    def _register_sources(self, chunks: List[Document]):
+        """Record the new chunk IDs of each split source, so its stale chunks can be replaced once all are written."""
+        sources: Dict[str, set] = {}
+        for chunk in chunks:
+            sources.setdefault(chunk.metadata["source_key"], set()).add(chunk.metadata["chunk_id"])
+        with self._stats_lock:
+            for key, ids in sources.items():
+                self._source_chunks[key] = ([len(ids)], ids)
+
+    def _complete_sources(self, chunks: List[Document]) -> Dict[str, set]:
+        """Count chunks handed to the writer and get the sources whose chunks have all been handed over."""
+        completed = {}
+        with self._stats_lock:
+            for chunk in chunks:
+                key = chunk.metadata["source_key"]
+                tracked = self._source_chunks.get(key)
+                if tracked is None:
+                    continue
+                tracked[0][0] -= 1
+                if tracked[0][0] <= 0:
+                    completed[key] = self._source_chunks.pop(key)[1]
+        return completed
+
+    def _chunks_written(self, chunks: List[Document]):
+        """Mark chunks as stored and report the sources that are now complete. Idempotent."""
+        if self._on_file_written is None:
+            return
+        completed = []
+        with self._stats_lock:
+            for chunk in chunks:
+                source = chunk.metadata.get("source", "unknown")
+                tracked = self._file_chunks.get(source)
+                if tracked is None:
+                    continue
+                tracked[1].discard(chunk.metadata["chunk_id"])
+                if not tracked[1]:
+                    del self._file_chunks[source]
+                    completed.append((source, tracked[0]))
+        for source, ids in completed:
+            self._file_written(source, ids)
+
+    def _file_written(self, source: str, chunk_ids: List[str]):
+        try:
+            self._on_file_written(source, chunk_ids)
+        except Exception as e:
+            logger.warning(f"Ingestion file callback failed for {source}: {str(e)}")
+
+    def _get(self, stage: str, in_queue: queue.Queue) -> Any:
+        start = time.perf_counter()
+        item = in_queue.get()
+        self.stage_stats.add(stage, idle_seconds=time.perf_counter() - start)
+        return item
+
+    def _put(self, stage: str, out_queue: queue.Queue, item: Any):
+        start = time.perf_counter()
+        out_queue.put(item)
+        self.stage_stats.add(stage, blocked_seconds=time.perf_counter() - start)
+
+    def _walk(self, items: Iterable[Any], out_queue: queue.Queue, batch_size: int, downstream_workers: int):
+        try:
+            batch = []
+            # Walking includes producing the items, e.g. downloading and extracting an archive
+            for item in self.stage_stats.timed("walk", items):
+                if self._abort.is_set():
+                    break
+                if self._cancel_event is not None and self._cancel_event.is_set():
+                    logger.info("🛑 Ingestion cancelled, draining in-flight work")
+                    break
+                self.stage_stats.add("walk", items=1)
+                if not batch_size:
+                    self._put("walk", out_queue, item)
+                    continue
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    self._put("walk", out_queue, batch)
+                    batch = []
+            if batch and not self._abort.is_set():
+                self._put("walk", out_queue, batch)
+        except Exception as e:
+            self._fail("walk", e)
+        finally:
+            for _ in range(downstream_workers):
+                out_queue.put(_DONE)
+
+    def _start_stage(
+        self,
+        name: str,
+        func: Optional[Callable[[Any], Iterable[Any]]],
+        in_queue: queue.Queue,
+        out_queue: Optional[queue.Queue],
+        workers: int,
+        downstream_workers: int,
+        timed: bool = True,
+        limit: Optional[AdaptiveWorkerLimit] = None
+    ) -> List[threading.Thread]:
+        remaining = [workers]
+        remaining_lock = threading.Lock()
+
+        def finish():
+            with remaining_lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and out_queue is not None:
+                for _ in range(downstream_workers):
+                    out_queue.put(_DONE)
+
+        def work():
+            try:
+                while True:
+                    item = self._get(name, in_queue)
+                    if item is _DONE:
+                        break
+                    if self._abort.is_set():
+                        continue
+                    try:
+                        with limit.slot() if limit is not None else nullcontext():
+                            outputs = self.stage_stats.timed(name, func(item)) if timed else func(item)
+                            for output in outputs:
+                                self._put(name, out_queue, output)
+                    except Exception as e:
+                        self._fail(name, e)
+            finally:
+                finish()
+
+        def batch():
+            try:
+                pending: List[Document] = []
+                while True:
+                    item = in_queue.get()
+                    if item is _DONE:
+                        break
+                    if self._abort.is_set():
+                        continue
+                    pending.extend(item)
+                    while len(pending) >= self.embed_batch_size:
+                        out_queue.put(pending[:self.embed_batch_size])
+                        pending = pending[self.embed_batch_size:]
+                if pending and not self._abort.is_set():
+                    out_queue.put(pending)
+            finally:
+                finish()
+
+        target = batch if func is None else work
+        threads = [
+            threading.Thread(target=target, name=f"ingest-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _load(self, loader: Optional[Callable[[Any], Optional[Document]]]):
+        def load(item):
+            document = loader(item) if loader else item
+            if document is None:
+                return
+            with self._stats_lock:
+                self.loaded_sources.add(document.metadata.get("source", "unknown"))
+            size = len(document.page_content.encode("utf-8"))
+            self._count(files=1, documents=1, bytes=size)
+            self.stage_stats.add("load", items=1, bytes=size)
+            if self.worker_limit is not None:
+                self.worker_limit.record(size)
+            yield document
+        return load
+
+    def _split(self, document: Document):
+        chunks = self.rag_engine.split_documents([document])
+        # Stale chunks of the document are deleted by the writer, with its new chunks
+        self._register_sources(chunks)
+        self._count(chunks=len(chunks))
+        self.stage_stats.add("split", items=1, bytes=len(document.page_content.encode("utf-8")))
+        self._track_files(chunks)
+        if chunks:
+            yield chunks
+        else:
+            self._clear_sources({source_key(document.metadata): document.metadata.get("source", "unknown")})
+
+    def _process_load_split(self, pool: ProcessPoolExecutor, loader: Optional[Callable[[Any], Optional[Document]]]):
+        splitter = getattr(self.rag_engine, "splitter", None)
+
+        def load_split(items: List[Any]):
+            chunk_data, stats = pool.submit(_load_and_split, items, loader, splitter).result()
+            chunks = [Document(page_content=text, metadata=metadata) for text, metadata in chunk_data]
+            with self._stats_lock:
+                self.loaded_sources.update(stats["sources"])
+            self._register_sources(chunks)
+            self._count(files=stats["files"], documents=stats["documents"], bytes=stats["bytes"],
+                        chunks=len(chunks))
+            # The loading and splitting CPU time is spent in the worker process
+            self.stage_stats.add("parse", items=stats["files"], bytes=stats["bytes"], cpu_seconds=stats["cpu_seconds"])
+            if self.worker_limit is not None:
+                self.worker_limit.record(stats["bytes"])
+            self._track_files(chunks)
+            chunk_keys = {chunk.metadata["source_key"] for chunk in chunks}
+            empty = {key: source for key, source in zip(stats["source_keys"], stats["sources"]) if key not in chunk_keys}
+            if empty:
+                self._clear_sources(empty)
+            if chunks:
+                yield chunks
+        return load_split
+
+    def _clear_sources(self, sources: Dict[str, str]):
+        """Delete all stored chunks of loaded sources that no longer produce any chunks."""
+        future = self.rag_engine.write_chunks([], [], self.stage_stats, {key: set() for key in sources})
+        if self._on_file_written is not None:
+            def written(f: Future):
+                if f.exception() is None:
+                    for source in sources.values():
+                        self._file_written(source, [])
+            future.add_done_callback(written)
+        with self._stats_lock:
+            self._write_futures.append((future, []))
+
+    def _embed(self, chunks: List[Document]):
+        existing_ids = self.rag_engine.existing_chunk_ids([doc.metadata["chunk_id"] for doc in chunks])
+        new_chunks = [doc for doc in chunks if doc.metadata["chunk_id"] not in existing_ids]
+        self._count(skipped=len(chunks) - len(new_chunks))
+        if not new_chunks:
+            # Still goes to the writer, which may have stale chunks to delete
+            yield [], [], chunks
+            return
+        embed_texts = None
+        if self.process_embeddings:
+            def embed_texts(texts: List[str]) -> List[List[float]]:
+                vectors, cpu_seconds = get_process_pool(self.process_workers, self.cpus).submit(
+                    _embed_texts, self.embeddings_model, texts
+                ).result()
+                self.stage_stats.add("embed", cpu_seconds=cpu_seconds)
+                if self.throttle is not None:
+                    self.throttle.charge_cpu(cpu_seconds)
+                return vectors
+        elif self.throttle is not None:
+            # Only model calls are charged, not embedding cache hits
+            embed_texts = _measure_embedding_cpu(self.rag_engine.embeddings.embed_documents,
+                                                 self.throttle.charge_cpu)
+        if self.throttle is not None:
+            # Waiting for the throttle is counted apart from the stage's busy time
+            waited = self.throttle.acquire(len(new_chunks), self._stopped)
+            self.stage_stats.add("embed", busy_seconds=-waited, throttled_seconds=waited)
+            if self._stopped():
+                return
+        self.stage_stats.add("embed", items=len(new_chunks),
+                             bytes=sum(len(doc.page_content.encode("utf-8")) for doc in new_chunks))
+        embeddings = self.rag_engine.embed_chunks(new_chunks, embed_texts)
+        yield new_chunks, embeddings, chunks
+
+    def _write(self, batch):
+        # Runs in a single thread, so sources complete in the order the writer receives them
+        new_chunks, embeddings, chunks = batch
+        replace_sources = self._complete_sources(chunks)
+        if not new_chunks and not replace_sources:
+            self._chunks_written(chunks)
+            return ()
+        start = time.perf_counter()
+        future = self.rag_engine.write_chunks(new_chunks, embeddings, self.stage_stats, replace_sources)
+        self.stage_stats.add("write", blocked_seconds=time.perf_counter() - start)
+        if self._on_file_written is not None:
+            # Unchanged chunks count as written once the source's stale chunks are gone too
+            def written(f: Future):
+                if f.exception() is None:
+                    self._chunks_written(chunks)
+            future.add_done_callback(written)
+        self._write_futures.append((future, chunks))
+        return ()
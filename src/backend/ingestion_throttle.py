@@ -0,0 +1,326 @@
+"""
+Ingestion throttling for the RAG-LLM Framework.
+Embedding is CPU-bound and, during large backfills, competes with queries for
+the pod's CPUs. The throttle gives ingestion a budget (a share of the CPUs
+and/or a number of embeddings per second) enforced with token buckets, and
+backs ingestion off further while query latency or the number of queries in
+flight is above a threshold.
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STATE_DISABLED = "disabled"
+STATE_RUNNING = "running"
+STATE_BACKED_OFF = "backed_off"
+
+# Longest single sleep while waiting for tokens, so state changes and
+# cancellation are noticed quickly
+_MAX_WAIT_SECONDS = 0.5
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at ``rate`` tokens per second up to ``capacity``.
+
+    Taking more tokens than are available leaves the bucket in debt, so work
+    larger than the capacity (a big batch, a long embedding call) is admitted
+    once the bucket is non-empty and paid back before the next admission.
+    Not thread-safe; the throttle serializes access.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Most tokens the bucket holds
+        """
+        self.rate = rate
+        self.capacity = max(capacity, 1e-9)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def refill(self, factor: float = 1.0):
+        """
+        Add the tokens accumulated since the last refill.
+
+        Args:
+            factor: Share of ``rate`` to refill at, e.g. while backed off
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate * factor)
+        self._updated = now
+
+    def wait_time(self, factor: float = 1.0) -> float:
+        """
+        Get the seconds until the bucket is non-empty.
+
+        Args:
+            factor: Share of ``rate`` the bucket is refilled at
+
+        Returns:
+            Seconds to wait; 0 if tokens are available, infinite if the bucket is
+            empty and not refilled
+        """
+        if self.tokens > 0:
+            return 0.0
+        if self.rate * factor <= 0:
+            return float("inf")
+        return (1e-9 - self.tokens) / (self.rate * factor)
+
+    def take(self, amount: float):
+        """Remove tokens, possibly going into debt."""
+        self.tokens -= amount
+
+
+class IngestionThrottle:
+    """
+    Process-wide budget for ingestion embedding, shared by all ingestion runs.
+
+    Before embedding a batch, a run waits for both buckets: the embeddings
+    bucket is charged the batch's chunks up front and the CPU bucket is charged
+    the CPU time the batch took afterwards. While the p95 retrieval latency of
+    recent queries exceeds ``max_query_latency_ms`` or more than
+    ``max_queries_in_flight`` queries are running, the buckets refill at
+    ``backoff_factor`` of their rate (0 pauses embedding). Ingestion resumes once
+    it has been backed off for ``min_backoff_seconds`` and the p95 latency is
+    below ``resume_ratio`` of the threshold.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        cpus: float = 1.0,
+        max_cpu_share: float = 0.75,
+        max_embeddings_per_second: float = 0,
+        burst_seconds: float = 2.0,
+        max_query_latency_ms: float = 500,
+        max_queries_in_flight: int = 8,
+        backoff_factor: float = 0.1,
+        resume_ratio: float = 0.8,
+        min_backoff_seconds: float = 5.0,
+        latency_window_seconds: float = 30.0
+    ):
+        """
+        Initialize the throttle.
+
+        Args:
+            enabled: Whether to throttle at all
+            cpus: CPUs the process may use
+            max_cpu_share: Share of ``cpus`` embedding may use on average; 0 for no CPU budget
+            max_embeddings_per_second: Chunks embedded per second on average; 0 for no limit
+            burst_seconds: Seconds of budget that can be used at once after a pause
+            max_query_latency_ms: p95 query retrieval latency above which ingestion
+                backs off; 0 ignores latency
+            max_queries_in_flight: Running queries above which ingestion backs off;
+                0 ignores the number of queries
+            backoff_factor: Share of the budget ingestion keeps while backed off
+            resume_ratio: Share of ``max_query_latency_ms`` the p95 latency must drop
+                below before ingestion resumes
+            min_backoff_seconds: Shortest time ingestion stays backed off
+            latency_window_seconds: Age of the query latencies the p95 is computed over
+        """
+        self.enabled = enabled
+        self.cpus = cpus
+        self.max_cpu_share = max(0.0, max_cpu_share)
+        self.max_embeddings_per_second = max(0.0, max_embeddings_per_second)
+        self.burst_seconds = max(0.1, burst_seconds)
+        self.max_query_latency = max(0.0, max_query_latency_ms) / 1000
+        self.max_queries_in_flight = max(0, max_queries_in_flight)
+        self.backoff_factor = min(1.0, max(0.0, backoff_factor))
+        self.resume_ratio = resume_ratio
+        self.min_backoff_seconds = min_backoff_seconds
+        self.latency_window_seconds = latency_window_seconds
+
+        # Without a CPU budget the bucket allows all CPUs, so backing off still has a rate to reduce
+        cpu_rate = (self.max_cpu_share or 1.0) * cpus
+        self._cpu_bucket = TokenBucket(cpu_rate, cpu_rate * self.burst_seconds)
+        self._embeddings_bucket = (
+            TokenBucket(self.max_embeddings_per_second, self.max_embeddings_per_second * self.burst_seconds)
+            if self.max_embeddings_per_second > 0 else None
+        )
+        self._lock = threading.Lock()
+        self._latencies: Deque[Tuple[float, float]] = deque(maxlen=500)
+        self._in_flight = 0
+        self._backed_off_since: Optional[float] = None
+        self.reason: Optional[str] = None
+        self.backoffs = 0
+        self.throttled_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.embeddings = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], cpus: float = 1.0) -> "IngestionThrottle":
+        """
+        Create a throttle from the ``ingestion.throttle`` config section.
+
+        Args:
+            config: Throttle configuration dictionary
+            cpus: CPUs the process may use, e.g. the cgroup CPU limit
+
+        Returns:
+            A configured IngestionThrottle
+        """
+        enabled = os.environ.get("RAG_INGESTION_THROTTLE", str(config.get("enabled", True)))
+        return cls(
+            enabled=enabled.lower() == "true",
+            cpus=cpus,
+            max_cpu_share=float(os.environ.get("RAG_INGESTION_MAX_CPU_SHARE", config.get("max_cpu_share", 0.75))),
+            max_embeddings_per_second=float(os.environ.get(
+                "RAG_INGESTION_MAX_EMBEDDINGS_PER_SECOND", config.get("max_embeddings_per_second", 0))),
+            burst_seconds=float(config.get("burst_seconds", 2)),
+            max_query_latency_ms=float(config.get("max_query_latency_ms", 500)),
+            max_queries_in_flight=int(config.get("max_queries_in_flight", 8)),
+            backoff_factor=float(config.get("backoff_factor", 0.1)),
+            resume_ratio=float(config.get("resume_ratio", 0.8)),
+            min_backoff_seconds=float(config.get("min_backoff_seconds", 5)),
+            latency_window_seconds=float(config.get("latency_window_seconds", 30))
+        )
+
+    @contextmanager
+    def track_query(self):
+        """Count the enclosed block as a query in flight."""
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def record_query_latency(self, seconds: float):
+        """
+        Add the latency of the part of a query that competes with ingestion for CPU.
+
+        Args:
+            seconds: Latency in seconds
+        """
+        with self._lock:
+            self._latencies.append((time.monotonic(), seconds))
+
+    def _p95_latency(self, now: float) -> Optional[float]:
+        while self._latencies and now - self._latencies[0][0] > self.latency_window_seconds:
+            self._latencies.popleft()
+        if not self._latencies:
+            return None
+        latencies = sorted(latency for _, latency in self._latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def _update_state(self, now: float) -> float:
+        """Back off or resume; returns the share of the budget currently available."""
+        p95 = self._p95_latency(now)
+        reason = None
+        if self.max_query_latency and p95 is not None and p95 > self.max_query_latency:
+            reason = f"p95 query latency {p95 * 1000:.0f}ms above {self.max_query_latency * 1000:.0f}ms"
+        elif self.max_queries_in_flight and self._in_flight > self.max_queries_in_flight:
+            reason = f"{self._in_flight} queries in flight, more than {self.max_queries_in_flight}"
+
+        if self._backed_off_since is None:
+            if reason is not None:
+                self._backed_off_since, self.reason = now, reason
+                self.backoffs += 1
+                logger.warning(f"🐢 Backing off ingestion: {reason}")
+        elif reason is not None:
+            self.reason = reason
+        else:
+            calm = p95 is None or not self.max_query_latency or p95 <= self.max_query_latency * self.resume_ratio
+            if calm and now - self._backed_off_since >= self.min_backoff_seconds:
+                logger.info(f"🐇 Resuming ingestion after {now - self._backed_off_since:.1f}s backed off")
+                self._backed_off_since, self.reason = None, None
+        return self.backoff_factor if self._backed_off_since is not None else 1.0
+
+    def acquire(self, embeddings: int, should_stop: Optional[Callable[[], bool]] = None) -> float:
+        """
+        Wait until the budget allows embedding a batch, and charge its chunks.
+
+        Args:
+            embeddings: Chunks about to be embedded
+            should_stop: Optional function; waiting ends early when it returns True
+
+        Returns:
+            Seconds spent waiting
+        """
+        if not self.enabled:
+            return 0.0
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                factor = self._update_state(time.monotonic())
+                buckets = [bucket for bucket in (self._cpu_bucket, self._embeddings_bucket) if bucket is not None]
+                for bucket in buckets:
+                    bucket.refill(factor)
+                wait = max(bucket.wait_time(factor) for bucket in buckets)
+                if factor <= 0:
+                    wait = float("inf")
+                if wait <= 0:
+                    if self._embeddings_bucket is not None:
+                        self._embeddings_bucket.take(embeddings)
+                    self.embeddings += embeddings
+                    waited = time.monotonic() - start
+                    self.throttled_seconds += waited
+                    return waited
+            if should_stop is not None and should_stop():
+                with self._lock:
+                    self.throttled_seconds += time.monotonic() - start
+                return time.monotonic() - start
+            time.sleep(min(wait, _MAX_WAIT_SECONDS))
+
+    def charge_cpu(self, cpu_seconds: float):
+        """
+        Charge the CPU time an embedding batch used to the CPU budget.
+
+        Args:
+            cpu_seconds: CPU time of the batch; in this process, the embedding
+                thread's CPU time plus the wall time of torch's other intra-op threads
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.cpu_seconds += cpu_seconds
+            if self._cpu_bucket is not None:
+                self._cpu_bucket.take(cpu_seconds)
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get the throttle state and the measurements it is based on.
+
+        Returns:
+            Dictionary with the state and the reason for backing off, the budget,
+            the backoff thresholds, the current p95 query latency and queries in
+            flight, and totals of backoffs, time spent waiting, CPU time charged
+            and embeddings admitted
+        """
+        with self._lock:
+            now = time.monotonic()
+            p95 = self._p95_latency(now)
+            if not self.enabled:
+                state = STATE_DISABLED
+            else:
+                self._update_state(now)
+                state = STATE_BACKED_OFF if self._backed_off_since is not None else STATE_RUNNING
+            return {
+                "state": state,
+                "reason": self.reason,
+                "backed_off_seconds": round(now - self._backed_off_since, 1) if self._backed_off_since else 0.0,
+                "max_cpu_share": self.max_cpu_share,
+                "cpu_seconds_per_second": round(self._cpu_bucket.rate, 2),
+                "max_embeddings_per_second": self.max_embeddings_per_second,
+                "backoff_factor": self.backoff_factor,
+                "max_query_latency_ms": self.max_query_latency * 1000,
+                "max_queries_in_flight": self.max_queries_in_flight,
+                "query_latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                "queries_in_flight": self._in_flight,
+                "backoffs": self.backoffs,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+                "cpu_seconds": round(self.cpu_seconds, 3),
+                "embeddings": self.embeddings
+            }
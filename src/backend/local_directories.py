@@ -0,0 +1,337 @@
+"""
+Local directory ingestion for the RAG-LLM Framework.
+This module ingests the directories configured under data_sources.local_directories
+in config.yaml, at startup and on demand, as background ingestion jobs.
+"""
+import os
+import stat
+import time
+import functools
+import logging
+import concurrent.futures
+from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel
+
+from src.backend.data_ingestion import DataIngestionManager, load_local_file
+from src.backend.directory_state import DirectoryStateStore, FileState, get_directory_state, hash_file
+from src.backend.file_filters import FileFilter, DEFAULT_MAX_FILE_SIZE_KB, DEFAULT_WALK_WORKERS
+from src.backend.ingestion_jobs import IngestionJob, get_job_manager
+from src.backend.ingestion_metrics import StageStats, get_ingestion_metrics
+from src.backend.rag_engine import RAGEngine, get_rag_engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Data Ingestion"])
+
+class LocalDirectory(BaseModel):
+    """Model for a local directory configured for ingestion."""
+    path: str
+    glob: str = "**/*"
+    max_file_size_kb: Optional[int] = DEFAULT_MAX_FILE_SIZE_KB
+    exclude_paths: List[str] = [".git"]
+
+class IngestDirectoriesRequest(BaseModel):
+    """Model for ingesting configured directories; all of them if no paths are given."""
+    paths: Optional[List[str]] = None
+
+def load_local_directories(config: Dict[str, Any]) -> List[LocalDirectory]:
+    """
+    Read the local directories from the ``data_sources`` config section.
+
+    Args:
+        config: The application configuration
+
+    Returns:
+        The configured directories
+    """
+    entries = (config.get("data_sources") or {}).get("local_directories") or []
+    directories = []
+    for entry in entries:
+        try:
+            directories.append(LocalDirectory(**entry))
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring invalid local directory entry {entry}: {str(e)}")
+    return directories
+
+def ingest_local_directory(
+    directory: LocalDirectory,
+    rag_engine: RAGEngine,
+    ingestion_manager: Optional[DataIngestionManager] = None,
+    job: Optional[IngestionJob] = None,
+    paths: Optional[List[str]] = None,
+    state: Optional[DirectoryStateStore] = None
+) -> Dict[str, Any]:
+    """
+    Incrementally ingest a local directory into the RAG system.
+
+    Without ``paths`` the directory is walked in parallel without opening files.
+    With ``paths`` (e.g. from the filesystem watcher) only those files are
+    checked. Files whose mtime and size match the recorded state are skipped
+    without being read. The others are hashed, and only files whose content
+    changed are streamed through the ingestion pipeline. Chunks of deleted files
+    are removed, and the new state is recorded once the vector store is updated.
+
+    Args:
+        directory: The directory to ingest
+        rag_engine: The RAG engine instance
+        ingestion_manager: Optional data ingestion manager
+        job: Optional background job to report progress on
+        paths: Optional paths relative to the directory to check instead of walking it
+        state: Optional state store; defaults to the shared one
+
+    Returns:
+        A dictionary containing the ingestion result for the directory
+
+    Raises:
+        FileNotFoundError: If the directory does not exist
+        IngestionCancelled: If ``job`` was cancelled before ingestion finished
+    """
+    root = os.path.abspath(directory.path)
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f"Directory not found: {root}")
+    ingestion_manager = ingestion_manager or DataIngestionManager()
+    state = state or get_directory_state()
+    file_filter = ingestion_manager.directory_file_filter(
+        directory.glob,
+        FileFilter(max_file_size_kb=directory.max_file_size_kb, exclude_paths=directory.exclude_paths)
+    )
+
+    if job is not None:
+        job.set_phase("syncing")
+    run_started, cpu_started, thread_cpu_started = time.monotonic(), time.process_time(), time.thread_time()
+    stages = StageStats()
+    if paths is None:
+        known = state.load(root, directory.glob)
+        present = dict(file_filter.walk(root))
+        deleted = [p for p in known if p not in present]
+    else:
+        paths = sorted(set(paths))
+        known = state.get(root, directory.glob, paths)
+        present = {}
+        for rel_path in paths:
+            try:
+                file_stat = os.stat(os.path.join(root, rel_path))
+            except OSError:
+                continue
+            if (stat.S_ISREG(file_stat.st_mode) and file_filter.matches_path(rel_path)
+                    and file_filter.matches_size(file_stat.st_size)):
+                present[rel_path] = file_stat
+        # Files that are gone, or no longer pass the filter, are removed
+        deleted = [p for p in paths if p in known and p not in present]
+
+    candidates = {
+        rel_path: file_stat for rel_path, file_stat in present.items()
+        if rel_path not in known
+        or (known[rel_path].mtime_ns, known[rel_path].size) != (file_stat.st_mtime_ns, file_stat.st_size)
+    }
+    with concurrent.futures.ThreadPoolExecutor(max_workers=DEFAULT_WALK_WORKERS) as executor:
+        hashes = dict(zip(candidates, executor.map(lambda p: hash_file(os.path.join(root, p)), candidates)))
+    new_state = {
+        rel_path: FileState(file_stat.st_mtime_ns, file_stat.st_size, hashes[rel_path])
+        for rel_path, file_stat in candidates.items() if hashes[rel_path] is not None
+    }
+    changed = [p for p, file_state in new_state.items() if p not in known or known[p].sha256 != file_state.sha256]
+    # Hashing runs in a thread pool, so only the walk shows up in the stage's CPU time
+    stages.add("sync", busy_seconds=time.monotonic() - run_started, cpu_seconds=time.thread_time() - thread_cpu_started,
+               items=len(candidates), bytes=sum(file_stat.st_size for file_stat in candidates.values()))
+    logger.info(f"📂 {root} ({directory.glob}): {len(present)} files, {len(changed)} changed, {len(deleted)} deleted")
+
+    if job is not None:
+        job.set_totals(len(changed), sum(candidates[p].st_size for p in changed))
+        job.update_progress({"stages": stages.to_dict()})
+        job.set_phase("ingesting")
+    chunk_stats = {"documents": 0, "chunks": 0, "embedded": 0, "skipped": 0, "removed": 0, "sources": []}
+    if changed:
+        chunk_stats = rag_engine.ingest(
+            changed,
+            functools.partial(load_local_file, root, metadata={
+                "source_type": "local_directory",
+                "directory_glob": directory.glob
+            }),
+            cancel_event=job.cancel_event if job is not None else None,
+            on_progress=job.update_progress if job is not None else None
+        )
+
+    if job is not None:
+        job.set_phase("finalizing")
+    # Changed files that no longer load (e.g. became binary) are removed too
+    loaded = set(chunk_stats["sources"])
+    removed = [os.path.join(root, p) for p in deleted]
+    removed.extend(os.path.join(root, p) for p in changed if os.path.join(root, p) not in loaded)
+    if removed:
+        rag_engine.delete_directory_documents(root, directory.glob, removed)
+    pruned = 0
+    if paths is None and not known:
+        # No recorded state: drop chunks left over from files removed before it existed
+        pruned = rag_engine.prune_directory_documents(
+            root, directory.glob, [os.path.join(root, p) for p in present]
+        )
+    state.update(root, directory.glob, new_state, deleted)
+    stages.merge(chunk_stats.get("stages", {}))
+    run_seconds, process_cpu_seconds = time.monotonic() - run_started, time.process_time() - cpu_started
+    get_ingestion_metrics().record(root, directory.glob, stages.to_dict(), run_seconds, process_cpu_seconds)
+
+    logger.info(f"✅ Ingested {chunk_stats['documents']} files from {root}: {chunk_stats['embedded']} chunks embedded, "
+                f"{chunk_stats['skipped']} unchanged, {len(removed)} files removed")
+    return {
+        "path": root,
+        "glob": directory.glob,
+        "status": "success",
+        "message": f"Successfully ingested {chunk_stats['documents']} documents from {root}",
+        "file_count": len(present),
+        "changed_file_count": len(changed),
+        "deleted_file_count": len(deleted),
+        "document_count": chunk_stats["documents"],
+        "chunk_count": chunk_stats["chunks"],
+        "embedded_chunk_count": chunk_stats["embedded"],
+        "unchanged_chunk_count": chunk_stats["skipped"],
+        "pruned_chunk_count": pruned,
+        "seconds": round(run_seconds, 3),
+        "process_cpu_seconds": round(process_cpu_seconds, 3),
+        "stages": stages.to_dict(),
+        "concurrency": chunk_stats.get("concurrency")
+    }
+
+def submit_directory_jobs(directories: List[LocalDirectory], rag_engine: RAGEngine) -> List[Dict[str, Any]]:
+    """
+    Queue an ingestion job per directory.
+
+    Jobs are keyed by directory path and glob, so a directory that is already
+    being ingested returns its active job.
+
+    Args:
+        directories: The directories to ingest
+        rag_engine: The RAG engine instance
+
+    Returns:
+        The jobs, with a ``created`` flag
+    """
+    job_manager = get_job_manager()
+    ingestion_manager = DataIngestionManager()
+    jobs = []
+    for directory in directories:
+        job, created = job_manager.submit(
+            os.path.abspath(directory.path),
+            directory.glob,
+            functools.partial(ingest_local_directory, directory, rag_engine, ingestion_manager)
+        )
+        job_info = job.to_dict()
+        job_info["created"] = created
+        jobs.append(job_info)
+    return jobs
+
+@router.get(
+    "/data/directories",
+    summary="List configured local directories",
+    description="This endpoint returns the local directories configured for ingestion under data_sources.local_directories in config.yaml.",
+    response_description="The configured local directories"
+)
+async def list_local_directories(rag_engine: RAGEngine = Depends(get_rag_engine)) -> Dict[str, Any]:
+    """
+    List the local directories configured for ingestion.
+
+    Returns:
+        The configured directories, whether each one exists, and the watcher status
+    """
+    from src.backend.directory_watcher import get_directory_watcher
+    directories = load_local_directories(rag_engine.config)
+    watcher = get_directory_watcher()
+    return {
+        "directories": [
+            {**directory.dict(), "exists": os.path.isdir(directory.path)}
+            for directory in directories
+        ],
+        "watcher": watcher.get_status() if watcher is not None else None
+    }
+
+@router.post(
+    "/data/directories/ingest",
+    status_code=202,
+    summary="Ingest configured local directories",
+    description="This endpoint queues background ingestion jobs for the local directories configured under data_sources.local_directories. Only configured directories can be ingested. Track the jobs with GET /repos/jobs/{job_id}.",
+    response_description="The submitted ingestion jobs"
+)
+async def ingest_local_directories(
+    request: Optional[IngestDirectoriesRequest] = None,
+    rag_engine: RAGEngine = Depends(get_rag_engine)
+) -> Dict[str, Any]:
+    """
+    Ingest configured local directories in the background.
+
+    Args:
+        request: Optional paths selecting configured directories; all if empty
+        rag_engine: The RAG engine instance
+
+    Returns:
+        Dict[str, Any]: The submitted jobs
+
+    Raises:
+        HTTPException(404): If a requested path is not a configured directory
+    """
+    directories = load_local_directories(rag_engine.config)
+    if request and request.paths:
+        by_path = {os.path.abspath(d.path): d for d in directories}
+        unknown = [p for p in request.paths if os.path.abspath(p) not in by_path]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Not a configured local directory: {', '.join(unknown)}")
+        directories = [by_path[os.path.abspath(p)] for p in request.paths]
+
+    if os.environ.get("RAG_TEST_MODE") == "true":
+        logger.info(f"🧪 Test mode: Simulating ingestion of {len(directories)} local directories")
+        return {"status": "accepted", "message": "Local directory ingestion simulated in test mode", "jobs": []}
+
+    jobs = submit_directory_jobs(directories, rag_engine)
+    created_count = sum(1 for j in jobs if j["created"])
+    return {
+        "status": "accepted",
+        "message": f"Submitted {created_count} ingestion jobs ({len(jobs) - created_count} already active)",
+        "jobs": jobs
+    }
+
+def reset_local_directory_state() -> None:
+    """
+    Forget the recorded state of all local directories, so the next scan
+    re-ingests every file. Called after the vector store is flushed.
+    """
+    try:
+        get_directory_state().clear()
+    except Exception as e:
+        logger.error(f"Error resetting local directory state: {str(e)}")
+
+async def ingest_local_directories_on_startup(rag_engine: RAGEngine) -> None:
+    """
+    Queue ingestion of the configured local directories on startup.
+
+    Disabled by setting data_sources.local_directories_auto_ingest to false.
+    Directories that do not exist are skipped.
+
+    Args:
+        rag_engine: The RAG engine instance
+    """
+    try:
+        if os.environ.get("RAG_TEST_MODE") == "true":
+            logger.info("🧪 Skipping local directory ingestion in test mode")
+            return
+
+        data_sources = rag_engine.config.get("data_sources") or {}
+        if not data_sources.get("local_directories_auto_ingest", True):
+            logger.info("ℹ️ Auto-ingestion of local directories is disabled")
+            return
+
+        directories = []
+        for directory in load_local_directories(rag_engine.config):
+            if os.path.isdir(directory.path):
+                directories.append(directory)
+            else:
+                logger.warning(f"⚠️ Local directory {directory.path} does not exist, skipping")
+        if not directories:
+            logger.info("ℹ️ No local directories to ingest")
+            return
+
+        jobs = submit_directory_jobs(directories, rag_engine)
+        logger.info(f"🚀 Queued ingestion of {len(jobs)} local directories: "
+                    f"{', '.join(job['job_id'] for job in jobs)}")
+    except Exception as e:
+        logger.error(f"❌ Error queuing local directory ingestion: {str(e)}")
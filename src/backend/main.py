@@ -1,14 +1,19 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from pydantic import BaseModel
 import os
 import yaml
 import logging
 from typing import Dict, List, Optional, Any
 import sys
+import json
+import asyncio
+import hashlib
+import tarfile
+import zipfile
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
@@ -17,26 +22,58 @@ sys.path.append(os.path.join(project_root, 'src'))
 
 # Try different import approaches
 try:
-    from src.backend.rag_engine import RAGEngine
+    from src.backend.rag_engine import RAGEngine, get_rag_engine
+    from src.backend.data_ingestion import DataIngestionManager
+    from src.backend.file_filters import FileFilter
     from src.backend.repo_management import router as repo_management_router
-    from src.backend.repo_management import ingest_repositories_on_startup
+    from src.backend.repo_management import ingest_repositories_on_startup, reset_repository_state
+    from src.backend.local_directories import router as local_directories_router
+    from src.backend.local_directories import ingest_local_directories_on_startup, reset_local_directory_state
+    from src.backend.directory_watcher import start_directory_watcher, stop_directory_watcher
+    from src.backend.github_webhook import router as github_webhook_router
+    from src.backend.ingestion_metrics import get_ingestion_metrics
+    from src.backend.request_cancellation import ClientDisconnected, DeadlineExceeded, parse_deadline, run_cancellable
 except ImportError:
     try:
-        from backend.rag_engine import RAGEngine
+        from backend.rag_engine import RAGEngine, get_rag_engine
+        from backend.data_ingestion import DataIngestionManager
+        from backend.file_filters import FileFilter
         from backend.repo_management import router as repo_management_router
-        from backend.repo_management import ingest_repositories_on_startup
+        from backend.repo_management import ingest_repositories_on_startup, reset_repository_state
+        from backend.local_directories import router as local_directories_router
+        from backend.local_directories import ingest_local_directories_on_startup, reset_local_directory_state
+        from backend.directory_watcher import start_directory_watcher, stop_directory_watcher
+        from backend.github_webhook import router as github_webhook_router
+        from backend.ingestion_metrics import get_ingestion_metrics
+        from backend.request_cancellation import ClientDisconnected, DeadlineExceeded, parse_deadline, run_cancellable
     except ImportError:
         try:
             # Relative import
-            from .rag_engine import RAGEngine
+            from .rag_engine import RAGEngine, get_rag_engine
+            from .data_ingestion import DataIngestionManager
+            from .file_filters import FileFilter
             from .repo_management import router as repo_management_router
-            from .repo_management import ingest_repositories_on_startup
+            from .repo_management import ingest_repositories_on_startup, reset_repository_state
+            from .local_directories import router as local_directories_router
+            from .local_directories import ingest_local_directories_on_startup, reset_local_directory_state
+            from .directory_watcher import start_directory_watcher, stop_directory_watcher
+            from .github_webhook import router as github_webhook_router
+            from .ingestion_metrics import get_ingestion_metrics
+            from .request_cancellation import ClientDisconnected, DeadlineExceeded, parse_deadline, run_cancellable
         except ImportError:
             # Last resort - direct import
             sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-            from rag_engine import RAGEngine
+            from rag_engine import RAGEngine, get_rag_engine
+            from data_ingestion import DataIngestionManager
+            from file_filters import FileFilter
             from repo_management import router as repo_management_router
-            from repo_management import ingest_repositories_on_startup
+            from repo_management import ingest_repositories_on_startup, reset_repository_state
+            from local_directories import router as local_directories_router
+            from local_directories import ingest_local_directories_on_startup, reset_local_directory_state
+            from directory_watcher import start_directory_watcher, stop_directory_watcher
+            from github_webhook import router as github_webhook_router
+            from ingestion_metrics import get_ingestion_metrics
+            from request_cancellation import ClientDisconnected, DeadlineExceeded, parse_deadline, run_cancellable
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -72,9 +109,6 @@ except Exception as e:
             "host": "0.0.0.0",
             "port": 8000,
             "cors_origins": ["*"]
-        },
-        "ingestion": {
-            "threads": int(os.environ.get("RAG_INGESTION_THREADS", "0"))  # 0 means auto-detect
         }
     }
 
@@ -124,7 +158,14 @@ except ImportError:
     except ImportError:
         from chat_router import router as chat_router
 
+# Share the application's RAG engine with the routers so that conversations,
+# circuit breaker state and in-flight queries are not tied to a per-request engine
+if rag_engine is not None:
+    app.dependency_overrides[get_rag_engine] = lambda: rag_engine
+
 app.include_router(repo_management_router, tags=["Repository Management"])
+app.include_router(github_webhook_router, tags=["Repository Management"])
+app.include_router(local_directories_router, tags=["Data Ingestion"])
 app.include_router(chat_router, prefix="/chat", tags=["Chat"])
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -167,6 +208,51 @@ async def health_check():
     """
     return {"status": "healthy", "version": "1.0.0"}
 
+@app.get(
+    "/status",
+    tags=["System"],
+    summary="Backend Status",
+    description="Returns the runtime status of the RAG engine, including the state of the LLM circuit breaker.",
+    response_description="Runtime status of the RAG engine and its LLM backend"
+)
+async def status():
+    """
+    Status endpoint reporting the state of the LLM backend.
+    
+    The overall status is "degraded" while the LLM circuit breaker is not closed,
+    meaning queries are answered without generation.
+    
+    Returns:
+        dict: Overall status and the RAG engine's LLM status
+    """
+    if rag_engine is None:
+        raise HTTPException(status_code=500, detail="RAG engine not initialized")
+    
+    llm_status = rag_engine.get_status()
+    overall = "ok" if llm_status["circuit_breaker"]["state"] == "closed" else "degraded"
+    return {"status": overall, "llm": llm_status}
+
+@app.get(
+    "/metrics",
+    tags=["System"],
+    summary="Prometheus Metrics",
+    description="Returns ingestion metrics in the Prometheus text format: per repository and stage (sync, walk, load, split, embed, write) the busy, CPU, idle and blocked seconds and the items and bytes processed, and the number, wall time and process CPU time of finished runs.",
+    response_class=PlainTextResponse,
+    response_description="Metrics in the Prometheus text exposition format"
+)
+async def metrics():
+    """
+    Metrics endpoint for Prometheus scraping.
+    
+    The counters add up all ingestion runs since the process started. Comparing
+    the busy and CPU seconds of the stages shows which stage bounds ingestion and
+    how many CPUs it uses.
+    
+    Returns:
+        PlainTextResponse: The metrics in the Prometheus text exposition format
+    """
+    return PlainTextResponse(get_ingestion_metrics().render(), media_type="text/plain; version=0.0.4")
+
 class QueryRequest(BaseModel):
     query: str
     max_tokens: Optional[int] = None
@@ -175,6 +261,8 @@ class QueryRequest(BaseModel):
 class QueryResponse(BaseModel):
     response: str
     sources: List[Dict[str, Any]]
+    degraded: bool = False
+    route: Optional[str] = None
 
 @app.post(
     "/query",
@@ -184,7 +272,7 @@ class QueryResponse(BaseModel):
     description="This endpoint processes a query using the RAG-enhanced LLM system. It retrieves relevant context from the vector database and uses it to generate a more informed response.",
     response_description="The LLM response enhanced with relevant context from the vector database"
 )
-async def query(request_data: QueryRequest):
+async def query(request_data: QueryRequest, request: Request):
     """
     Query the RAG-LLM system with a natural language question or prompt.
     
@@ -194,18 +282,24 @@ async def query(request_data: QueryRequest):
     3. Uses the retrieved documents as context for the LLM
     4. Returns the LLM's response along with the source documents used
     
+    If the client disconnects, retrieval and generation are cancelled. An optional
+    X-Request-Deadline header (Unix timestamp in seconds) stops the query early.
+    
     Parameters:
         request_data (QueryRequest): The query request containing:
             - query (str): The question or prompt to send to the RAG system
             - max_tokens (int, optional): Maximum number of tokens to generate
             - temperature (float, optional): Controls randomness in the response
+        request (Request): The HTTP request, watched for disconnects and deadlines
     
     Returns:
         QueryResponse: The LLM's response and the source documents used as context
     
     Raises:
         HTTPException(400): If the query text is missing
+        HTTPException(499): If the client disconnected before the response was ready
         HTTPException(500): If there's an error processing the query
+        HTTPException(504): If the request deadline was exceeded
     """
     if rag_engine is None:
         raise HTTPException(status_code=500, detail="RAG engine not initialized")
@@ -237,8 +331,16 @@ async def query(request_data: QueryRequest):
         if request_data.temperature is not None:
             kwargs["temperature"] = request_data.temperature
         
-        result = rag_engine.query(query_text, **kwargs)
+        deadline = parse_deadline(request)
+        result = await run_cancellable(request, rag_engine.aquery(query_text, deadline=deadline, **kwargs))
         return result
+    except HTTPException:
+        raise
+    except ClientDisconnected:
+        logger.info("Client disconnected, query cancelled")
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="Request deadline exceeded")
     except Exception as e:
         logger.error(f"Error processing query: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -251,6 +353,28 @@ class IngestRequest(BaseModel):
 class IngestResponse(BaseModel):
     status: str
     message: str
+    document_count: int = 0
+    chunk_count: int = 0
+    embedded_chunk_count: int = 0
+    unchanged_chunk_count: int = 0
+    skipped_file_count: int = 0
+    skipped_files: List[str] = []
+
+TEXT_SOURCE_TYPES = {"text": ".txt", "markdown": ".md", "code": ""}
+MAX_REPORTED_SKIPPED_FILES = 100
+
+def _ingest_response(stats: Dict[str, Any], skipped_files: List[str], what: str) -> Dict[str, Any]:
+    return {
+        "status": "success",
+        "message": f"Successfully ingested {stats['documents']} {what} ({stats['embedded']} chunks embedded, "
+                   f"{stats['skipped']} unchanged)",
+        "document_count": stats["documents"],
+        "chunk_count": stats["chunks"],
+        "embedded_chunk_count": stats["embedded"],
+        "unchanged_chunk_count": stats["skipped"],
+        "skipped_file_count": len(skipped_files),
+        "skipped_files": skipped_files[:MAX_REPORTED_SKIPPED_FILES]
+    }
 
 class IngestedDataResponse(BaseModel):
     status: str
@@ -268,8 +392,8 @@ class IngestedDocumentsResponse(BaseModel):
     response_model=IngestResponse,
     tags=["Data Ingestion"],
     summary="Ingest free-form data into the RAG system",
-    description="This endpoint allows ingestion of free-form text or document data into the RAG system. The data will be processed, embedded, and stored in the vector database for retrieval during queries.",
-    response_description="Confirmation of data ingestion initiation"
+    description="This endpoint allows ingestion of free-form text, markdown or code into the RAG system. The data is split, embedded and stored in the vector database through the same batched pipeline as repositories, and is available for retrieval when the request returns.",
+    response_description="Result of the data ingestion"
 )
 async def ingest_data(ingest_data: IngestRequest):
     if rag_engine is None:
@@ -279,15 +403,88 @@ async def ingest_data(ingest_data: IngestRequest):
         source_data = ingest_data.source_data
         if not source_type or not source_data:
             raise HTTPException(status_code=400, detail="Source type and data are required")
+        if source_type not in TEXT_SOURCE_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unsupported source type: {source_type}. "
+                                f"Use one of {', '.join(TEXT_SOURCE_TYPES)}, or /data/upload for files")
         if os.environ.get("RAG_TEST_MODE") == "true":
             logger.info(f"Test mode: Simulating ingestion of data type {source_type}")
-            return {"status": "success", "message": "Data ingestion simulated in test mode"}
+            return {"status": "success", "message": "Data ingestion simulated in test mode", "document_count": 1}
         logger.info(f"Ingesting data of type {source_type}")
-        return {"status": "success", "message": "Data ingestion started"}
+        
+        metadata = dict(ingest_data.metadata or {})
+        # Without an explicit source the content hash identifies the text, so
+        # posting the same text again does not duplicate it
+        metadata.setdefault("source", f"{source_type}:{hashlib.sha256(source_data.encode('utf-8')).hexdigest()[:16]}")
+        metadata.setdefault("source_type", source_type)
+        if TEXT_SOURCE_TYPES[source_type]:
+            metadata.setdefault("file_type", TEXT_SOURCE_TYPES[source_type])
+        documents = DataIngestionManager().ingest_text(source_data, metadata)
+        
+        stats = await asyncio.to_thread(rag_engine.ingest, documents)
+        return _ingest_response(stats, [], "documents")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error ingesting data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post(
+    "/data/upload",
+    response_model=IngestResponse,
+    tags=["Data Ingestion"],
+    summary="Upload files or archives into the RAG system",
+    description="This endpoint ingests uploaded text files and .tar.gz/.tgz/.tar/.zip archives of text files. Archives are unpacked member by member without extracting them to disk, and every file goes through the same batched split/embed/upsert pipeline as repositories. Binary files and files larger than max_file_size_kb are skipped.",
+    response_description="Result of the upload ingestion"
+)
+async def upload_data(
+    files: List[UploadFile] = File(..., description="Text files or .tar.gz/.tgz/.tar/.zip archives"),
+    metadata: Optional[str] = Form(None, description="JSON object added to the metadata of every document"),
+    file_extensions: Optional[str] = Form(None, description="Comma-separated extensions to ingest from archives, e.g. .md,.txt"),
+    max_file_size_kb: Optional[int] = Form(None, description="Largest file to ingest in KB (default 1024)")
+):
+    if rag_engine is None:
+        raise HTTPException(status_code=500, detail="RAG engine not initialized")
+    try:
+        extra_metadata = json.loads(metadata) if metadata else {}
+        if not isinstance(extra_metadata, dict):
+            raise ValueError("metadata must be a JSON object")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid metadata: {str(e)}")
+    
+    if os.environ.get("RAG_TEST_MODE") == "true":
+        logger.info(f"Test mode: Simulating ingestion of {len(files)} uploaded files")
+        return {"status": "success", "message": "Upload ingestion simulated in test mode", "document_count": len(files)}
+    
+    try:
+        file_filter = FileFilter(
+            extensions=[ext.strip() for ext in file_extensions.split(",") if ext.strip()] if file_extensions else None,
+            **({"max_file_size_kb": max_file_size_kb} if max_file_size_kb is not None else {})
+        )
+        ingestion_manager = DataIngestionManager()
+        skipped_files: List[str] = []
+        
+        def iter_documents():
+            for upload in files:
+                yield from ingestion_manager.iter_upload_documents(
+                    upload.file,
+                    upload.filename or "upload",
+                    metadata=extra_metadata,
+                    file_filter=file_filter,
+                    skipped=skipped_files
+                )
+        
+        logger.info(f"Ingesting {len(files)} uploaded files")
+        stats = await asyncio.to_thread(rag_engine.ingest, iter_documents())
+        if skipped_files:
+            logger.info(f"⏭️ Skipped {len(skipped_files)} binary or oversized uploaded files")
+        return _ingest_response(stats, skipped_files, "files")
+    except (tarfile.TarError, zipfile.BadZipFile) as e:
+        logger.error(f"Error reading uploaded archive: {e}")
+        raise HTTPException(status_code=400, detail=f"Invalid archive: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error ingesting uploaded data: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get(
     "/data/ingested",
     response_model=IngestedDataResponse,
@@ -387,6 +584,10 @@ async def flush_database():
     
     try:
         success = rag_engine.flush_vector_store()
+        if success:
+            # Recorded file and commit state no longer matches the empty store
+            reset_local_directory_state()
+            reset_repository_state()
         
         return {
             "status": "success" if success else "error",
@@ -495,15 +696,29 @@ async def startup_event():
     if rag_engine is not None:
         try:
             logger.info("🚀 Starting repository ingestion on startup")
-            thread_count = os.environ.get("RAG_INGESTION_THREADS", "auto")
-            logger.info(f"🧵 Using thread configuration: {thread_count}")
-            
             await ingest_repositories_on_startup(rag_engine)
             
             logger.info("✅ Repository ingestion on startup completed successfully")
             logger.info("📚 RAG system is ready to use with the latest repository data")
         except Exception as e:
             logger.error(f"❌ Error during startup repository ingestion: {e}")
+        
+        await ingest_local_directories_on_startup(rag_engine)
+        try:
+            start_directory_watcher(rag_engine)
+        except Exception as e:
+            logger.error(f"❌ Error starting the local directory watcher: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Write and persist pending vector store updates before exiting."""
+    stop_directory_watcher()
+    if rag_engine is not None and getattr(rag_engine, "vector_writer", None) is not None:
+        try:
+            await asyncio.to_thread(rag_engine.vector_writer.flush, True, 30)
+            logger.info("💾 Flushed pending vector store writes")
+        except Exception as e:
+            logger.error(f"❌ Error flushing vector store writes on shutdown: {e}")
 
 if __name__ == "__main__":
     import uvicorn
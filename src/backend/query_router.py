@@ -0,0 +1,260 @@
+"""
+Query pre-routing for the RAG-LLM Framework.
+Decides before retrieval whether a query needs the knowledge base at all.
+"""
+import os
+import re
+import time
+import logging
+import threading
+from typing import List, Dict, Any, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROUTE_RAG = "rag"
+ROUTE_NO_RETRIEVAL = "no_retrieval"
+ROUTE_CANNED = "canned"
+
+GREETING_RESPONSE = ("Hello! I can answer questions about the documentation and code in our "
+                     "knowledge base. What would you like to know?")
+THANKS_RESPONSE = "You're welcome! Let me know if there is anything else I can help with."
+CAPABILITIES_RESPONSE = (
+    "I'm an assistant backed by a knowledge base of our GitHub repositories and documentation. "
+    "I can answer questions about the code, explain how components work, point you to relevant "
+    "files and summarize documentation. Ask me a question in plain language to get started."
+)
+
+GREETING_PATTERN = re.compile(
+    r"^(hi|hello|hey|hiya|howdy|yo|greetings|good (morning|afternoon|evening|day))"
+    r"( there| all| everyone| team| bot)?[\s!.,:)]*$", re.IGNORECASE)
+THANKS_PATTERN = re.compile(
+    r"^(thanks|thank you|thx|ty|cheers|much appreciated|thanks a lot|thank you so much|great,? thanks)"
+    r"( so much| a lot| again)?[\s!.,:)]*$", re.IGNORECASE)
+CAPABILITIES_PATTERN = re.compile(
+    r"^(help|what can you do|what do you do|who are you|what are you|how can you help( me)?|"
+    r"what can i ask( you)?|what are your capabilities)[\s?!.]*$", re.IGNORECASE)
+# Only whole messages that refer back to the previous answer; "summarize the
+# deployment guide" or "explain that error: ..." still need the knowledge base
+NO_RETRIEVAL_PATTERN = re.compile(
+    r"^((can|could|would) you |please )*(rephrase|reword|shorten|simplify|summari[sz]e|explain|"
+    r"clarify|repeat|say|make) (that|it|this|your (last |previous )?(answer|response|reply))"
+    r"( again| shorter| simpler| more simply| in simpler terms| in plain english| briefly)?"
+    r"( please)?[\s?!.]*$", re.IGNORECASE)
+
+# Canned prototypes are grouped by the response they get
+CANNED_RESPONSES = {
+    "greeting": GREETING_RESPONSE,
+    "thanks": THANKS_RESPONSE,
+    "capabilities": CAPABILITIES_RESPONSE
+}
+
+CLASSIFIER_PROTOTYPES = {
+    "greeting": ["hello", "hi there", "good morning"],
+    "thanks": ["thanks", "thank you very much"],
+    "capabilities": ["what can you do", "who are you", "how can you help me"],
+    ROUTE_NO_RETRIEVAL: [
+        "rephrase that", "summarize your last answer", "make that shorter",
+        "explain that more simply", "tell me a joke"
+    ],
+    ROUTE_RAG: [
+        "how do I configure the ingestion threads", "where is the vector store initialized",
+        "what does the repository management endpoint do", "how is authentication handled in the service",
+        "explain the deployment architecture"
+    ]
+}
+
+
+class RouteDecision:
+    """
+    Result of routing a query.
+    """
+
+    def __init__(self, route: str, reason: str, canned_response: Optional[str] = None):
+        """
+        Initialize a route decision.
+
+        Args:
+            route: One of 'rag', 'no_retrieval' or 'canned'
+            reason: Rule or classifier that produced the decision
+            canned_response: Response text for the canned route
+        """
+        self.route = route
+        self.reason = reason
+        self.canned_response = canned_response
+
+
+class QueryRouter:
+    """
+    Fast pre-routing stage that picks canned, no-retrieval or full RAG handling.
+
+    Short messages are matched against rules first. An optional nearest-prototype
+    classifier on the query embedding handles the rest. Anything not confidently
+    classified goes through full RAG.
+    """
+
+    def __init__(
+        self,
+        embeddings=None,
+        enabled: bool = True,
+        max_rule_words: int = 12,
+        classifier_enabled: bool = False,
+        classifier_threshold: float = 0.75
+    ):
+        """
+        Initialize the query router.
+
+        Args:
+            embeddings: Embeddings model used by the optional classifier
+            enabled: Whether routing is enabled; if not every query uses RAG
+            max_rule_words: Longest message, in words, that rules are applied to
+            classifier_enabled: Whether to use the embedding classifier
+            classifier_threshold: Minimum cosine similarity for a classifier decision
+        """
+        self.enabled = enabled
+        self.max_rule_words = max_rule_words
+        self.embeddings = embeddings
+        self.classifier_enabled = classifier_enabled and embeddings is not None
+        self.classifier_threshold = classifier_threshold
+        self._prototypes = None
+
+        self._lock = threading.Lock()
+        self._stats = {
+            route: {"count": 0, "total_latency": 0.0, "max_latency": 0.0}
+            for route in (ROUTE_RAG, ROUTE_NO_RETRIEVAL, ROUTE_CANNED)
+        }
+        self._routing_time = 0.0
+        self._routed = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], embeddings=None) -> "QueryRouter":
+        """
+        Create a query router from the ``query_routing`` config section.
+
+        Args:
+            config: Query routing configuration dictionary
+            embeddings: Embeddings model used by the optional classifier
+
+        Returns:
+            A configured QueryRouter
+        """
+        classifier_config = config.get("classifier", {})
+        enabled = os.environ.get("RAG_QUERY_ROUTING_ENABLED", str(config.get("enabled", True)))
+        return cls(
+            embeddings=embeddings,
+            enabled=enabled.lower() == "true",
+            max_rule_words=int(config.get("max_rule_words", 12)),
+            classifier_enabled=bool(classifier_config.get("enabled", False)),
+            classifier_threshold=float(classifier_config.get("threshold", 0.75))
+        )
+
+    def route(self, query_text: str) -> RouteDecision:
+        """
+        Decide how a query should be handled.
+
+        Args:
+            query_text: The raw user query
+
+        Returns:
+            The route decision
+        """
+        if not self.enabled:
+            return RouteDecision(ROUTE_RAG, "routing_disabled")
+
+        start = time.monotonic()
+        decision = self._route_by_rules(query_text)
+        if decision is None and self.classifier_enabled:
+            decision = self._route_by_classifier(query_text)
+        if decision is None:
+            decision = RouteDecision(ROUTE_RAG, "default")
+
+        with self._lock:
+            self._routing_time += time.monotonic() - start
+            self._routed += 1
+        return decision
+
+    def _route_by_rules(self, query_text: str) -> Optional[RouteDecision]:
+        text = " ".join(query_text.strip().split())
+        if not text or len(text.split()) > self.max_rule_words:
+            return None
+        if GREETING_PATTERN.match(text):
+            return RouteDecision(ROUTE_CANNED, "rule:greeting", GREETING_RESPONSE)
+        if THANKS_PATTERN.match(text):
+            return RouteDecision(ROUTE_CANNED, "rule:thanks", THANKS_RESPONSE)
+        if CAPABILITIES_PATTERN.match(text):
+            return RouteDecision(ROUTE_CANNED, "rule:capabilities", CAPABILITIES_RESPONSE)
+        if NO_RETRIEVAL_PATTERN.match(text):
+            return RouteDecision(ROUTE_NO_RETRIEVAL, "rule:conversational")
+        return None
+
+    def _load_prototypes(self) -> Dict[str, List[List[float]]]:
+        if self._prototypes is None:
+            self._prototypes = {
+                label: [self._normalize(vector) for vector in self.embeddings.embed_documents(examples)]
+                for label, examples in CLASSIFIER_PROTOTYPES.items()
+            }
+        return self._prototypes
+
+    @staticmethod
+    def _normalize(vector) -> List[float]:
+        vector = [float(value) for value in vector]
+        norm = sum(value * value for value in vector) ** 0.5 or 1.0
+        return [value / norm for value in vector]
+
+    def _route_by_classifier(self, query_text: str) -> Optional[RouteDecision]:
+        try:
+            prototypes = self._load_prototypes()
+            query_vector = self._normalize(self.embeddings.embed_query(query_text))
+        except Exception as e:
+            logger.warning(f"Query classifier unavailable, using full RAG: {str(e)}")
+            return None
+
+        best_label, best_score = ROUTE_RAG, -1.0
+        for label, vectors in prototypes.items():
+            for vector in vectors:
+                score = sum(a * b for a, b in zip(query_vector, vector))
+                if score > best_score:
+                    best_label, best_score = label, score
+
+        if best_label == ROUTE_RAG or best_score < self.classifier_threshold:
+            return None
+        if best_label in CANNED_RESPONSES:
+            return RouteDecision(ROUTE_CANNED, f"classifier:{best_label}:{best_score:.2f}", CANNED_RESPONSES[best_label])
+        return RouteDecision(best_label, f"classifier:{best_score:.2f}")
+
+    def record(self, route: str, latency: float):
+        """
+        Record the end-to-end latency of a routed query.
+
+        Args:
+            route: The route the query took
+            latency: Query latency in seconds
+        """
+        with self._lock:
+            stats = self._stats[route]
+            stats["count"] += 1
+            stats["total_latency"] += latency
+            stats["max_latency"] = max(stats["max_latency"], latency)
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get per-route counts and latency.
+
+        Returns:
+            Dictionary with routing configuration and per-route statistics
+        """
+        with self._lock:
+            routes = {}
+            for route, stats in self._stats.items():
+                count = stats["count"]
+                routes[route] = {
+                    "count": count,
+                    "avg_latency_ms": round(stats["total_latency"] / count * 1000, 2) if count else 0.0,
+                    "max_latency_ms": round(stats["max_latency"] * 1000, 2)
+                }
+            return {
+                "enabled": self.enabled,
+                "classifier_enabled": self.classifier_enabled,
+                "avg_routing_ms": round(self._routing_time / self._routed * 1000, 3) if self._routed else 0.0,
+                "routes": routes
+            }
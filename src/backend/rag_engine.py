@@ -3,21 +3,42 @@ RAG Engine implementation using LangChain and Ollama.
 """
 import os
 import uuid
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Callable, Set
 import logging
+import httpx
 from langchain_ollama import OllamaLLM
-from langchain.chains import RetrievalQA
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import TextLoader, UnstructuredMarkdownLoader
 from langchain.schema import Document
 from .model_storage import ModelStorage
+from .circuit_breaker import CircuitBreaker
+from .request_cancellation import DeadlineExceeded, remaining_time
+from .reranker import CrossEncoderReranker
+from .chunking import split_documents, DocumentSplitter
+from .ingestion_pipeline import IngestionPipeline, IngestionCancelled
+from .vector_writer import VectorStoreWriter
+from .ingestion_metrics import StageStats
+from .ingestion_concurrency import ConcurrencyController
+from .ingestion_throttle import IngestionThrottle
+from .embedding_cache import EmbeddingCache
+from .query_router import QueryRouter, RouteDecision, ROUTE_CANNED, ROUTE_NO_RETRIEVAL, ROUTE_RAG
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+RAG_PROMPT_TEMPLATE = """Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+{context}
+
+Question: {question}
+Helpful Answer:"""
+
 class Conversation:
     """
     Class for managing a conversation with conversation history.
@@ -88,24 +109,59 @@ class RAGEngine:
                 - embeddings_model: HuggingFace embeddings model to use
                 - vector_db_path: Path to store the vector database
                 - storage: Model storage configuration (optional)
+                - resilience: LLM timeout and circuit breaker configuration (optional)
+                - reranking: Cross-encoder reranking configuration (optional)
+                - retrieval: Top-k, score threshold and adaptive-k configuration (optional)
+                - query_routing: Query pre-routing configuration (optional)
         """
         self.config = config
         self.llm = None
         self.embeddings = None
+        self.embedding_cache = None
+        self.splitter = DocumentSplitter.from_config(self.config.get("ingestion", {}).get("chunking", {}))
         self.vector_store = None
-        self.qa_chain = None
+        self.vector_writer = None
+        self.reranker = None
+        self.query_router = None
         self.model_storage = None
         self.conversations = {}
         
+        resilience_config = self.config.get("resilience", {})
+        self.connect_timeout = float(os.environ.get(
+            "OLLAMA_CONNECT_TIMEOUT", resilience_config.get("connect_timeout", 5)))
+        self.read_timeout = float(os.environ.get(
+            "OLLAMA_READ_TIMEOUT", resilience_config.get("read_timeout", 120)))
+        self.circuit_breaker = CircuitBreaker.from_config(
+            resilience_config.get("circuit_breaker", {}))
+        
+        retrieval_config = self.config.get("retrieval", {})
+        self.retrieval_k = int(retrieval_config.get("k", 4))
+        self.retrieval_fetch_k = max(int(retrieval_config.get("fetch_k", self.retrieval_k)), self.retrieval_k)
+        # No threshold unless configured; Chroma's L2 relevance scores can be negative
+        score_threshold = os.environ.get("RAG_SCORE_THRESHOLD", retrieval_config.get("score_threshold"))
+        self.score_threshold = float(score_threshold) if score_threshold not in (None, "") else None
+        self.adaptive_k = bool(retrieval_config.get("adaptive_k", False))
+        self.max_score_drop = float(retrieval_config.get("max_score_drop", 0.15))
+        self.min_k = int(retrieval_config.get("min_k", 1))
+        
         if "storage" in self.config:
             self.model_storage = ModelStorage(self.config)
             logger.info("Initialized model storage with type: " + 
                        self.model_storage.storage_type)
         
         self._initialize_llm()
+        # Size ingestion from the container's limits before torch starts its thread pool
+        self.concurrency = ConcurrencyController.from_config(self.config.get("ingestion", {}).get("concurrency", {}))
+        self.concurrency.apply_torch_threads()
+        self.ingestion_throttle = IngestionThrottle.from_config(
+            self.config.get("ingestion", {}).get("throttle", {}), self.concurrency.cpus)
         self._initialize_embeddings()
+        self._initialize_embedding_cache()
         self._initialize_vector_store()
-        self._initialize_qa_chain()
+        self.vector_writer = VectorStoreWriter.from_config(
+            self.vector_store, self.config.get("ingestion", {}).get("writer", {}))
+        self._initialize_reranker()
+        self.query_router = QueryRouter.from_config(self.config.get("query_routing", {}), self.embeddings)
         
     def _initialize_llm(self):
         """Initialize the LLM using Ollama."""
@@ -116,22 +172,36 @@ class RAGEngine:
             if self.model_storage and self.model_storage.storage_type == "cloud":
                 model_path = self.model_storage.get_model_path(model_name)
                 logger.info(f"Using model from cloud storage: {model_path}")
-                
-                self.llm = OllamaLLM(
-                    model=model_name,
-                    base_url=base_url,
-                )
-            else:
-                self.llm = OllamaLLM(
-                    model=model_name,
-                    base_url=base_url,
-                )
             
-            logger.info(f"Initialized LLM with model: {model_name}")
+            self.llm = self._create_llm(model_name, base_url)
+            
+            logger.info(f"Initialized LLM with model: {model_name} "
+                        f"(connect timeout: {self.connect_timeout}s, read timeout: {self.read_timeout}s)")
         except Exception as e:
             logger.error(f"Error initializing LLM: {str(e)}")
             raise
     
+    def _create_llm(self, model_name: str, base_url: str, **llm_kwargs) -> OllamaLLM:
+        """
+        Create an Ollama LLM client with the configured connect and read timeouts.
+        
+        Args:
+            model_name: Name of the Ollama model
+            base_url: Base URL for the Ollama API
+            **llm_kwargs: Extra generation parameters such as temperature
+            
+        Returns:
+            OllamaLLM instance
+        """
+        return OllamaLLM(
+            model=model_name,
+            base_url=base_url,
+            client_kwargs={
+                "timeout": httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+            },
+            **llm_kwargs
+        )
+    
     def _initialize_embeddings(self):
         """Initialize the embeddings model."""
         try:
@@ -143,6 +213,20 @@ class RAGEngine:
             logger.error(f"Error initializing embeddings: {str(e)}")
             raise
     
+    def _initialize_embedding_cache(self):
+        """Initialize the optional persistent embedding cache."""
+        try:
+            self.embedding_cache = EmbeddingCache.from_config(
+                self.config.get("ingestion", {}).get("embedding_cache", {}),
+                self.config.get("embeddings_model", "all-MiniLM-L6-v2")
+            )
+            if self.embedding_cache:
+                logger.info(f"Initialized embedding cache at {self.embedding_cache.path} "
+                            f"({self.embedding_cache.entries} cached embeddings)")
+        except Exception as e:
+            logger.warning(f"Could not initialize embedding cache, embedding without it: {str(e)}")
+            self.embedding_cache = None
+    
     def _initialize_vector_store(self):
         """Initialize or load the vector store."""
         vector_db_path = self.config.get("vector_db_path", "./chroma_db")
@@ -156,7 +240,8 @@ class RAGEngine:
             self.vector_store = Chroma(
                 persist_directory=vector_db_path,
                 collection_name=collection_name,
-                embedding_function=self.embeddings
+                embedding_function=self.embeddings,
+                collection_metadata={"hnsw:space": "cosine"}
             )
             logger.info(f"Loaded vector store from {vector_db_path}")
         except Exception as e:
@@ -171,67 +256,212 @@ class RAGEngine:
             self.vector_store = Chroma(
                 persist_directory=vector_db_path,
                 collection_name=collection_name,
-                embedding_function=self.embeddings
+                embedding_function=self.embeddings,
+                collection_metadata={"hnsw:space": "cosine"}
             )
             self.vector_store.persist()
     
-    def _initialize_qa_chain(self):
-        """Initialize the QA chain."""
+    def _initialize_reranker(self):
+        """Initialize the optional cross-encoder reranker."""
         try:
-            self.qa_chain = RetrievalQA.from_chain_type(
-                llm=self.llm,
-                chain_type="stuff",
-                retriever=self.vector_store.as_retriever(),
-                return_source_documents=True
-            )
-            logger.info("Initialized QA chain")
+            self.reranker = CrossEncoderReranker.from_config(self.config.get("reranking", {}))
         except Exception as e:
-            logger.error(f"Error initializing QA chain: {str(e)}")
-            raise
+            logger.warning(f"Could not initialize reranker, using vector order: {str(e)}")
+            self.reranker = None
     
-    def add_documents(self, documents: List[Document]):
+    def add_documents(self, documents: List[Document]) -> Dict[str, Any]:
         """
         Add documents to the vector store.
         
+        Chunks get deterministic IDs derived from their source, position and
+        content hash and are upserted, so re-ingesting a document replaces its
+        chunks instead of appending copies. Chunks whose ID is already stored
+        are not embedded again. Stale chunks of the same sources (for example
+        from a file that got shorter) are removed.
+        
         Args:
             documents: List of LangChain Document objects
-        """
-        try:
-            logger.info(f"📊 Processing {len(documents)} documents for database ingestion")
             
-            sources = {}
-            for doc in documents:
-                source = doc.metadata.get("source", "unknown")
-                if source not in sources:
-                    sources[source] = 0
-                sources[source] += 1
+        Returns:
+            Dictionary with the number of chunks, embedded chunks, skipped
+            unchanged chunks and removed stale chunks
+        """
+        logger.info(f"📊 Processing {len(documents)} documents for database ingestion")
+        return self.ingest(documents)
+    
+    def ingest(
+        self,
+        items: Iterable[Any],
+        loader: Optional[Callable[[Any], Optional[Document]]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+        on_file_written: Optional[Callable[[str, List[str]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Stream documents through the ingestion pipeline into the vector store.
+        
+        Loading, splitting, embedding and writing run concurrently in bounded
+        stages configured by the ``ingestion.pipeline`` config section, so memory
+        use does not grow with the number of documents. Writes go through the
+        shared vector store writer, which persists on its own schedule.
+        
+        Args:
+            items: Documents, or items such as file paths that ``loader`` turns
+                into Documents. Consumed lazily
+            loader: Optional function loading an item; returning None skips it
+            cancel_event: Optional event that stops ingestion when set
+            on_progress: Optional callback receiving the pipeline counters as they change
+            on_file_written: Optional callback receiving a source and its chunk IDs
+                once all of its chunks are stored, e.g. to checkpoint progress
             
-            for source, count in sources.items():
-                logger.info(f"📁 Found {count} documents from source: {source}")
+        Returns:
+            Dictionary with files, documents, bytes, chunks, embedded, skipped and
+            removed counts and the list of loaded sources
             
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200
+        Raises:
+            IngestionCancelled: If ``cancel_event`` was set before ingestion finished
+        """
+        try:
+            pipeline = IngestionPipeline.from_config(
+                self,
+                self.config.get("ingestion", {}).get("pipeline", {}),
+                embeddings_model=self.config.get("embeddings_model", "all-MiniLM-L6-v2"),
+                controller=self.concurrency,
+                throttle=self.ingestion_throttle
+            )
+            stats = pipeline.run(
+                items, loader, cancel_event=cancel_event, on_progress=on_progress, on_file_written=on_file_written
             )
             
-            logger.info(f"✂️ Splitting documents into chunks (size: 1000, overlap: 200)")
-            splits = text_splitter.split_documents(documents)
-            
-            logger.info(f"🔄 Adding {len(splits)} document chunks to vector database")
-            self.vector_store.add_documents(splits)
-            
-            logger.info(f"💾 Persisting vector store to disk")
-            self.vector_store.persist()
-            
-            logger.info(f"✅ Successfully added {len(splits)} document chunks to vector database")
+            logger.info(f"✅ Successfully added {stats['chunks']} document chunks to vector database "
+                        f"({stats['skipped']} unchanged chunks skipped)")
+            return stats
+        except IngestionCancelled:
+            raise
         except Exception as e:
             logger.error(f"❌ Error adding documents to database: {str(e)}")
             raise
     
-    def query(self, query_text: str, use_rag: bool = True, max_tokens: Optional[int] = None, temperature: Optional[float] = None) -> Dict[str, Any]:
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        Split documents into chunks with deterministic IDs, using the
+        configured chunking strategy.
+        
+        Args:
+            documents: Documents to split
+            
+        Returns:
+            Chunks with ``chunk_id`` and related metadata assigned
+        """
+        return split_documents(documents, self.splitter)
+    
+    def embed_chunks(
+        self,
+        chunks: List[Document],
+        embed_texts: Optional[Callable[[List[str]], List[List[float]]]] = None
+    ) -> List[List[float]]:
+        """
+        Compute the embeddings of chunks.
+        
+        Chunks whose text is in the embedding cache are not sent to the model.
+        
+        Args:
+            chunks: Chunks to embed
+            embed_texts: Optional function computing the embeddings of texts, e.g.
+                in worker processes. Defaults to the engine's embeddings model
+            
+        Returns:
+            One embedding vector per chunk
+        """
+        texts = [doc.page_content for doc in chunks]
+        embed_texts = embed_texts or self.embeddings.embed_documents
+        if self.embedding_cache is None:
+            return embed_texts(texts)
+        return self.embedding_cache.embed(texts, embed_texts)
+    
+    def write_chunks(
+        self,
+        chunks: List[Document],
+        embeddings: List[List[float]],
+        stage_stats: Optional[StageStats] = None,
+        replace_sources: Optional[Dict[str, Set[str]]] = None
+    ) -> Future:
+        """
+        Queue chunks with precomputed embeddings for upserting into the vector store.
+        
+        Args:
+            chunks: Chunks with IDs assigned
+            embeddings: Embedding vector of each chunk
+            stage_stats: Optional run statistics the write time is added to
+            replace_sources: Optional mapping of source keys to all chunk IDs each
+                source now has; their other stored chunks are deleted together
+                with the upsert
+            
+        Returns:
+            A future that completes with the number of chunks written and stale
+            chunks deleted once the vector store writer has written the chunks
+        """
+        return self.vector_writer.submit(chunks, embeddings, stage_stats, replace_sources)
+    
+    def existing_chunk_ids(self, chunk_ids: List[str]) -> set:
+        """
+        Find which chunk IDs are already stored in the vector store.
+        
+        Args:
+            chunk_ids: Chunk IDs to look up
+            
+        Returns:
+            The subset of IDs that already exist
+        """
+        collection = self.vector_store._collection
+        existing = set()
+        batch_size = 500
+        with self.vector_writer.read_lock():
+            for i in range(0, len(chunk_ids), batch_size):
+                result = collection.get(ids=chunk_ids[i:i + batch_size], include=[])
+                existing.update(result["ids"])
+        return existing
+    
+    def query(self, query_text: str, use_rag: bool = True, max_tokens: Optional[int] = None,
+              temperature: Optional[float] = None, routing_query: Optional[str] = None) -> Dict[str, Any]:
         """
         Query the RAG system.
         
+        The query is pre-routed first: greetings, thanks and capability questions
+        get a canned response, conversational follow-ups skip retrieval, and
+        everything else runs full RAG. LLM calls go through the circuit breaker.
+        While the circuit is open the query fails fast with a degraded response
+        instead of waiting for Ollama.
+        
+        Args:
+            query_text: The query text
+            use_rag: Whether to use RAG context or just the LLM
+            max_tokens: Optional maximum number of tokens for the response
+            temperature: Optional temperature parameter for the LLM
+            routing_query: Optional text to route on instead of query_text,
+                such as the user message without conversation history
+            
+        Returns:
+            Dictionary containing the response, source documents and route
+        """
+        start = time.monotonic()
+        decision = self._route_query(routing_query or query_text, use_rag)
+        
+        if decision.route == ROUTE_CANNED:
+            result = {"response": decision.canned_response, "sources": []}
+        else:
+            with self.ingestion_throttle.track_query():
+                result = self._run_query(query_text, decision.route == ROUTE_RAG, max_tokens, temperature)
+        
+        result["route"] = decision.route
+        self.query_router.record(decision.route, time.monotonic() - start)
+        return result
+    
+    def _run_query(self, query_text: str, use_rag: bool, max_tokens: Optional[int],
+                   temperature: Optional[float]) -> Dict[str, Any]:
+        """
+        Run retrieval and generation for a routed query.
+        
         Args:
             query_text: The query text
             use_rag: Whether to use RAG context or just the LLM
@@ -241,60 +471,357 @@ class RAGEngine:
         Returns:
             Dictionary containing the response and source documents
         """
+        if not self.circuit_breaker.allow_request():
+            logger.warning("⚡ LLM circuit is open, returning degraded response")
+            return self._degraded_response(query_text, use_rag)
+        
+        # Only errors of the LLM call count against the breaker, not retrieval errors
+        generating = False
         try:
-            llm_kwargs = {}
-            if max_tokens is not None:
-                llm_kwargs['max_tokens'] = max_tokens
-            if temperature is not None:
-                llm_kwargs['temperature'] = temperature
+            llm = self._get_llm(max_tokens, temperature)
             
+            documents = []
+            prompt = query_text
             if use_rag:
-                if llm_kwargs:
-                    temp_llm = OllamaLLM(
-                        model=getattr(self.llm, 'model', None) or getattr(self.llm, 'model_name', None),
-                        base_url=getattr(self.llm, 'base_url', None),
-                        **llm_kwargs
-                    )
-                    qa_chain = RetrievalQA.from_chain_type(
-                        llm=temp_llm,
-                        chain_type="stuff",
-                        retriever=self.vector_store.as_retriever(),
-                        return_source_documents=True
-                    )
-                    result = qa_chain({"query": query_text})
+                documents = self._retrieve_documents(query_text)
+                if documents:
+                    prompt = self._build_rag_prompt(query_text, documents)
                 else:
-                    result = self.qa_chain({"query": query_text})
-                
-                sources = []
-                if "source_documents" in result:
-                    for doc in result["source_documents"]:
-                        source_info = {
-                            "content": doc.page_content,
-                            "metadata": doc.metadata
-                        }
-                        sources.append(source_info)
-                
-                return {
-                    "response": result["result"],
-                    "sources": sources
-                }
+                    logger.info("🎯 No chunks passed the relevance threshold, querying the LLM directly")
+            
+            generating = True
+            response_text = llm.invoke(prompt)
+            generating = False
+            response = {
+                "response": response_text,
+                "sources": self._format_sources(documents)
+            }
+        except Exception as e:
+            if generating:
+                self.circuit_breaker.record_failure(e)
             else:
-                if llm_kwargs:
-                    temp_llm = OllamaLLM(
-                        model=getattr(self.llm, 'model', None) or getattr(self.llm, 'model_name', None),
-                        base_url=getattr(self.llm, 'base_url', None),
-                        **llm_kwargs
-                    )
-                    response = temp_llm.invoke(query_text)
+                self.circuit_breaker.release()
+            logger.error(f"Error querying RAG system: {str(e)}")
+            raise
+        
+        self.circuit_breaker.record_success()
+        return response
+    
+    async def aquery(self, query_text: str, use_rag: bool = True, max_tokens: Optional[int] = None,
+                     temperature: Optional[float] = None, deadline: Optional[float] = None,
+                     routing_query: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Query the RAG system asynchronously, streaming the response from Ollama.
+        
+        Queries are pre-routed as in ``query``. Cancelling the calling task (for
+        example when the HTTP client disconnects) closes the Ollama stream, which
+        stops generation and frees the model slot. Retrieval and generation also
+        stop once the deadline has passed.
+        
+        Args:
+            query_text: The query text
+            use_rag: Whether to use RAG context or just the LLM
+            max_tokens: Optional maximum number of tokens for the response
+            temperature: Optional temperature parameter for the LLM
+            deadline: Optional Unix timestamp after which the query is abandoned
+            routing_query: Optional text to route on instead of query_text
+            
+        Returns:
+            Dictionary containing the response, source documents and route
+            
+        Raises:
+            DeadlineExceeded: If the deadline passes before the response is complete
+        """
+        start = time.monotonic()
+        decision = self._route_query(routing_query or query_text, use_rag)
+        
+        if decision.route == ROUTE_CANNED:
+            result = {"response": decision.canned_response, "sources": []}
+        else:
+            with self.ingestion_throttle.track_query():
+                result = await self._arun_query(query_text, decision.route == ROUTE_RAG, max_tokens,
+                                                temperature, deadline)
+        
+        result["route"] = decision.route
+        self.query_router.record(decision.route, time.monotonic() - start)
+        return result
+    
+    async def _arun_query(self, query_text: str, use_rag: bool, max_tokens: Optional[int],
+                          temperature: Optional[float], deadline: Optional[float]) -> Dict[str, Any]:
+        """
+        Run retrieval and streaming generation for a routed query.
+        
+        Args:
+            query_text: The query text
+            use_rag: Whether to use RAG context or just the LLM
+            max_tokens: Optional maximum number of tokens for the response
+            temperature: Optional temperature parameter for the LLM
+            deadline: Optional Unix timestamp after which the query is abandoned
+            
+        Returns:
+            Dictionary containing the response and source documents
+        """
+        remaining_time(deadline)
+        
+        if not self.circuit_breaker.allow_request():
+            logger.warning("⚡ LLM circuit is open, returning degraded response")
+            return await asyncio.to_thread(self._degraded_response, query_text, use_rag)
+        
+        # Only errors of the LLM call count against the breaker, not retrieval errors
+        generating = False
+        try:
+            llm = self._get_llm(max_tokens, temperature)
+            
+            documents = []
+            prompt = query_text
+            if use_rag:
+                documents = await asyncio.wait_for(
+                    asyncio.to_thread(self._retrieve_documents, query_text),
+                    timeout=remaining_time(deadline)
+                )
+                if documents:
+                    prompt = self._build_rag_prompt(query_text, documents)
                 else:
-                    response = self.llm.invoke(query_text)
-                return {
-                    "response": response,
-                    "sources": []
-                }
+                    logger.info("🎯 No chunks passed the relevance threshold, querying the LLM directly")
+            
+            generating = True
+            response_text = await asyncio.wait_for(
+                self._astream_response(llm, prompt),
+                timeout=remaining_time(deadline)
+            )
+        except (asyncio.CancelledError, asyncio.TimeoutError, DeadlineExceeded) as e:
+            self.circuit_breaker.release()
+            if isinstance(e, asyncio.CancelledError):
+                logger.info("🛑 Query cancelled, generation aborted")
+                raise
+            logger.warning("⏱️ Query deadline exceeded, generation aborted")
+            raise DeadlineExceeded("Request deadline exceeded") from e
         except Exception as e:
+            if generating:
+                self.circuit_breaker.record_failure(e)
+            else:
+                self.circuit_breaker.release()
             logger.error(f"Error querying RAG system: {str(e)}")
             raise
+        
+        self.circuit_breaker.record_success()
+        return {
+            "response": response_text,
+            "sources": self._format_sources(documents)
+        }
+    
+    def _route_query(self, query_text: str, use_rag: bool) -> RouteDecision:
+        """
+        Pick how a query is handled.
+        
+        Args:
+            query_text: The text to route on
+            use_rag: Whether the caller asked for RAG context
+            
+        Returns:
+            The route decision
+        """
+        if not use_rag:
+            return RouteDecision(ROUTE_NO_RETRIEVAL, "caller")
+        return self.query_router.route(query_text)
+    
+    async def _astream_response(self, llm: OllamaLLM, prompt: str) -> str:
+        """
+        Stream a response from the LLM and collect it into a single string.
+        
+        Args:
+            llm: The LLM to stream from
+            prompt: The prompt to send
+            
+        Returns:
+            The complete response text
+        """
+        chunks = []
+        async for chunk in llm.astream(prompt):
+            chunks.append(chunk)
+        return "".join(chunks)
+    
+    def _get_llm(self, max_tokens: Optional[int] = None, temperature: Optional[float] = None) -> OllamaLLM:
+        """
+        Get the LLM to use for a query, creating a temporary one for custom parameters.
+        
+        Args:
+            max_tokens: Optional maximum number of tokens for the response
+            temperature: Optional temperature parameter for the LLM
+            
+        Returns:
+            The configured LLM or a temporary one with the requested parameters
+        """
+        llm_kwargs = {}
+        if max_tokens is not None:
+            llm_kwargs['max_tokens'] = max_tokens
+        if temperature is not None:
+            llm_kwargs['temperature'] = temperature
+        
+        if not llm_kwargs:
+            return self.llm
+        
+        return self._create_llm(
+            getattr(self.llm, 'model', None) or getattr(self.llm, 'model_name', None),
+            getattr(self.llm, 'base_url', None),
+            **llm_kwargs
+        )
+    
+    def _retrieve_documents(self, query_text: str) -> List[Document]:
+        """
+        Retrieve the documents relevant to a query from the vector store.
+        
+        Candidates are fetched with their relevance scores. Candidates below the
+        score threshold are dropped, and adaptive k cuts the list where scores
+        fall off sharply. When reranking is enabled, the reranker picks the final
+        chunks from the survivors. The relevance score of each document is stored
+        in its metadata.
+        
+        Args:
+            query_text: The query text
+            
+        Returns:
+            List of relevant Document objects, empty if nothing is relevant enough
+        """
+        start = time.monotonic()
+        fetch_k = self.retrieval_fetch_k
+        if self.reranker is not None:
+            fetch_k = max(fetch_k, self.reranker.candidate_k)
+        
+        with self.vector_writer.read_lock():
+            scored_documents = self.vector_store.similarity_search_with_relevance_scores(query_text, k=fetch_k)
+        documents = self._select_documents(scored_documents)
+        
+        if len(documents) < len(scored_documents):
+            logger.info(f"🎯 Kept {len(documents)} of {len(scored_documents)} retrieved chunks "
+                        f"(threshold: {self.score_threshold}, adaptive k: {self.adaptive_k})")
+        
+        if self.reranker is not None:
+            documents = self.reranker.rerank(query_text, documents)
+        else:
+            documents = documents[:self.retrieval_k]
+        # Retrieval runs on this pod's CPUs, unlike generation, so it is what ingestion slows down
+        self.ingestion_throttle.record_query_latency(time.monotonic() - start)
+        return documents
+    
+    def _select_documents(self, scored_documents: List[tuple]) -> List[Document]:
+        """
+        Apply the score threshold and adaptive k to scored retrieval results.
+        
+        Args:
+            scored_documents: List of (Document, relevance score) tuples
+            
+        Returns:
+            Documents that passed, in descending score order
+        """
+        selected = []
+        previous_score = None
+        for document, score in sorted(scored_documents, key=lambda item: item[1], reverse=True):
+            if self.score_threshold is not None and score < self.score_threshold:
+                break
+            if (self.adaptive_k and previous_score is not None and len(selected) >= self.min_k
+                    and previous_score - score > self.max_score_drop):
+                break
+            document.metadata["relevance_score"] = round(float(score), 4)
+            selected.append(document)
+            previous_score = score
+        return selected
+    
+    def _build_rag_prompt(self, query_text: str, documents: List[Document]) -> str:
+        """
+        Build the LLM prompt by stuffing the retrieved documents into the context.
+        
+        Args:
+            query_text: The query text
+            documents: Retrieved Document objects
+            
+        Returns:
+            The prompt to send to the LLM
+        """
+        context = "\n\n".join(doc.page_content for doc in documents)
+        return RAG_PROMPT_TEMPLATE.format(context=context, question=query_text)
+    
+    def _format_sources(self, documents: List[Document]) -> List[Dict[str, Any]]:
+        """
+        Format retrieved documents as source dictionaries for API responses.
+        
+        Args:
+            documents: Retrieved Document objects
+            
+        Returns:
+            List of dictionaries with 'content' and 'metadata'
+        """
+        return [
+            {
+                "content": doc.page_content,
+                "metadata": doc.metadata
+            }
+            for doc in documents
+        ]
+    
+    def _degraded_response(self, query_text: str, use_rag: bool) -> Dict[str, Any]:
+        """
+        Build the response returned while the LLM circuit is open.
+        
+        Retrieval does not depend on Ollama, so the relevant sources are still
+        returned without a generated answer.
+        
+        Args:
+            query_text: The query text
+            use_rag: Whether sources should be retrieved
+            
+        Returns:
+            Dictionary containing a fallback message, sources and a degraded flag
+        """
+        sources = []
+        if use_rag:
+            try:
+                sources = self._format_sources(self._retrieve_documents(query_text))
+            except Exception as e:
+                logger.error(f"Error retrieving sources for degraded response: {str(e)}")
+        
+        message = "The language model is currently unavailable. "
+        if sources:
+            message += "Here are the most relevant documents from the knowledge base."
+        else:
+            message += "Please try again later."
+        
+        return {
+            "response": message,
+            "sources": sources,
+            "degraded": True
+        }
+    
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get the runtime status of the engine's query path.
+        
+        Returns:
+            Dictionary with the model, timeouts, circuit breaker state, retrieval
+            settings, reranker statistics, per-route query statistics, vector
+            store writer statistics, embedding cache statistics, the ingestion
+            concurrency and the ingestion throttle state
+        """
+        return {
+            "model_name": getattr(self.llm, 'model', None),
+            "base_url": getattr(self.llm, 'base_url', None),
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+            "circuit_breaker": self.circuit_breaker.get_status(),
+            "retrieval": {
+                "k": self.retrieval_k,
+                "fetch_k": self.retrieval_fetch_k,
+                "score_threshold": self.score_threshold,
+                "adaptive_k": self.adaptive_k,
+                "max_score_drop": self.max_score_drop
+            },
+            "reranker": self.reranker.get_status() if self.reranker else None,
+            "query_routing": self.query_router.get_status(),
+            "vector_writer": self.vector_writer.get_status(),
+            "embedding_cache": self.embedding_cache.get_status() if self.embedding_cache else None,
+            "ingestion_concurrency": self.concurrency.get_status(),
+            "ingestion_throttle": self.ingestion_throttle.get_status()
+        }
             
     def list_documents(self) -> List[Document]:
         """
@@ -320,6 +847,119 @@ class RAGEngine:
             logger.error(f"Error listing documents: {str(e)}")
             raise
             
+    def delete_repo_documents(self, repo_url: str, branch: str, sources: Optional[List[str]] = None) -> None:
+        """
+        Delete the chunks of a repository branch from the vector store.
+        
+        Args:
+            repo_url: URL of the repository
+            branch: Branch name
+            sources: Optional repository-relative file paths to delete. If not
+                given, all chunks of the branch are deleted
+        """
+        try:
+            collection = self.vector_store._collection
+            repo_filter = [{"repo_url": repo_url}, {"branch": branch}]
+            
+            if sources is None:
+                with self.vector_writer.write_lock():
+                    collection.delete(where={"$and": repo_filter})
+                logger.info(f"🗑️ Deleted all chunks of {repo_url} (branch: {branch})")
+                return
+            
+            batch_size = 500
+            with self.vector_writer.write_lock():
+                for i in range(0, len(sources), batch_size):
+                    batch = sources[i:i + batch_size]
+                    collection.delete(where={"$and": repo_filter + [{"source": {"$in": batch}}]})
+            if sources:
+                logger.info(f"🗑️ Deleted chunks of {len(sources)} files from {repo_url} (branch: {branch})")
+        except Exception as e:
+            logger.error(f"Error deleting repository documents: {str(e)}")
+            raise
+    
+    def prune_repo_documents(self, repo_url: str, branch: str, keep_sources: List[str]) -> int:
+        """
+        Delete the chunks of a repository branch whose file is not in keep_sources.
+        
+        Args:
+            repo_url: URL of the repository
+            branch: Branch name
+            keep_sources: Repository-relative file paths whose chunks are kept
+            
+        Returns:
+            Number of chunks deleted
+        """
+        try:
+            pruned = self._prune_documents({"$and": [{"repo_url": repo_url}, {"branch": branch}]}, keep_sources)
+            if pruned:
+                logger.info(f"🗑️ Pruned {pruned} chunks of removed files from {repo_url} (branch: {branch})")
+            return pruned
+        except Exception as e:
+            logger.error(f"Error pruning repository documents: {str(e)}")
+            raise
+    
+    def delete_directory_documents(self, directory: str, glob: str, sources: List[str]) -> None:
+        """
+        Delete the chunks of the given files of a local directory.
+        
+        Args:
+            directory: Absolute path of the directory
+            glob: Glob the directory was ingested with
+            sources: Absolute paths of the files whose chunks are deleted
+        """
+        try:
+            collection = self.vector_store._collection
+            directory_filter = [{"directory": directory}, {"directory_glob": glob}]
+            batch_size = 500
+            with self.vector_writer.write_lock():
+                for i in range(0, len(sources), batch_size):
+                    batch = sources[i:i + batch_size]
+                    collection.delete(where={"$and": directory_filter + [{"source": {"$in": batch}}]})
+            if sources:
+                logger.info(f"🗑️ Deleted chunks of {len(sources)} files from {directory}")
+        except Exception as e:
+            logger.error(f"Error deleting directory documents: {str(e)}")
+            raise
+    
+    def prune_directory_documents(self, directory: str, glob: str, keep_sources: List[str]) -> int:
+        """
+        Delete the chunks of a local directory whose file is not in keep_sources.
+        
+        Args:
+            directory: Absolute path of the directory
+            glob: Glob the directory was ingested with; other globs' chunks are kept
+            keep_sources: Absolute file paths whose chunks are kept
+            
+        Returns:
+            Number of chunks deleted
+        """
+        try:
+            pruned = self._prune_documents(
+                {"$and": [{"directory": directory}, {"directory_glob": glob}]},
+                keep_sources
+            )
+            if pruned:
+                logger.info(f"🗑️ Pruned {pruned} chunks of removed files from {directory}")
+            return pruned
+        except Exception as e:
+            logger.error(f"Error pruning directory documents: {str(e)}")
+            raise
+    
+    def _prune_documents(self, where: Dict[str, Any], keep_sources: List[str]) -> int:
+        collection = self.vector_store._collection
+        keep = set(keep_sources)
+        batch_size = 500
+        with self.vector_writer.write_lock():
+            result = collection.get(where=where, include=["metadatas"])
+            stale_ids = [
+                chunk_id for chunk_id, metadata in zip(result["ids"], result["metadatas"])
+                if (metadata or {}).get("source") not in keep
+            ]
+            for i in range(0, len(stale_ids), batch_size):
+                collection.delete(ids=stale_ids[i:i + batch_size])
+        return len(stale_ids)
+    
     def flush_vector_store(self) -> bool:
         """
         Flush all documents from the vector store.
@@ -328,11 +968,14 @@ class RAGEngine:
             True if successful
         """
         try:
-            collection = self.vector_store._collection
-            
-            collection.delete()
-            
-            self._initialize_vector_store()
+            self.vector_writer.flush(persist=False)
+            with self.vector_writer.write_lock():
+                collection = self.vector_store._collection
+                
+                collection.delete()
+                
+                self._initialize_vector_store()
+                self.vector_writer.vector_store = self.vector_store
             
             logger.info("Flushed all documents from vector store")
             return True
@@ -406,6 +1049,50 @@ class RAGEngine:
         Returns:
             Dictionary containing the response, source documents, and conversation ID
         """
+        conversation_id, augmented_query = self._start_conversation_turn(query_text, conversation_id)
+        
+        result = self.query(augmented_query, max_tokens=max_tokens, temperature=temperature,
+                            routing_query=query_text)
+        
+        return self._finish_conversation_turn(conversation_id, result)
+    
+    async def aquery_with_conversation(self, query_text: str, conversation_id: Optional[str] = None,
+                                       max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+                                       deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Query the RAG system asynchronously with conversation history.
+        
+        If the query is cancelled or runs past its deadline, the user message stays
+        in the history but no assistant message is recorded.
+        
+        Args:
+            query_text: The query text
+            conversation_id: Optional conversation ID for context
+            max_tokens: Optional max tokens for the LLM
+            temperature: Optional temperature for the LLM
+            deadline: Optional Unix timestamp after which the query is abandoned
+            
+        Returns:
+            Dictionary containing the response, source documents, and conversation ID
+        """
+        conversation_id, augmented_query = self._start_conversation_turn(query_text, conversation_id)
+        
+        result = await self.aquery(augmented_query, max_tokens=max_tokens, temperature=temperature,
+                                   deadline=deadline, routing_query=query_text)
+        
+        return self._finish_conversation_turn(conversation_id, result)
+    
+    def _start_conversation_turn(self, query_text: str, conversation_id: Optional[str]) -> tuple:
+        """
+        Record a user message and build the query augmented with conversation history.
+        
+        Args:
+            query_text: The query text
+            conversation_id: Optional conversation ID for context
+            
+        Returns:
+            Tuple of (conversation ID, augmented query)
+        """
         new_conversation = False
         if not conversation_id:
             conversation_id = self.create_conversation()
@@ -426,8 +1113,19 @@ class RAGEngine:
         if context:
             augmented_query = f"Conversation history:\n{context}\n\nCurrent query: {query_text}"
         
-        result = self.query(augmented_query)
+        return conversation_id, augmented_query
+    
+    def _finish_conversation_turn(self, conversation_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Record the assistant response for a conversation turn.
         
+        Args:
+            conversation_id: Conversation ID
+            result: Query result
+            
+        Returns:
+            The query result with the conversation ID added
+        """
         self.add_message_to_conversation(
             conversation_id, 
             "assistant", 
@@ -499,10 +1197,23 @@ def get_rag_engine(config=None):
             engine = RAGEngine.__new__(RAGEngine)
             engine.config = config
             engine.conversations = {}
+            engine.connect_timeout = 5.0
+            engine.read_timeout = 120.0
+            engine.circuit_breaker = CircuitBreaker()
+            engine.reranker = None
+            engine.retrieval_k = 4
+            engine.retrieval_fetch_k = 4
+            engine.score_threshold = None
+            engine.adaptive_k = False
+            engine.max_score_drop = 0.15
+            engine.min_k = 1
+            engine.query_router = QueryRouter(enabled=False)
             
             class MockLLM:
                 def invoke(self, prompt, **kwargs):
                     return f"Test response for: {prompt[:50]}..."
+                async def astream(self, prompt, **kwargs):
+                    yield f"Test response for: {prompt[:50]}..."
                     
             class MockEmbeddings:
                 def embed_documents(self, texts):
@@ -515,29 +1226,29 @@ def get_rag_engine(config=None):
             class MockVectorStore:
                 def __init__(self):
                     self.documents = []
-                def add_documents(self, documents):
+                def add_documents(self, documents, **kwargs):
                     self.documents.extend(documents)
                     return len(documents)
                 def as_retriever(self, **kwargs):
                     return MockRetriever()
+                def similarity_search_with_relevance_scores(self, query, k=4, **kwargs):
+                    return []
                 def persist(self):
                     pass
                     
             class MockRetriever:
-                def get_relevant_documents(self, query):
+                def invoke(self, query):
                     return []
                     
-            class MockQAChain:
-                def __call__(self, inputs, **kwargs):
-                    return {
-                        "result": f"Test response for: {inputs.get('query', '')[:50]}...",
-                        "source_documents": []
-                    }
-            
             engine.llm = MockLLM()
             engine.embeddings = MockEmbeddings()
+            engine.embedding_cache = None
+            engine.splitter = DocumentSplitter.from_config(config.get("ingestion", {}).get("chunking", {}))
             engine.vector_store = MockVectorStore()
-            engine.qa_chain = MockQAChain()
+            engine.vector_writer = VectorStoreWriter(engine.vector_store)
+            engine.concurrency = ConcurrencyController.from_config(config.get("ingestion", {}).get("concurrency", {}))
+            engine.ingestion_throttle = IngestionThrottle.from_config(
+                config.get("ingestion", {}).get("throttle", {}), engine.concurrency.cpus)
             
             logger.info("✅ Successfully created test-mode RAGEngine instance")
             return engine
@@ -550,10 +1261,26 @@ def get_rag_engine(config=None):
             engine = RAGEngine.__new__(RAGEngine)
             engine.config = config
             engine.conversations = {}
+            engine.connect_timeout = 5.0
+            engine.read_timeout = 120.0
+            engine.circuit_breaker = CircuitBreaker()
+            engine.reranker = None
+            engine.retrieval_k = 4
+            engine.retrieval_fetch_k = 4
+            engine.score_threshold = None
+            engine.adaptive_k = False
+            engine.max_score_drop = 0.15
+            engine.min_k = 1
+            engine.query_router = QueryRouter(enabled=False)
             engine.llm = None
             engine.embeddings = None
+            engine.embedding_cache = None
+            engine.splitter = DocumentSplitter.from_config(config.get("ingestion", {}).get("chunking", {}))
             engine.vector_store = None
-            engine.qa_chain = None
+            engine.vector_writer = VectorStoreWriter(None)
+            engine.concurrency = ConcurrencyController.from_config(config.get("ingestion", {}).get("concurrency", {}))
+            engine.ingestion_throttle = IngestionThrottle.from_config(
+                config.get("ingestion", {}).get("throttle", {}), engine.concurrency.cpus)
             return engine
         else:
             raise
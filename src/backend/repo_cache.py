@@ -0,0 +1,472 @@
+"""
+Persistent clone cache for GitHub repository ingestion.
+Keeps one working copy per repository and branch across ingestion runs and
+records the last ingested commit so refreshes only process what changed.
+Working copies share the objects of a bare mirror per upstream repository, so
+branches and forks of the same repository are downloaded once.
+"""
+import os
+import re
+import json
+import time
+import base64
+import shutil
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, Set
+
+import git
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_state_lock = threading.Lock()
+_repo_locks: Dict[str, threading.Lock] = {}
+_repo_locks_guard = threading.Lock()
+
+
+def _get_repo_lock(key: str) -> threading.Lock:
+    with _repo_locks_guard:
+        if key not in _repo_locks:
+            _repo_locks[key] = threading.Lock()
+        return _repo_locks[key]
+
+
+# Branches waiting for a mirror fetch, and when each branch was last fetched,
+# so concurrent syncs of one remote are served by a single fetch
+_fetch_guard = threading.Lock()
+_pending_fetches: Dict[Tuple[str, str], Set[str]] = {}
+_last_fetched: Dict[Tuple[str, str, str], float] = {}
+
+
+class RepoCache:
+    """
+    Persistent clone cache with per-repository ingestion state.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, use_mirrors: Optional[bool] = None):
+        """
+        Initialize the repository cache.
+
+        Args:
+            cache_dir: Directory holding the clones and the state file. Defaults to
+                the RAG_REPO_CACHE_DIR environment variable or ./data/repo_cache
+            use_mirrors: Whether working copies borrow objects from shared bare
+                mirrors. Defaults to the RAG_REPO_MIRRORS environment variable or true
+        """
+        self.cache_dir = cache_dir or os.environ.get("RAG_REPO_CACHE_DIR", "./data/repo_cache")
+        self.clones_dir = os.path.join(self.cache_dir, "clones")
+        self.mirrors_dir = os.path.join(self.cache_dir, "mirrors")
+        self.state_path = os.path.join(self.cache_dir, "state.json")
+        if use_mirrors is None:
+            use_mirrors = os.environ.get("RAG_REPO_MIRRORS", "true").lower() == "true"
+        self.use_mirrors = use_mirrors
+        os.makedirs(self.clones_dir, exist_ok=True)
+
+    @staticmethod
+    def repo_key(repo_url: str, branch: str) -> str:
+        """
+        Get the cache key for a repository branch.
+
+        Args:
+            repo_url: URL of the repository
+            branch: Branch name
+
+        Returns:
+            A filesystem-safe key such as ``owner__repo__main__1a2b3c4d``
+        """
+        url = repo_url.rstrip("/")
+        if url.endswith(".git"):
+            url = url[:-4]
+        name = "__".join(url.split("/")[-2:])
+        safe = re.sub(r"[^A-Za-z0-9._-]+", "_", f"{name}__{branch}")
+        digest = hashlib.sha1(f"{url}@{branch}".encode("utf-8")).hexdigest()[:8]
+        return f"{safe}__{digest}"
+
+    def checkout_path(self, repo_url: str, branch: str) -> str:
+        """Get the working copy path for a repository branch."""
+        return os.path.join(self.clones_dir, self.repo_key(repo_url, branch))
+
+    @staticmethod
+    def _normalize_url(repo_url: str) -> str:
+        url = repo_url.rstrip("/")
+        return url[:-4] if url.endswith(".git") else url
+
+    def mirror_path(self, upstream_url: str) -> str:
+        """
+        Get the bare mirror path for an upstream repository.
+
+        Args:
+            upstream_url: URL of the upstream repository; forks pass the URL of
+                the repository they were forked from
+
+        Returns:
+            A path such as ``mirrors/owner__repo__1a2b3c4d.git``
+        """
+        url = self._normalize_url(upstream_url)
+        name = re.sub(r"[^A-Za-z0-9._-]+", "_", "__".join(url.split("/")[-2:]))
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.mirrors_dir, f"{name}__{digest}.git")
+
+    @classmethod
+    def remote_name(cls, repo_url: str) -> str:
+        """Get the name of the mirror remote a repository is fetched from."""
+        return "r" + hashlib.sha1(cls._normalize_url(repo_url).encode("utf-8")).hexdigest()[:12]
+
+    @staticmethod
+    def git_env(github_token: Optional[str]) -> Dict[str, str]:
+        """
+        Build the environment for git commands.
+
+        The token is passed as an HTTP header through GIT_CONFIG_* variables so it
+        is never written to the clone's configuration.
+
+        Args:
+            github_token: Optional GitHub token
+
+        Returns:
+            Environment variables for git
+        """
+        env = {"GIT_TERMINAL_PROMPT": "0"}
+        if github_token:
+            credentials = base64.b64encode(f"x-access-token:{github_token}".encode("utf-8")).decode("ascii")
+            env.update({
+                "GIT_CONFIG_COUNT": "1",
+                "GIT_CONFIG_KEY_0": "http.extraHeader",
+                "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}"
+            })
+        return env
+
+    def sync(
+        self,
+        repo_url: str,
+        branch: str,
+        github_token: Optional[str] = None,
+        shallow: bool = True,
+        sparse_patterns: Optional[List[str]] = None,
+        upstream_url: Optional[str] = None
+    ) -> Tuple[str, str]:
+        """
+        Clone a repository branch into the cache, or fetch and fast-forward an existing clone.
+
+        With mirrors enabled, the branch is fetched into the bare mirror of its
+        upstream repository and the working copy borrows the mirror's objects
+        through ``objects/info/alternates``, so branches and forks of one
+        repository share a single object store and each object is downloaded
+        once. Otherwise the working copy is a standalone clone.
+
+        Shallow clones only fetch the head commit. The previously ingested commit
+        stays in the local object store, so it can still be diffed against. With
+        sparse patterns the clone is a standalone partial clone
+        (``--filter=blob:none``) and only the blobs of matching files are
+        downloaded and checked out.
+
+        Args:
+            repo_url: URL of the repository
+            branch: Branch to sync
+            github_token: Optional GitHub token for private repositories
+            shallow: Whether to fetch only the latest commit (``--depth 1``)
+            sparse_patterns: Optional non-cone sparse-checkout patterns
+            upstream_url: URL of the repository ``repo_url`` was forked from, so
+                the fork shares its mirror; defaults to ``repo_url``
+
+        Returns:
+            Tuple of (working copy path, head commit SHA)
+        """
+        path = self.checkout_path(repo_url, branch)
+        env = self.git_env(github_token)
+        depth_args = ["--depth", "1"] if shallow else []
+
+        if self.use_mirrors and not sparse_patterns:
+            return self._sync_from_mirror(repo_url, branch, env, shallow, upstream_url or repo_url)
+
+        with _get_repo_lock(path):
+            if os.path.isdir(os.path.join(path, ".git")) and "origin" not in [r.name for r in git.Repo(path).remotes]:
+                # Mirror-backed working copy; sparse checkouts need their own partial clone
+                shutil.rmtree(path)
+            if os.path.isdir(os.path.join(path, ".git")):
+                logger.info(f"🔄 Fetching cached clone of {repo_url} (branch: {branch})")
+                repo = git.Repo(path)
+                self._configure_sparse_checkout(repo, sparse_patterns, env)
+                repo.git.fetch(*depth_args, "origin", branch, env=env)
+                repo.git.reset("--hard", "FETCH_HEAD", env=env)
+                repo.git.clean("-fdx")
+            else:
+                logger.info(f"📥 Cloning {repo_url} (branch: {branch}) into cache"
+                            f"{' (shallow)' if shallow else ''}{' (sparse)' if sparse_patterns else ''}")
+                clone_args = {"branch": branch, "single_branch": True}
+                if shallow:
+                    clone_args["depth"] = 1
+                if sparse_patterns:
+                    clone_args.update({"filter": "blob:none", "no_checkout": True})
+                repo = git.Repo.clone_from(repo_url, path, env=env, **clone_args)
+                if sparse_patterns:
+                    self._configure_sparse_checkout(repo, sparse_patterns, env)
+                    repo.git.checkout(branch, env=env)
+            return path, repo.head.commit.hexsha
+
+    def _sync_from_mirror(
+        self,
+        repo_url: str,
+        branch: str,
+        env: Dict[str, str],
+        shallow: bool,
+        upstream_url: str
+    ) -> Tuple[str, str]:
+        path = self.checkout_path(repo_url, branch)
+        mirror_path = self.mirror_path(upstream_url)
+        with _get_repo_lock(path):
+            sha = self._refresh_mirror(mirror_path, repo_url, branch, env, shallow)
+            if os.path.isdir(os.path.join(path, ".git")):
+                repo = git.Repo(path)
+            else:
+                logger.info(f"📂 Creating working copy of {repo_url} (branch: {branch}) from mirror {mirror_path}")
+                repo = git.Repo.init(path)
+            self._link_mirror(repo, mirror_path)
+            self._configure_sparse_checkout(repo, None, env)
+            repo.git.checkout("-f", "--detach", sha)
+            repo.git.clean("-fdx")
+            return path, sha
+
+    def _refresh_mirror(self, mirror_path: str, repo_url: str, branch: str, env: Dict[str, str], shallow: bool) -> str:
+        # Register the branch, then fetch every branch registered for this remote
+        # in one go; syncs that waited on the lock are served by that fetch
+        remote = self.remote_name(repo_url)
+        requested = time.monotonic()
+        with _fetch_guard:
+            _pending_fetches.setdefault((mirror_path, remote), set()).add(branch)
+
+        with _get_repo_lock(mirror_path):
+            mirror = self._open_mirror(mirror_path)
+            urls = [r.url for r in mirror.remotes if r.name == remote]
+            if not urls:
+                mirror.git.remote("add", remote, repo_url)
+            elif urls[0] != repo_url:
+                mirror.git.remote("set-url", remote, repo_url)
+
+            if _last_fetched.get((mirror_path, remote, branch), -1.0) < requested:
+                with _fetch_guard:
+                    branches = sorted(_pending_fetches.pop((mirror_path, remote), set()) | {branch})
+                self._fetch_into_mirror(mirror, mirror_path, remote, repo_url, branches, env, shallow)
+            if _last_fetched.get((mirror_path, remote, branch), -1.0) < requested:
+                # Fetched together with a branch that failed; fetch alone to report the error
+                self._fetch_into_mirror(mirror, mirror_path, remote, repo_url, [branch], env, shallow)
+            return mirror.git.rev_parse(f"refs/remotes/{remote}/{branch}^{{commit}}")
+
+    @staticmethod
+    def _open_mirror(mirror_path: str) -> git.Repo:
+        if os.path.isdir(mirror_path):
+            return git.Repo(mirror_path)
+        mirror = git.Repo.init(mirror_path, bare=True)
+        # Working copies borrow these objects, so they must never be pruned
+        mirror.git.config("gc.auto", "0")
+        mirror.git.config("gc.pruneExpire", "never")
+        return mirror
+
+    @staticmethod
+    def _fetch_into_mirror(
+        mirror: git.Repo,
+        mirror_path: str,
+        remote: str,
+        repo_url: str,
+        branches: List[str],
+        env: Dict[str, str],
+        shallow: bool
+    ):
+        if shallow:
+            depth_args = ["--depth", "1"]
+        elif os.path.exists(os.path.join(mirror.git_dir, "shallow")):
+            depth_args = ["--unshallow"]
+        else:
+            depth_args = []
+        started = time.monotonic()
+        logger.info(f"🔄 Fetching {', '.join(branches)} of {repo_url} into mirror {os.path.basename(mirror_path)}")
+        refspecs = [f"+refs/heads/{b}:refs/remotes/{remote}/{b}" for b in branches]
+        try:
+            mirror.git.fetch("--no-tags", *depth_args, remote, *refspecs, env=env)
+            fetched = branches
+        except git.GitCommandError:
+            if len(branches) == 1:
+                raise
+            # One missing branch fails the whole fetch; fetch the others one by one
+            fetched = []
+            for branch, refspec in zip(branches, refspecs):
+                try:
+                    mirror.git.fetch("--no-tags", *depth_args, remote, refspec, env=env)
+                    fetched.append(branch)
+                except git.GitCommandError as e:
+                    logger.warning(f"⚠️ Could not fetch {branch} of {repo_url}: {str(e)}")
+        with _fetch_guard:
+            for branch in fetched:
+                _last_fetched[(mirror_path, remote, branch)] = started
+
+    @staticmethod
+    def _link_mirror(repo: git.Repo, mirror_path: str):
+        # Borrow the mirror's objects, and its shallow boundary so history walks
+        # stop where the mirror's history does
+        info_dir = os.path.join(repo.git_dir, "objects", "info")
+        os.makedirs(info_dir, exist_ok=True)
+        objects_dir = os.path.abspath(os.path.join(mirror_path, "objects"))
+        alternates_path = os.path.join(info_dir, "alternates")
+        alternates = []
+        if os.path.exists(alternates_path):
+            with open(alternates_path, "r") as f:
+                alternates = [line.strip() for line in f if line.strip()]
+        if objects_dir not in alternates:
+            with open(alternates_path, "w") as f:
+                f.write("\n".join(alternates + [objects_dir]) + "\n")
+        # Working copies hold no objects of their own, nothing for gc to do
+        repo.git.config("gc.auto", "0")
+
+        mirror_shallow = os.path.join(mirror_path, "shallow")
+        if os.path.exists(mirror_shallow):
+            shallow_path = os.path.join(repo.git_dir, "shallow")
+            commits = set()
+            for file_path in (shallow_path, mirror_shallow):
+                if os.path.exists(file_path):
+                    with open(file_path, "r") as f:
+                        commits.update(line.strip() for line in f if line.strip())
+            with open(shallow_path, "w") as f:
+                f.write("".join(f"{sha}\n" for sha in sorted(commits)))
+
+    @staticmethod
+    def _configure_sparse_checkout(repo: git.Repo, sparse_patterns: Optional[List[str]], env: Dict[str, str]):
+        if sparse_patterns:
+            repo.git.sparse_checkout("set", "--no-cone", *sparse_patterns, env=env)
+            return
+        try:
+            sparse_enabled = repo.git.config("--get", "core.sparseCheckout") == "true"
+        except git.GitCommandError:
+            sparse_enabled = False
+        if sparse_enabled:
+            repo.git.sparse_checkout("disable", env=env)
+
+    @staticmethod
+    def list_files(path: str) -> List[str]:
+        """
+        List the tracked files of a working copy.
+
+        Args:
+            path: Working copy path
+
+        Returns:
+            Repository-relative file paths
+        """
+        output = git.Repo(path).git.ls_files("-z")
+        return [f for f in output.split("\0") if f]
+
+    @staticmethod
+    def has_commit(path: str, sha: str) -> bool:
+        """Check whether a commit is present in a working copy."""
+        try:
+            git.Repo(path).git.cat_file("-e", f"{sha}^{{commit}}")
+            return True
+        except git.GitCommandError:
+            return False
+
+    @staticmethod
+    def diff(path: str, old_sha: str, new_sha: str) -> Tuple[List[str], List[str]]:
+        """
+        Get the files changed between two commits.
+
+        Renames are reported as a deletion plus an addition.
+
+        Args:
+            path: Working copy path
+            old_sha: Previously ingested commit
+            new_sha: New head commit
+
+        Returns:
+            Tuple of (added or modified paths, deleted paths)
+        """
+        output = git.Repo(path).git.diff("--name-status", "--no-renames", "-z", old_sha, new_sha)
+        fields = [f for f in output.split("\0") if f]
+        changed, deleted = [], []
+        for status, file_path in zip(fields[0::2], fields[1::2]):
+            if status.startswith("D"):
+                deleted.append(file_path)
+            else:
+                changed.append(file_path)
+        return changed, deleted
+
+    def _load_state(self) -> Dict[str, Any]:
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read repository cache state, starting fresh: {str(e)}")
+            return {}
+
+    def _save_state(self, state: Dict[str, Any]):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def get_repo_state(self, repo_url: str, branch: str) -> Dict[str, Any]:
+        """
+        Get the recorded ingestion state of a repository branch.
+
+        Args:
+            repo_url: URL of the repository
+            branch: Branch name
+
+        Returns:
+            The state dictionary, empty if the branch was never ingested
+        """
+        with _state_lock:
+            return self._load_state().get(self.repo_key(repo_url, branch), {})
+
+    def update_repo_state(self, repo_url: str, branch: str, **values):
+        """
+        Update the recorded ingestion state of a repository branch.
+
+        Args:
+            repo_url: URL of the repository
+            branch: Branch name
+            **values: State values to set
+        """
+        key = self.repo_key(repo_url, branch)
+        with _state_lock:
+            state = self._load_state()
+            entry = state.setdefault(key, {"repo_url": repo_url, "branch": branch})
+            entry.update(values)
+            self._save_state(state)
+
+    def get_ingested_commit(self, repo_url: str, branch: str) -> Optional[str]:
+        """Get the last ingested commit SHA of a repository branch."""
+        return self.get_repo_state(repo_url, branch).get("last_ingested_sha")
+
+    def record_ingested_commit(self, repo_url: str, branch: str, sha: str, **values):
+        """
+        Record that a commit has been fully ingested.
+
+        Args:
+            repo_url: URL of the repository
+            branch: Branch name
+            sha: The ingested commit SHA
+            **values: Additional state values to set, e.g. the filter signature
+        """
+        self.update_repo_state(
+            repo_url,
+            branch,
+            last_ingested_sha=sha,
+            last_ingested_at=datetime.utcnow().isoformat(),
+            **values
+        )
+
+    def reset_ingestion_state(self):
+        """
+        Forget the recorded ingestion state of every cached repository branch.
+
+        The clones are kept, but the next sync of each branch ingests every file
+        again instead of diffing against the last ingested commit. Called after
+        the vector store is flushed.
+        """
+        with _state_lock:
+            if os.path.exists(self.state_path):
+                self._save_state({})
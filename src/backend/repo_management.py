@@ -5,15 +5,23 @@ This module provides functionality for managing GitHub repositories to be ingest
 import os
 import json
 import logging
+import time
 import random
+import asyncio
+import functools
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
-import concurrent.futures
-import multiprocessing
 
-from src.backend.data_ingestion import DataIngestionManager
+from src.backend.data_ingestion import DataIngestionManager, load_repo_file
+from src.backend.repo_cache import RepoCache
+from src.backend.file_filters import FileFilter, DEFAULT_MAX_FILE_SIZE_KB
+from src.backend.generated_files import GeneratedFileFilter, skip_report
+from src.backend.ingestion_checkpoint import get_checkpoint_store, verify_completed_files
+from src.backend.ingestion_metrics import StageStats, get_ingestion_metrics
+from src.backend.ingestion_pipeline import IngestionCancelled
+from src.backend.ingestion_jobs import IngestionJob, get_job_manager, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED
 from src.backend.rag_engine import RAGEngine, get_rag_engine
 from langchain.schema import Document
 
@@ -30,6 +38,15 @@ class Repository(BaseModel):
     branch: str = "main"
     file_extensions: List[str] = [".md", ".py", ".js", ".txt"]
     description: Optional[str] = None
+    max_file_size_kb: Optional[int] = DEFAULT_MAX_FILE_SIZE_KB
+    include_paths: List[str] = []
+    exclude_paths: List[str] = []
+    shallow: bool = True
+    sparse: bool = False
+    skip_generated: bool = True
+    keep_paths: List[str] = []
+    upstream_url: Optional[str] = None
+    archive: bool = False
 
 class RepositoryConfig(BaseModel):
     """Model for the repository configuration file."""
@@ -42,6 +59,10 @@ class UpdateReposRequest(BaseModel):
     repositories: List[Repository]
     auto_ingest_on_startup: Optional[bool] = None
 
+class IngestionJobRequest(BaseModel):
+    """Model for submitting ingestion jobs; all configured repositories if empty."""
+    repositories: Optional[List[Repository]] = None
+
 class UpdateReposResponse(BaseModel):
     """Model for the response to an update repositories request."""
     status: str
@@ -96,31 +117,330 @@ def save_repository_config(config: RepositoryConfig) -> bool:
         logger.error(f"Error saving repository configuration: {str(e)}")
         return False
 
-def get_optimal_thread_count() -> int:
+def repository_filters(repo: Repository, rag_engine: RAGEngine) -> Tuple[FileFilter, GeneratedFileFilter]:
     """
-    Determine the optimal number of threads for repository ingestion based on environment.
+    Build the file filters of a repository.
     
+    Args:
+        repo: The repository configuration
+        rag_engine: The RAG engine instance, for the ``ingestion.generated_files`` config
+        
     Returns:
-        The optimal number of threads to use
-    """
-    env_thread_count = os.environ.get("RAG_INGESTION_THREADS")
-    if env_thread_count and env_thread_count.isdigit():
-        thread_count = int(env_thread_count)
-        logger.info(f"🧵 Using {thread_count} threads for repository ingestion (from environment)")
-        return thread_count
-        
-    cpu_count = multiprocessing.cpu_count()
-    default_thread_count = max(2, min(cpu_count, 8))
-    logger.info(f"🧵 Using {default_thread_count} threads for repository ingestion (auto-detected from {cpu_count} CPU cores)")
-    return default_thread_count
+        The extension, path and size filter, and the generated file filter
+    """
+    file_filter = FileFilter(
+        extensions=repo.file_extensions,
+        max_file_size_kb=repo.max_file_size_kb,
+        include_paths=repo.include_paths,
+        exclude_paths=repo.exclude_paths
+    )
+    generated_filter = GeneratedFileFilter.from_config(
+        rag_engine.config.get("ingestion", {}).get("generated_files", {}),
+        enabled=repo.skip_generated,
+        keep_paths=repo.keep_paths
+    )
+    return file_filter, generated_filter
+
+def _file_size(repo_path: str, rel_path: str) -> int:
+    try:
+        return os.path.getsize(os.path.join(repo_path, rel_path))
+    except OSError:
+        return 0
 
-async def ingest_repositories(repositories: List[Repository], thread_count: int, rag_engine: RAGEngine) -> List[Dict[str, Any]]:
+def ingest_repository(
+    repo: Repository,
+    rag_engine: RAGEngine,
+    ingestion_manager: DataIngestionManager,
+    github_token: Optional[str],
+    job: Optional[IngestionJob] = None,
+    known_changes: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Incrementally ingest a single repository into the RAG system.
+    
+    Only files added or modified since the last ingested commit are loaded. They
+    are streamed through the ingestion pipeline without holding the whole
+    repository in memory. Chunks are upserted under deterministic IDs, so
+    unchanged chunks are not embedded again. Chunks of deleted files are removed. The new commit is
+    recorded only after the vector store has been updated. Vendored, generated and
+    minified files are skipped before loading (``ingestion.generated_files`` and the
+    repository's ``skip_generated`` and ``keep_paths``) and reported in ``skipped_files``.
+    
+    Files whose chunks are all written are checkpointed. If the run is interrupted
+    (crash, restart, cancellation), the next run for the same commit skips them.
+    
+    The result's ``stages`` hold the wall time, CPU time, idle and blocked time,
+    items and bytes of each stage (sync, walk, load, split, embed, write); they
+    are also added to the ingestion metrics.
+    
+    Args:
+        repo: The repository to ingest
+        rag_engine: The RAG engine instance
+        ingestion_manager: The data ingestion manager
+        github_token: Optional GitHub token
+        job: Optional background job to report progress on; cancelling it stops
+            ingestion without recording the commit
+        known_changes: Optional changed and deleted paths between two commits,
+            e.g. from push webhooks; see ``DataIngestionManager.sync_github_repo``
+        
+    Returns:
+        A dictionary containing the ingestion result for the repository
+        
+    Raises:
+        IngestionCancelled: If ``job`` was cancelled before ingestion finished
+    """
+    if repo.archive:
+        return ingest_repository_archive(repo, rag_engine, ingestion_manager, github_token, job)
+    if job is not None:
+        job.set_phase("syncing")
+    run_started, cpu_started = time.monotonic(), time.process_time()
+    stages = StageStats()
+    file_filter, generated_filter = repository_filters(repo, rag_engine)
+    with stages.measure("sync"):
+        changes = ingestion_manager.sync_github_repo(
+            repo_url=repo.repo_url,
+            branch=repo.branch,
+            github_token=github_token,
+            file_filter=file_filter,
+            shallow=repo.shallow,
+            sparse=repo.sparse,
+            known_changes=known_changes,
+            generated_filter=generated_filter,
+            upstream_url=repo.upstream_url
+        )
+    stages.add("sync", items=len(changes["file_paths"]), bytes=changes["total_bytes"])
+    checkpoints = get_checkpoint_store()
+    file_paths, total_bytes, resumed_paths = changes["file_paths"], changes["total_bytes"], set()
+    if file_paths:
+        completed = checkpoints.begin(repo.repo_url, repo.branch, changes["commit_sha"], changes["filter_signature"])
+        if completed:
+            resumed_paths = verify_completed_files(completed, rag_engine.existing_chunk_ids) & set(file_paths)
+            file_paths = [p for p in file_paths if p not in resumed_paths]
+            total_bytes -= sum(_file_size(changes["repo_path"], p) for p in resumed_paths)
+            logger.info(f"⏯️ Resuming ingestion of {repo.repo_url} at {changes['commit_sha'][:8]}: "
+                        f"{len(resumed_paths)} files already written, {len(file_paths)} remaining")
+    if job is not None:
+        job.set_totals(len(file_paths), max(total_bytes, 0))
+        job.update_progress({"stages": stages.to_dict()})
+        job.set_phase("ingesting")
+    if changes["deleted_paths"]:
+        rag_engine.delete_repo_documents(repo.repo_url, repo.branch, changes["deleted_paths"])
+    
+    chunk_stats = {"documents": 0, "chunks": 0, "embedded": 0, "skipped": 0, "removed": 0, "sources": []}
+    ingest_started = time.monotonic()
+    if file_paths:
+        chunk_stats = rag_engine.ingest(
+            file_paths,
+            functools.partial(load_repo_file, changes["repo_path"], metadata=changes["metadata"]),
+            cancel_event=job.cancel_event if job is not None else None,
+            on_progress=job.update_progress if job is not None else None,
+            on_file_written=functools.partial(checkpoints.complete_file, repo.repo_url, repo.branch)
+        )
+    ingest_seconds = time.monotonic() - ingest_started
+    if job is not None:
+        job.set_phase("finalizing")
+    loaded_paths = set(chunk_stats["sources"]) | resumed_paths
+    documents_count = chunk_stats["documents"]
+    
+    if changes["full_reingest"]:
+        rag_engine.prune_repo_documents(repo.repo_url, repo.branch, list(loaded_paths))
+    else:
+        # Changed files that no longer load (e.g. became binary or too large) are removed too
+        stale_paths = [p for p in changes["changed_paths"] if p not in loaded_paths]
+        if stale_paths:
+            rag_engine.delete_repo_documents(repo.repo_url, repo.branch, stale_paths)
+    
+    ingestion_manager.record_ingested_commit(
+        repo.repo_url,
+        repo.branch,
+        changes["commit_sha"],
+        changes["filter_signature"]
+    )
+    checkpoints.finish(repo.repo_url, repo.branch)
+    stages.merge(chunk_stats.get("stages", {}))
+    run_seconds, process_cpu_seconds = time.monotonic() - run_started, time.process_time() - cpu_started
+    get_ingestion_metrics().record(repo.repo_url, repo.branch, stages.to_dict(), run_seconds, process_cpu_seconds)
+    
+    mode = "full" if changes["full_reingest"] else "incremental"
+    logger.info(f"✅ {mode.capitalize()} ingestion of {repo.repo_url} at {changes['commit_sha'][:8]}: "
+                f"{documents_count} documents, {chunk_stats['embedded']} chunks embedded, "
+                f"{chunk_stats['skipped']} unchanged, {len(changes['deleted_paths'])} files removed")
+    skipped_files = skip_report(changes["skipped_files"], total_bytes, chunk_stats["chunks"], ingest_seconds)
+    if skipped_files["files"]:
+        logger.info(f"⏭️ Skipped {skipped_files['files']} vendored, generated or minified files "
+                    f"({skipped_files['bytes'] / 1024:.0f} KB) in {repo.repo_url}, saving about "
+                    f"{skipped_files['estimated_chunks_saved'] or 0} chunks and "
+                    f"{skipped_files['estimated_seconds_saved'] or 0}s")
+    
+    return {
+        "repo_url": repo.repo_url,
+        "branch": repo.branch,
+        "status": "success",
+        "message": f"Successfully ingested {documents_count} documents from GitHub repository ({mode})",
+        "document_count": documents_count,
+        "deleted_file_count": len(changes["deleted_paths"]),
+        "resumed_file_count": len(resumed_paths),
+        "chunk_count": chunk_stats["chunks"],
+        "embedded_chunk_count": chunk_stats["embedded"],
+        "unchanged_chunk_count": chunk_stats["skipped"],
+        "commit_sha": changes["commit_sha"],
+        "mode": mode,
+        "skipped_files": skipped_files,
+        "seconds": round(run_seconds, 3),
+        "process_cpu_seconds": round(process_cpu_seconds, 3),
+        "stages": stages.to_dict(),
+        "concurrency": chunk_stats.get("concurrency")
+    }
+
+def ingest_repository_archive(
+    repo: Repository,
+    rag_engine: RAGEngine,
+    ingestion_manager: DataIngestionManager,
+    github_token: Optional[str],
+    job: Optional[IngestionJob] = None
+) -> Dict[str, Any]:
+    """
+    Ingest the head of a repository branch from a tarball instead of a clone.
+    
+    Used for repositories with ``archive`` set, where history does not matter.
+    The archive is streamed from the GitHub tarball API and its matching files
+    are fed to the ingestion pipeline as they are extracted. Chunks of files no
+    longer in the branch are removed. An unchanged branch (same ETag) is not
+    downloaded again.
+    
+    Args:
+        repo: The repository to ingest
+        rag_engine: The RAG engine instance
+        ingestion_manager: The data ingestion manager
+        github_token: Optional GitHub token
+        job: Optional background job to report progress on
+        
+    Returns:
+        A dictionary containing the ingestion result for the repository
+        
+    Raises:
+        IngestionCancelled: If ``job`` was cancelled before ingestion finished
+    """
+    if job is not None:
+        job.set_phase("syncing")
+    cpu_started = time.process_time()
+    file_filter, generated_filter = repository_filters(repo, rag_engine)
+    chunk_stats = {"documents": 0, "chunks": 0, "embedded": 0, "skipped": 0, "removed": 0, "bytes": 0, "sources": []}
+    ingest_started = time.monotonic()
+    with ingestion_manager.sync_github_archive(
+        repo.repo_url, repo.branch, github_token, file_filter=file_filter, generated_filter=generated_filter
+    ) as archive:
+        if not archive["not_modified"]:
+            if job is not None:
+                job.set_phase("ingesting")
+            chunk_stats = rag_engine.ingest(
+                archive["documents"],
+                cancel_event=job.cancel_event if job is not None else None,
+                on_progress=job.update_progress if job is not None else None
+            )
+        downloaded = archive["download"].bytes_downloaded if archive["download"] is not None else 0
+    ingest_seconds = time.monotonic() - ingest_started
+    commit_sha = archive["archive"]["commit_sha"]
+    
+    if job is not None:
+        job.set_phase("finalizing")
+    if not archive["not_modified"]:
+        rag_engine.prune_repo_documents(repo.repo_url, repo.branch, list(set(chunk_stats["sources"])))
+        if commit_sha:
+            ingestion_manager.record_ingested_commit(
+                repo.repo_url,
+                repo.branch,
+                commit_sha,
+                archive["filter_signature"],
+                archive_etag=archive["etag"]
+            )
+    
+    # Downloading and extracting the archive is timed as the walk stage
+    stages = chunk_stats.get("stages", {})
+    process_cpu_seconds = time.process_time() - cpu_started
+    get_ingestion_metrics().record(repo.repo_url, repo.branch, stages, ingest_seconds, process_cpu_seconds)
+    
+    documents_count = chunk_stats["documents"]
+    skipped_files = skip_report(archive["skipped_files"], chunk_stats.get("bytes", 0), chunk_stats["chunks"], ingest_seconds)
+    if archive["not_modified"]:
+        message = "Repository is unchanged since the last download"
+    else:
+        message = f"Successfully ingested {documents_count} documents from GitHub repository (archive)"
+        logger.info(f"✅ Archive ingestion of {repo.repo_url} at {(commit_sha or '')[:8]}: {documents_count} documents "
+                    f"from {downloaded / (1024 * 1024):.1f} MB downloaded, {chunk_stats['embedded']} chunks embedded, "
+                    f"{chunk_stats['skipped']} unchanged")
+    
+    return {
+        "repo_url": repo.repo_url,
+        "branch": repo.branch,
+        "status": "success",
+        "message": message,
+        "document_count": documents_count,
+        "deleted_file_count": 0,
+        "chunk_count": chunk_stats["chunks"],
+        "embedded_chunk_count": chunk_stats["embedded"],
+        "unchanged_chunk_count": chunk_stats["skipped"],
+        "commit_sha": commit_sha,
+        "mode": "archive",
+        "not_modified": archive["not_modified"],
+        "downloaded_bytes": downloaded,
+        "skipped_files": skipped_files,
+        "seconds": round(ingest_seconds, 3),
+        "process_cpu_seconds": round(process_cpu_seconds, 3),
+        "stages": stages,
+        "concurrency": chunk_stats.get("concurrency")
+    }
+
+def _job_outcome(job: IngestionJob) -> Dict[str, Any]:
+    """Get the result of a finished ingestion job in the shape ingest_repository returns."""
+    if job.status == JOB_SUCCEEDED and job.result is not None:
+        return {**job.result, "job_id": job.id}
+    return {
+        "repo_url": job.repo_url,
+        "branch": job.branch,
+        "status": "cancelled" if job.status == JOB_CANCELLED else "failed",
+        "error": job.error or "Ingestion cancelled",
+        "job_id": job.id
+    }
+
+def submit_repository_job(
+    repo: Repository,
+    rag_engine: RAGEngine,
+    ingestion_manager: DataIngestionManager,
+    github_token: Optional[str]
+) -> Tuple[IngestionJob, bool]:
+    """
+    Submit the ingestion of a repository to the job manager.
+    
+    Every repository ingestion goes through the job manager, so at most one
+    ingestion runs per repository and branch and RAG_MAX_CONCURRENT_INGESTION_JOBS
+    applies to all of them.
+    
+    Args:
+        repo: The repository to ingest
+        rag_engine: The RAG engine instance
+        ingestion_manager: The data ingestion manager
+        github_token: Optional GitHub token for private repositories
+        
+    Returns:
+        The job, and whether it was newly created (False if the repository
+        already had a queued or running job)
+    """
+    if os.environ.get("RAG_TEST_MODE") == "true":
+        run = _simulate_ingestion_job
+    else:
+        run = functools.partial(ingest_repository, repo, rag_engine, ingestion_manager, github_token)
+    return get_job_manager().submit(repo.repo_url, repo.branch, run)
+
+async def ingest_repositories(repositories: List[Repository], rag_engine: RAGEngine) -> List[Dict[str, Any]]:
     """
     Ingest a list of repositories into the RAG system.
     
+    Each repository is submitted as an ingestion job and the call waits for all
+    of them; repositories that already have an active job wait for that job.
+    
     Args:
         repositories: The list of repositories to ingest
-        thread_count: Number of threads to use for parallel ingestion
         rag_engine: The RAG engine instance
         
     Returns:
@@ -155,48 +475,26 @@ async def ingest_repositories(repositories: List[Repository], thread_count: int,
             })
         return results
     
-    def process_repository(repo):
-        try:
-            logger.info(f"📚 Ingesting repository: {repo.repo_url}, branch: {repo.branch}")
-            
-            documents = ingestion_manager.ingest_github_repo(
-                repo_url=repo.repo_url,
-                branch=repo.branch,
-                github_token=github_token,
-                file_filter=repo.file_extensions
-            )
-            
-            rag_engine.add_documents(documents)
-            logger.info(f"✅ Successfully added {len(documents)} documents from {repo.repo_url} to the database")
-            
-            return {
-                "repo_url": repo.repo_url,
-                "branch": repo.branch,
-                "status": "success",
-                "message": f"Successfully ingested {len(documents)} documents from GitHub repository",
-                "document_count": len(documents)
-            }
-        except Exception as e:
-            logger.error(f"❌ Error ingesting repository {repo.repo_url}: {str(e)}")
-            return {
-                "repo_url": repo.repo_url,
-                "branch": repo.branch,
-                "status": "failed",
-                "error": str(e)
-            }
+    job_manager = get_job_manager()
+    logger.info(f"🔄 Processing {len(repositories)} repositories as ingestion jobs "
+                f"({job_manager.max_concurrent_jobs} at a time)")
     
-    logger.info(f"🔄 Processing {len(repositories)} repositories using {thread_count} threads")
+    jobs = []
+    for repo in repositories:
+        logger.info(f"📚 Ingesting repository: {repo.repo_url}, branch: {repo.branch}")
+        job, created = submit_repository_job(repo, rag_engine, ingestion_manager, github_token)
+        if not created:
+            logger.info(f"⏳ Repository {repo.repo_url} (branch: {repo.branch}) already has active job {job.id}; waiting for it")
+        jobs.append(job)
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=thread_count) as executor:
-        future_to_repo = {executor.submit(process_repository, repo): repo for repo in repositories}
-        
-        for future in concurrent.futures.as_completed(future_to_repo):
-            result = future.result()
-            results.append(result)
-            if result.get("status") == "success":
-                logger.info(f"📊 Repository {result['repo_url']} successfully added to database with {result['document_count']} documents")
-            else:
-                logger.error(f"❌ Repository {result['repo_url']} failed: {result.get('error')}")
+    for job in jobs:
+        await asyncio.to_thread(job.wait)
+        result = _job_outcome(job)
+        results.append(result)
+        if result.get("status") == "success":
+            logger.info(f"📊 Repository {result['repo_url']} successfully added to database with {result['document_count']} documents")
+        else:
+            logger.error(f"❌ Repository {result['repo_url']} failed: {result.get('error')}")
     
     return results
 
@@ -231,7 +529,12 @@ async def ingest_github_repo(
     repo: Repository,
     rag_engine: RAGEngine = Depends(get_rag_engine)
 ) -> Dict[str, Any]:
-    """Alias for the /ingest/github endpoint."""
+    """
+    Alias for the /ingest/github endpoint.
+    
+    The ingestion runs as a job and the request waits for it; if the repository
+    already has a queued or running job, the request waits for that job instead.
+    """
     try:
         if os.environ.get("RAG_TEST_MODE") == "true":
             logger.info(f"🧪 Test mode: Simulating GitHub repository ingestion for: {repo.repo_url}")
@@ -253,26 +556,31 @@ async def ingest_github_repo(
         logger.info(f"Ingesting GitHub repository: {repo.repo_url}, branch: {repo.branch}")
         
         ingestion_manager = DataIngestionManager()
-        
-        try:
-            documents = ingestion_manager.ingest_github_repo(
-                repo_url=repo.repo_url,
-                branch=repo.branch,
-                github_token=github_token,
-                file_filter=repo.file_extensions
-            )
-            
-            rag_engine.add_documents(documents)
-            
-            return {
-                "status": "success", 
-                "message": f"Successfully ingested {len(documents)} documents from GitHub repository",
-                "document_count": len(documents)
-            }
-        except Exception as repo_error:
-            logger.error(f"Error ingesting GitHub repository: {repo_error}")
-            raise HTTPException(status_code=500, detail=f"Error ingesting GitHub repository: {str(repo_error)}")
+        job, created = submit_repository_job(repo, rag_engine, ingestion_manager, github_token)
+        if not created:
+            logger.info(f"⏳ {repo.repo_url} (branch: {repo.branch}) already has active ingestion job {job.id}; waiting for it")
+        await asyncio.to_thread(job.wait)
+        
+        if job.status == JOB_CANCELLED:
+            raise HTTPException(status_code=409, detail=f"Ingestion job {job.id} for {repo.repo_url} was cancelled")
+        if job.status != JOB_SUCCEEDED:
+            logger.error(f"Error ingesting GitHub repository: {job.error}")
+            raise HTTPException(status_code=500, detail=f"Error ingesting GitHub repository: {job.error}")
+        
+        result = job.result
+        return {
+            "status": "success", 
+            "message": result["message"],
+            "document_count": result["document_count"],
+            "deleted_file_count": result["deleted_file_count"],
+            "commit_sha": result["commit_sha"],
+            "mode": result["mode"],
+            "skipped_files": result["skipped_files"],
+            "job_id": job.id
+        }
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing GitHub ingestion request: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -340,11 +648,8 @@ async def ingest_all_repositories(
     try:
         config = load_repository_config()
         
-        # Determine optimal thread count
-        thread_count = get_optimal_thread_count()
-        
-        # Ingest repositories with multithreading
-        results = await ingest_repositories(config.repositories, thread_count, rag_engine)
+        # Ingest repositories as jobs, bounded by the job manager's concurrency cap
+        results = await ingest_repositories(config.repositories, rag_engine)
         
         success_count = sum(1 for r in results if r.get("status") == "success")
         failed_count = len(results) - success_count
@@ -358,6 +663,159 @@ async def ingest_all_repositories(
         logger.error(f"Error ingesting repositories: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error ingesting repositories: {str(e)}")
 
+def _simulate_ingestion_job(job: IngestionJob) -> Dict[str, Any]:
+    """Test-mode stand-in for ingest_repository that reports fake progress."""
+    file_count = random.randint(5, 20)
+    job.set_phase("syncing")
+    job.set_totals(file_count, file_count * 4096)
+    job.set_phase("ingesting")
+    for i in range(1, file_count + 1):
+        if job.cancelled:
+            raise IngestionCancelled("Ingestion cancelled")
+        time.sleep(0.05)
+        job.update_progress({"files": i, "documents": i, "bytes": i * 4096, "chunks": i * 3, "embedded": i * 3})
+    job.set_phase("finalizing")
+    return {
+        "repo_url": job.repo_url,
+        "branch": job.branch,
+        "status": "success",
+        "message": f"Successfully simulated ingestion of GitHub repository: {job.repo_url} in test mode",
+        "document_count": file_count
+    }
+
+@router.post(
+    "/repos/jobs",
+    status_code=202,
+    summary="Submit background ingestion jobs",
+    description="This endpoint queues an ingestion job for each given repository, or for every configured repository if none are given, and returns immediately with the job IDs. Repositories that already have a queued or running job return that job instead.",
+    response_description="The submitted ingestion jobs"
+)
+async def submit_ingestion_jobs(
+    request: Optional[IngestionJobRequest] = None,
+    rag_engine: RAGEngine = Depends(get_rag_engine)
+) -> Dict[str, Any]:
+    """
+    Submit repository ingestion jobs that run in the background.
+    
+    At most one job runs per repository and branch, and at most
+    RAG_MAX_CONCURRENT_INGESTION_JOBS jobs run at the same time; the rest wait in the queue.
+    
+    Args:
+        request: Repositories to ingest; all configured repositories if empty
+        rag_engine: The RAG engine instance
+        
+    Returns:
+        Dict[str, Any]: The submitted jobs, with a ``created`` flag telling new jobs
+            apart from jobs that were already active
+    
+    Raises:
+        HTTPException(500): If the repository configuration cannot be read
+    """
+    try:
+        repositories = request.repositories if request and request.repositories else load_repository_config().repositories
+    except Exception as e:
+        logger.error(f"Error loading repositories for ingestion jobs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error loading repositories: {str(e)}")
+    
+    github_token = os.environ.get("GITHUB_TOKEN")
+    if not github_token and os.environ.get("RAG_TEST_MODE") != "true":
+        logger.warning("⚠️ GitHub token not found. Only public repositories can be ingested.")
+    ingestion_manager = DataIngestionManager()
+    
+    jobs = []
+    for repo in repositories:
+        job, created = submit_repository_job(repo, rag_engine, ingestion_manager, github_token)
+        job_info = job.to_dict()
+        job_info["created"] = created
+        jobs.append(job_info)
+    
+    created_count = sum(1 for j in jobs if j["created"])
+    return {
+        "status": "accepted",
+        "message": f"Submitted {created_count} ingestion jobs ({len(jobs) - created_count} already active)",
+        "jobs": jobs
+    }
+
+@router.get(
+    "/repos/jobs",
+    summary="List ingestion jobs",
+    description="This endpoint lists queued, running and recently finished ingestion jobs with their progress, newest first.",
+    response_description="The matching ingestion jobs"
+)
+async def list_ingestion_jobs(repo_url: Optional[str] = None, status: Optional[str] = None) -> Dict[str, Any]:
+    """
+    List ingestion jobs.
+    
+    Args:
+        repo_url: Only jobs for this repository
+        status: Only jobs in this status (queued, running, succeeded, failed, cancelled)
+        
+    Returns:
+        Dict[str, Any]: The jobs and job manager statistics
+    
+    Raises:
+        HTTPException(400): If the status is unknown
+    """
+    if status and status not in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED):
+        raise HTTPException(status_code=400, detail=f"Unknown job status: {status}")
+    job_manager = get_job_manager()
+    return {
+        "jobs": [job.to_dict() for job in job_manager.list(repo_url=repo_url, status=status)],
+        **job_manager.get_status()
+    }
+
+@router.get(
+    "/repos/jobs/{job_id}",
+    summary="Get an ingestion job",
+    description="This endpoint returns the status and progress (files, chunks, bytes, ETA) of an ingestion job.",
+    response_description="The ingestion job"
+)
+async def get_ingestion_job(job_id: str) -> Dict[str, Any]:
+    """
+    Get an ingestion job.
+    
+    Args:
+        job_id: The job ID returned on submission
+        
+    Returns:
+        Dict[str, Any]: The job status, progress and result
+    
+    Raises:
+        HTTPException(404): If the job is unknown
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingestion job not found: {job_id}")
+    return job.to_dict()
+
+@router.post(
+    "/repos/jobs/{job_id}/cancel",
+    summary="Cancel an ingestion job",
+    description="This endpoint cancels a queued or running ingestion job. A running job stops at the next file; the ingested commit is not recorded, so the next run picks the same changes up again.",
+    response_description="The ingestion job"
+)
+async def cancel_ingestion_job(job_id: str) -> Dict[str, Any]:
+    """
+    Cancel an ingestion job.
+    
+    Args:
+        job_id: The job ID returned on submission
+        
+    Returns:
+        Dict[str, Any]: The job, with ``cancel_requested`` set
+    
+    Raises:
+        HTTPException(404): If the job is unknown
+        HTTPException(409): If the job has already finished
+    """
+    job_manager = get_job_manager()
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingestion job not found: {job_id}")
+    if not job.active:
+        raise HTTPException(status_code=409, detail=f"Ingestion job {job_id} has already finished ({job.status})")
+    return job_manager.cancel(job_id).to_dict()
+
 @router.post(
     "/repos/update-config",
     response_model=UpdateReposResponse,
@@ -392,10 +850,25 @@ async def update_repository_config(request: UpdateReposRequest) -> Dict[str, Any
         logger.error(f"Error updating repository configuration: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error updating repository configuration: {str(e)}")
 
+def reset_repository_state() -> None:
+    """
+    Forget the recorded ingestion state and checkpoints of all repositories, so
+    the next ingestion of each repository processes every file. Called after the
+    vector store is flushed.
+    """
+    try:
+        RepoCache().reset_ingestion_state()
+        get_checkpoint_store().clear()
+    except Exception as e:
+        logger.error(f"Error resetting repository ingestion state: {str(e)}")
+
 async def ingest_repositories_on_startup(rag_engine: RAGEngine) -> None:
     """
     Ingest repositories on startup if auto_ingest_on_startup is enabled.
     
+    Otherwise only repositories whose last ingestion was interrupted are ingested,
+    resuming from their checkpoints.
+    
     Args:
         rag_engine: The RAG engine instance
     """
@@ -407,8 +880,13 @@ async def ingest_repositories_on_startup(rag_engine: RAGEngine) -> None:
         config = load_repository_config()
         
         if not config.auto_ingest_on_startup:
-            logger.info("ℹ️ Auto-ingestion of repositories is disabled")
-            return
+            # Runs interrupted by a crash or restart are finished even without auto-ingestion
+            interrupted = {(run["repo_url"], run["branch"]) for run in get_checkpoint_store().list_runs()}
+            config.repositories = [r for r in config.repositories if (r.repo_url, r.branch) in interrupted]
+            if not config.repositories:
+                logger.info("ℹ️ Auto-ingestion of repositories is disabled")
+                return
+            logger.info(f"⏯️ Resuming {len(config.repositories)} interrupted repository ingestions")
         
         if not config.repositories:
             logger.info("ℹ️ No repositories configured for ingestion")
@@ -419,9 +897,7 @@ async def ingest_repositories_on_startup(rag_engine: RAGEngine) -> None:
         for idx, repo in enumerate(config.repositories):
             logger.info(f"📋 Repository {idx+1}/{len(config.repositories)}: {repo.repo_url} (branch: {repo.branch})")
         
-        # Determine optimal thread count
-        thread_count = get_optimal_thread_count()
-        results = await ingest_repositories(config.repositories, thread_count, rag_engine)
+        results = await ingest_repositories(config.repositories, rag_engine)
         
         success_count = sum(1 for r in results if r.get("status") == "success")
         failed_count = len(results) - success_count
@@ -0,0 +1,110 @@
+"""
+Request cancellation helpers for the RAG-LLM Framework.
+This module ties long-running query work to the lifetime of the HTTP request,
+so that client disconnects and request deadlines stop retrieval and generation.
+"""
+import asyncio
+import time
+import logging
+from typing import Any, Awaitable, Optional
+
+from fastapi import HTTPException, Request
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEADLINE_HEADER = "X-Request-Deadline"
+DISCONNECT_POLL_INTERVAL = 0.25
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs past its deadline."""
+
+
+class ClientDisconnected(Exception):
+    """Raised when the HTTP client disconnects before the response is ready."""
+
+
+def parse_deadline(request: Request) -> Optional[float]:
+    """
+    Read the request deadline from the X-Request-Deadline header.
+
+    The header holds an absolute Unix timestamp in seconds (fractions allowed).
+
+    Args:
+        request: The incoming request
+
+    Returns:
+        The deadline as a Unix timestamp, or None if no deadline was sent
+
+    Raises:
+        HTTPException(400): If the header is not a number
+        HTTPException(504): If the deadline has already passed
+    """
+    value = request.headers.get(DEADLINE_HEADER)
+    if not value:
+        return None
+    try:
+        deadline = float(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{DEADLINE_HEADER} must be a Unix timestamp in seconds")
+    if deadline <= time.time():
+        raise HTTPException(status_code=504, detail="Request deadline already exceeded")
+    return deadline
+
+
+def remaining_time(deadline: Optional[float]) -> Optional[float]:
+    """
+    Get the number of seconds left before a deadline.
+
+    Args:
+        deadline: Unix timestamp or None
+
+    Returns:
+        Seconds remaining, or None if there is no deadline
+
+    Raises:
+        DeadlineExceeded: If the deadline has passed
+    """
+    if deadline is None:
+        return None
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return remaining
+
+
+async def run_cancellable(request: Request, work: Awaitable[Any]) -> Any:
+    """
+    Run query work and cancel it as soon as the HTTP client disconnects.
+
+    Cancelling the task propagates asyncio.CancelledError down to the Ollama
+    HTTP stream, which closes the connection and stops generation.
+
+    Args:
+        request: The incoming request to watch for disconnects
+        work: Coroutine performing the query
+
+    Returns:
+        The result of the work
+
+    Raises:
+        ClientDisconnected: If the client went away before the work finished
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info("🔌 Client disconnected, cancelling in-flight query")
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+                raise ClientDisconnected("Client disconnected before the response was ready")
+    finally:
+        if not task.done():
+            task.cancel()
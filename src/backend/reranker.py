@@ -0,0 +1,241 @@
+"""
+Cross-encoder reranking for retrieved documents.
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+from langchain.schema import Document
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ScoreCache:
+    """
+    Thread-safe LRU cache of (query hash, chunk id) -> relevance score.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of scores to keep
+        """
+        self.max_size = max_size
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[float]:
+        """Get a cached score, marking it as recently used."""
+        with self._lock:
+            score = self._scores.get(key)
+            if score is None:
+                self.misses += 1
+                return None
+            self._scores.move_to_end(key)
+            self.hits += 1
+            return score
+
+    def put(self, key: Tuple[str, str], score: float):
+        """Store a score, evicting the least recently used entry when full."""
+        with self._lock:
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.max_size:
+                self._scores.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class CrossEncoderReranker:
+    """
+    Rerank retrieved documents with a small cross-encoder running on CPU.
+
+    Candidates are scored in batches. Scores are cached per (query, chunk). Each
+    batch is sized to fit the time left in the budget, from the measured time per
+    pair; if not even one more pair fits, the vector-store order is kept. Once all
+    candidates are scored, the ranking is used even if the last batch ran over.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        top_n: int = 4,
+        candidate_k: int = 20,
+        batch_size: int = 16,
+        time_budget_ms: float = 200,
+        cache_size: int = 10000
+    ):
+        """
+        Initialize the reranker and load the cross-encoder model.
+
+        Args:
+            model_name: HuggingFace cross-encoder model to use
+            top_n: Number of documents to keep after reranking
+            candidate_k: Number of candidates to retrieve for reranking
+            batch_size: Number of (query, document) pairs scored per batch
+            time_budget_ms: Maximum time to spend scoring before falling back
+            cache_size: Maximum number of cached scores
+        """
+        self.model_name = model_name
+        self.top_n = top_n
+        self.candidate_k = max(candidate_k, top_n)
+        self.batch_size = batch_size
+        self.time_budget = time_budget_ms / 1000.0
+        self.cache = ScoreCache(cache_size)
+
+        self._stats_lock = threading.Lock()
+        self.reranked_queries = 0
+        self.fallbacks = 0
+        self.total_time = 0.0
+        # Measured seconds per scored pair, smoothed; None until the first batch
+        self._pair_seconds: Optional[float] = None
+
+        from sentence_transformers import CrossEncoder
+        self.model = CrossEncoder(model_name, device="cpu")
+        logger.info(f"Initialized cross-encoder reranker with model: {model_name}")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["CrossEncoderReranker"]:
+        """
+        Create a reranker from the ``reranking`` config section.
+
+        Args:
+            config: Reranking configuration dictionary
+
+        Returns:
+            A CrossEncoderReranker, or None if reranking is disabled
+        """
+        enabled = os.environ.get("RAG_RERANKING_ENABLED", str(config.get("enabled", False)))
+        if enabled.lower() != "true":
+            return None
+        return cls(
+            model_name=config.get("model_name", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+            top_n=int(config.get("top_n", 4)),
+            candidate_k=int(config.get("candidate_k", 20)),
+            batch_size=int(config.get("batch_size", 16)),
+            time_budget_ms=float(config.get("time_budget_ms", 200)),
+            cache_size=int(config.get("cache_size", 10000))
+        )
+
+    @staticmethod
+    def _query_hash(query: str) -> str:
+        return hashlib.sha1(" ".join(query.lower().split()).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _chunk_id(document: Document) -> str:
+        chunk_id = document.metadata.get("chunk_id")
+        if chunk_id:
+            return str(chunk_id)
+        return hashlib.sha1(document.page_content.encode("utf-8")).hexdigest()
+
+    def rerank(self, query: str, documents: List[Document], top_n: Optional[int] = None) -> List[Document]:
+        """
+        Rerank documents by cross-encoder relevance to the query.
+
+        Args:
+            query: The query text
+            documents: Candidate documents in vector-store order
+            top_n: Optional override for the number of documents to keep
+
+        Returns:
+            The top_n documents, reranked unless the budget ran out before all were scored
+        """
+        top_n = top_n or self.top_n
+        if len(documents) <= 1:
+            return documents[:top_n]
+
+        start = time.monotonic()
+        query_hash = self._query_hash(query)
+        keys = [(query_hash, self._chunk_id(doc)) for doc in documents]
+
+        scores: List[Optional[float]] = [self.cache.get(key) for key in keys]
+        pending = [i for i, score in enumerate(scores) if score is None]
+
+        position = 0
+        while position < len(pending):
+            size = self._batch_size_within(self.time_budget - (time.monotonic() - start))
+            if size == 0:
+                return self._fallback(documents, top_n, start)
+            batch = pending[position:position + size]
+            batch_start = time.monotonic()
+            batch_scores = self.model.predict(
+                [(query, documents[i].page_content) for i in batch],
+                batch_size=self.batch_size,
+                show_progress_bar=False
+            )
+            self._record_batch(len(batch), time.monotonic() - batch_start)
+            for i, score in zip(batch, batch_scores):
+                scores[i] = float(score)
+                self.cache.put(keys[i], scores[i])
+            position += size
+
+        ranked = sorted(zip(scores, range(len(documents))), key=lambda item: item[0], reverse=True)
+        reranked = []
+        for score, i in ranked[:top_n]:
+            documents[i].metadata["rerank_score"] = score
+            reranked.append(documents[i])
+
+        self._record(start, fallback=False)
+        return reranked
+
+    def _batch_size_within(self, remaining: float) -> int:
+        """Get the number of pairs that can be scored in the remaining seconds, at most batch_size."""
+        if remaining <= 0:
+            return 0
+        with self._stats_lock:
+            pair_seconds = self._pair_seconds
+        if not pair_seconds:
+            return self.batch_size
+        return min(self.batch_size, int(remaining / pair_seconds))
+
+    def _record_batch(self, pairs: int, elapsed: float):
+        with self._stats_lock:
+            pair_seconds = elapsed / pairs
+            if self._pair_seconds is None:
+                self._pair_seconds = pair_seconds
+            else:
+                self._pair_seconds = 0.8 * self._pair_seconds + 0.2 * pair_seconds
+
+    def _fallback(self, documents: List[Document], top_n: int, start: float) -> List[Document]:
+        logger.warning(f"⏱️ Reranking exceeded {self.time_budget * 1000:.0f}ms budget, keeping vector order")
+        self._record(start, fallback=True)
+        return documents[:top_n]
+
+    def _record(self, start: float, fallback: bool):
+        with self._stats_lock:
+            self.reranked_queries += 1
+            self.total_time += time.monotonic() - start
+            if fallback:
+                self.fallbacks += 1
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get reranker configuration and statistics.
+
+        Returns:
+            Dictionary with cache and latency statistics
+        """
+        with self._stats_lock:
+            lookups = self.cache.hits + self.cache.misses
+            return {
+                "model_name": self.model_name,
+                "top_n": self.top_n,
+                "candidate_k": self.candidate_k,
+                "time_budget_ms": self.time_budget * 1000,
+                "queries": self.reranked_queries,
+                "fallbacks": self.fallbacks,
+                "avg_latency_ms": round(self.total_time / self.reranked_queries * 1000, 2)
+                if self.reranked_queries else 0.0,
+                "cache_size": len(self.cache),
+                "cache_hit_rate": round(self.cache.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,401 @@
+"""
+Single-writer queue for the vector store.
+Ingestion workers hand embedded chunk batches to one writer thread, which
+coalesces them into large upserts, deletes the replaced chunks of re-ingested
+sources, and persists on a size or time policy.
+Readers and the writer are coordinated by a read/write lock, so queries see the
+collection either before or after each upsert, never halfway through one, and
+run between the upserts of a large write.
+"""
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from langchain.schema import Document
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_FLUSH = object()
+
+
+class ReadWriteLock:
+    """
+    Writer-preferring read/write lock.
+
+    With ``concurrent_reads`` disabled, readers are exclusive as well, so queries
+    run one at a time and each waits for any upsert or delete in progress. The
+    embedded Chroma client is not safe for concurrent calls, even reads, so that
+    is the default; enable it for a client/server Chroma deployment.
+    """
+
+    def __init__(self, concurrent_reads: bool = False):
+        """
+        Initialize the lock.
+
+        Args:
+            concurrent_reads: Whether readers may hold the lock at the same time
+        """
+        self.concurrent_reads = concurrent_reads
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self._waiting = 0
+        self._acquisitions = 0
+
+    @contextmanager
+    def read_lock(self):
+        """Hold the lock for reading."""
+        if not self.concurrent_reads:
+            with self.write_lock():
+                yield
+            return
+        with self._condition:
+            self._waiting += 1
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._waiting -= 1
+            self._readers += 1
+            self._acquired()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write_lock(self):
+        """Hold the lock exclusively."""
+        with self._condition:
+            self._waiting += 1
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._waiting -= 1
+            self._writer = True
+            self._acquired()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+    def _acquired(self):
+        # Wake threads in yield_to_waiting
+        self._acquisitions += 1
+        self._condition.notify_all()
+
+    def yield_to_waiting(self):
+        """
+        Let a thread that is waiting for the lock take it before the caller takes it again.
+
+        Called between the steps of a long series of writes, so queries waiting
+        for the lock run between the steps instead of after the whole series.
+        Must not be called while holding the lock.
+        """
+        with self._condition:
+            acquisitions = self._acquisitions
+            self._condition.wait_for(lambda: not self._waiting or self._acquisitions > acquisitions)
+
+
+class VectorStoreWriter:
+    """
+    Dedicated writer thread for a Chroma vector store.
+
+    Submitted batches are coalesced into upserts of up to ``max_batch_size``
+    chunks. A partial batch is written once no new work arrives for
+    ``max_delay_ms``. The store is persisted after ``persist_every`` chunks or
+    ``persist_interval`` seconds, whichever comes first, instead of per call.
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        max_batch_size: int = 512,
+        max_delay_ms: float = 200,
+        max_pending: int = 16,
+        persist_every: int = 5000,
+        persist_interval: float = 30.0,
+        concurrent_reads: bool = False
+    ):
+        """
+        Initialize the writer.
+
+        Args:
+            vector_store: LangChain Chroma vector store
+            max_batch_size: Maximum number of chunks per upsert
+            max_delay_ms: How long to wait for more work before writing a partial batch
+            max_pending: Maximum number of submitted batches waiting to be written;
+                submitting blocks when the queue is full
+            persist_every: Persist after this many written chunks
+            persist_interval: Persist at least this often, in seconds, while there
+                are unpersisted writes
+            concurrent_reads: Whether queries may read concurrently with each other
+        """
+        self.vector_store = vector_store
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay = max_delay_ms / 1000.0
+        self.persist_every = max(1, persist_every)
+        self.persist_interval = persist_interval
+        self.lock = ReadWriteLock(concurrent_reads)
+
+        self._queue: "queue.Queue" = queue.Queue(max(1, max_pending))
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.chunks_written = 0
+        self.upserts = 0
+        self.upsert_seconds = 0.0
+        self.persists = 0
+        self.errors = 0
+        self._unpersisted = 0
+        self._last_persist = time.monotonic()
+
+    @classmethod
+    def from_config(cls, vector_store, config: Dict[str, Any]) -> "VectorStoreWriter":
+        """
+        Create a writer from the ``ingestion.writer`` config section.
+
+        Args:
+            vector_store: LangChain Chroma vector store
+            config: Writer configuration dictionary
+
+        Returns:
+            A configured VectorStoreWriter
+        """
+        concurrent_reads = os.environ.get("RAG_VECTOR_STORE_CONCURRENT_READS",
+                                          str(config.get("concurrent_reads", False)))
+        return cls(
+            vector_store,
+            max_batch_size=int(config.get("max_batch_size", 512)),
+            max_delay_ms=float(config.get("max_delay_ms", 200)),
+            max_pending=int(config.get("max_pending", 16)),
+            persist_every=int(config.get("persist_every", 5000)),
+            persist_interval=float(config.get("persist_interval", 30)),
+            concurrent_reads=concurrent_reads.lower() == "true"
+        )
+
+    def read_lock(self):
+        """Hold the vector store for reading (queries, lookups)."""
+        return self.lock.read_lock()
+
+    def write_lock(self):
+        """Hold the vector store exclusively (deletes and other direct writes)."""
+        return self.lock.write_lock()
+
+    def submit(
+        self,
+        chunks: List[Document],
+        embeddings: List[List[float]],
+        stage_stats=None,
+        replace_sources: Optional[Dict[str, Set[str]]] = None
+    ) -> Future:
+        """
+        Queue embedded chunks for upserting.
+
+        Blocks while ``max_pending`` batches are already waiting.
+
+        Args:
+            chunks: Chunks with IDs assigned
+            embeddings: Embedding vector of each chunk
+            stage_stats: Optional ``StageStats`` of the submitting run. The time of
+                each coalesced upsert is shared out by chunk count and added to its
+                ``write`` stage
+            replace_sources: Optional mapping of source keys to the complete set of
+                chunk IDs each source now has. Stored chunks of these sources with
+                other IDs are deleted in the same locked section as the last upsert,
+                so queries never see a source without either its old or new chunks
+
+        Returns:
+            A future that completes with the number of chunks written and the
+            number of stale chunks deleted
+        """
+        future = Future()
+        if not chunks and not replace_sources:
+            future.set_result((0, 0))
+            return future
+        self._ensure_thread()
+        self._queue.put((chunks, embeddings, future, stage_stats, replace_sources or {}))
+        return future
+
+    def flush(self, persist: bool = True, timeout: Optional[float] = None):
+        """
+        Wait until everything submitted so far is written.
+
+        Args:
+            persist: Whether to persist the store afterwards
+            timeout: Maximum time to wait in seconds
+        """
+        if self._thread is None:
+            if persist:
+                self._persist()
+            return
+        future = Future()
+        self._queue.put((_FLUSH, persist, future, None, None))
+        future.result(timeout)
+
+    def _ensure_thread(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="vector-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        pending: List[Tuple[List[Document], List[List[float]], Future, Any, Dict[str, Set[str]]]] = []
+        pending_count = 0
+        while True:
+            timeout = self.max_delay if pending else self._time_to_persist()
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is not None and item[0] is _FLUSH:
+                self._write(pending)
+                pending, pending_count = [], 0
+                _, persist, future, _, _ = item
+                try:
+                    if persist:
+                        self._persist()
+                    future.set_result(None)
+                except Exception as e:
+                    future.set_exception(e)
+                continue
+
+            if item is not None:
+                pending.append(item)
+                pending_count += len(item[0])
+                if pending_count < self.max_batch_size:
+                    continue
+
+            if pending:
+                self._write(pending)
+                pending, pending_count = [], 0
+            self._maybe_persist()
+
+    def _time_to_persist(self) -> Optional[float]:
+        if not self._unpersisted:
+            return None
+        return max(0.0, self.persist_interval - (time.monotonic() - self._last_persist))
+
+    def _write(self, pending: List[Tuple[List[Document], List[List[float]], Future, Any, Dict[str, Set[str]]]]):
+        if not pending:
+            return
+        # Later submissions of the same chunk win
+        records: Dict[str, Tuple[Document, List[float]]] = {}
+        replace_sources: Dict[str, Set[str]] = {}
+        for chunks, embeddings, _, _, replace in pending:
+            for chunk, embedding in zip(chunks, embeddings):
+                records[chunk.metadata["chunk_id"]] = (chunk, embedding)
+            replace_sources.update(replace)
+
+        try:
+            items = list(records.items())
+            batches = [items[i:i + self.max_batch_size] for i in range(0, len(items), self.max_batch_size)] or [[]]
+            removed: Dict[str, int] = {}
+            start, cpu_start = time.perf_counter(), time.thread_time()
+            for index, batch in enumerate(batches):
+                if index:
+                    # Each upsert is atomic; let waiting queries run between them
+                    self.lock.yield_to_waiting()
+                with self.lock.write_lock():
+                    if batch:
+                        self.vector_store._collection.upsert(
+                            ids=[chunk_id for chunk_id, _ in batch],
+                            embeddings=[embedding for _, (_, embedding) in batch],
+                            documents=[chunk.page_content for _, (chunk, _) in batch],
+                            metadatas=[chunk.metadata for _, (chunk, _) in batch]
+                        )
+                    if index == len(batches) - 1 and replace_sources:
+                        removed = self._delete_replaced(replace_sources)
+                if batch:
+                    with self._stats_lock:
+                        self.upserts += 1
+            seconds, cpu_seconds = time.perf_counter() - start, time.thread_time() - cpu_start
+            with self._stats_lock:
+                self.chunks_written += len(items)
+                self._unpersisted += len(items) + sum(removed.values())
+                self.upsert_seconds += seconds
+            if removed:
+                logger.info(f"🗑️ Removed {sum(removed.values())} stale chunks")
+            submitted = sum(len(chunks) for chunks, _, _, _, _ in pending)
+            for chunks, _, future, stage_stats, replace in pending:
+                if stage_stats is not None and chunks:
+                    share = len(chunks) / submitted
+                    stage_stats.add("write", busy_seconds=seconds * share, cpu_seconds=cpu_seconds * share,
+                                    items=len(chunks), bytes=sum(len(c.page_content.encode("utf-8")) for c in chunks))
+                future.set_result((len(chunks), sum(removed.pop(key, 0) for key in replace)))
+        except Exception as e:
+            logger.error(f"❌ Vector store upsert of {len(records)} chunks failed: {str(e)}")
+            with self._stats_lock:
+                self.errors += 1
+            for _, _, future, _, _ in pending:
+                future.set_exception(e)
+
+    def _delete_replaced(self, replace_sources: Dict[str, Set[str]]) -> Dict[str, int]:
+        # Called with the write lock held
+        collection = self.vector_store._collection
+        source_keys = sorted(replace_sources)
+        stale_ids: List[str] = []
+        removed: Dict[str, int] = {}
+        batch_size = 500
+        for i in range(0, len(source_keys), batch_size):
+            result = collection.get(where={"source_key": {"$in": source_keys[i:i + batch_size]}}, include=["metadatas"])
+            for chunk_id, metadata in zip(result["ids"], result["metadatas"]):
+                key = (metadata or {}).get("source_key")
+                if key in replace_sources and chunk_id not in replace_sources[key]:
+                    stale_ids.append(chunk_id)
+                    removed[key] = removed.get(key, 0) + 1
+        for i in range(0, len(stale_ids), batch_size):
+            collection.delete(ids=stale_ids[i:i + batch_size])
+        return removed
+
+    def _maybe_persist(self):
+        if not self._unpersisted:
+            return
+        if (self._unpersisted >= self.persist_every
+                or time.monotonic() - self._last_persist >= self.persist_interval):
+            try:
+                self._persist()
+            except Exception as e:
+                logger.error(f"❌ Error persisting vector store: {str(e)}")
+
+    def _persist(self):
+        if hasattr(self.vector_store, "persist"):
+            with self.lock.write_lock():
+                self.vector_store.persist()
+        with self._stats_lock:
+            self.persists += 1
+            self._unpersisted = 0
+            self._last_persist = time.monotonic()
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get writer statistics.
+
+        Returns:
+            Dictionary with queue depth, written chunks, upserts and persists
+        """
+        with self._stats_lock:
+            return {
+                "pending_batches": self._queue.qsize(),
+                "chunks_written": self.chunks_written,
+                "upserts": self.upserts,
+                "avg_upsert_size": round(self.chunks_written / self.upserts, 1) if self.upserts else 0.0,
+                "avg_upsert_seconds": round(self.upsert_seconds / self.upserts, 4) if self.upserts else 0.0,
+                "persists": self.persists,
+                "unpersisted_chunks": self._unpersisted,
+                "errors": self.errors,
+                "concurrent_reads": self.lock.concurrent_reads
+            }
@@ -1,6 +1,8 @@
 """
 Core API tests for the RAG-LLM Framework post-deployment test suite.
 """
+import requests
+
 from tests.post_deployment.utils.base_test import BaseTest
 from tests.post_deployment.utils.config import TEST_QUERY, TEST_FEEDBACK
 
@@ -17,6 +19,39 @@ class HealthCheckTest(BaseTest):
         success, response = self.request("GET", "/health")
         return success and response.get("status") == "healthy"
         
+class StatusTest(BaseTest):
+    """Test the status endpoint."""
+    
+    def __init__(self):
+        super().__init__(
+            name="Status",
+            description="Verify the status endpoint reports the LLM circuit breaker state, the ingestion concurrency and the ingestion throttle state."
+        )
+        
+    def execute(self):
+        success, response = self.request("GET", "/status")
+        return (success and
+               response.get("status") in ("ok", "degraded") and
+               "circuit_breaker" in response.get("llm", {}) and
+               response["llm"].get("ingestion_concurrency", {}).get("cpus", 0) > 0 and
+               response["llm"].get("ingestion_throttle", {}).get("state") in ("running", "backed_off", "disabled"))
+        
+class MetricsTest(BaseTest):
+    """Test the Prometheus metrics endpoint."""
+    
+    def __init__(self):
+        super().__init__(
+            name="Metrics",
+            description="Verify the metrics endpoint returns ingestion metrics in the Prometheus text format."
+        )
+        
+    def execute(self):
+        # The metrics are plain text, not JSON
+        response = requests.get(f"{self.base_url}/metrics", timeout=self.timeout)
+        return (response.status_code == 200 and
+               response.headers.get("content-type", "").startswith("text/plain") and
+               "# TYPE rag_ingestion_stage_busy_seconds_total counter" in response.text)
+        
 class QueryTest(BaseTest):
     """Test the query endpoint."""
     
@@ -68,6 +103,37 @@ class IngestTest(BaseTest):
         success, response = self.request("POST", "/ingest", data)
         return success and response.get("status") == "success"
         
+class DataIngestMarkdownTest(BaseTest):
+    """Test ingesting markdown through the /data/ingest endpoint."""
+    
+    def __init__(self):
+        super().__init__(
+            name="Data Ingest Markdown API",
+            description="Test ingesting markdown content through /data/ingest."
+        )
+        
+    def execute(self):
+        data = {
+            "source_type": "markdown",
+            "source_data": "# Post-deployment runbook\n\nThis is a markdown test document for the post-deployment test suite.",
+            "metadata": {"source": "post-deployment-test.md"}
+        }
+        success, response = self.request("POST", "/data/ingest", data)
+        return success and response.get("status") == "success" and "document_count" in response
+        
+class LocalDirectoriesTest(BaseTest):
+    """Test listing the configured local directories."""
+    
+    def __init__(self):
+        super().__init__(
+            name="Local Directories API",
+            description="Test listing local directories configured for ingestion."
+        )
+        
+    def execute(self):
+        success, response = self.request("GET", "/data/directories")
+        return success and "directories" in response
+        
 class IngestedDataTest(BaseTest):
     """Test the ingested data endpoint."""
     
@@ -99,9 +165,13 @@ class QueryComparisonTest(BaseTest):
 
 core_tests = [
     HealthCheckTest(),
+    StatusTest(),
+    MetricsTest(),
     QueryTest(),
     FeedbackTest(),
     IngestTest(),
+    DataIngestMarkdownTest(),
+    LocalDirectoriesTest(),
     IngestedDataTest(),
     QueryComparisonTest()
 ]
@@ -1,6 +1,9 @@
 """
 Repository management API tests for the RAG-LLM Framework post-deployment test suite.
 """
+import os
+import json
+
 from tests.post_deployment.utils.base_test import BaseTest
 from tests.post_deployment.utils.config import GITHUB_TOKEN
 
@@ -85,10 +88,69 @@ class RepoConfigTest(BaseTest):
         success, response = self.request("GET", "/repos/config")
         return success and "repositories" in response and "auto_ingest_on_startup" in response
 
+class SubmitIngestionJobTest(BaseTest):
+    """Test submitting a background ingestion job."""
+    
+    def __init__(self):
+        super().__init__(
+            name="Submit Ingestion Job API",
+            description="Test submitting a background ingestion job and polling it by ID."
+        )
+        
+    def execute(self):
+        data = {
+            "repositories": [
+                {
+                    "repo_url": "https://github.com/test-mode/test-repo",
+                    "branch": "main",
+                    "file_extensions": [".md"]
+                }
+            ]
+        }
+        success, response = self.request("POST", "/repos/jobs", data, expected_status=202)
+        if not success or not response or not response.get("jobs"):
+            return False
+        
+        job_id = response["jobs"][0]["job_id"]
+        success, job = self.request("GET", f"/repos/jobs/{job_id}")
+        return success and job.get("job_id") == job_id and "progress" in job
+        
+class ListIngestionJobsTest(BaseTest):
+    """Test listing ingestion jobs."""
+    
+    def __init__(self):
+        super().__init__(
+            name="List Ingestion Jobs API",
+            description="Test listing background ingestion jobs."
+        )
+        
+    def execute(self):
+        success, response = self.request("GET", "/repos/jobs")
+        return success and "jobs" in response and "max_concurrent_jobs" in response
+
+class WebhookSignatureTest(BaseTest):
+    """Test that unsigned GitHub webhook deliveries are rejected."""
+    
+    def __init__(self):
+        super().__init__(
+            name="GitHub Webhook Signature API",
+            description="Test that a recorded push payload without X-Hub-Signature-256 is rejected."
+        )
+        
+    def execute(self):
+        fixture_path = os.path.join(os.path.dirname(__file__), "..", "fixtures", "github_push_payload.json")
+        with open(fixture_path, "r") as f:
+            payload = json.load(f)
+        success, response = self.request("POST", "/repos/webhook", payload, expected_status=401)
+        return success
+
 repo_tests = [
     ListReposTest(),
     RepoConfigTest(),
     UpdateReposTest(),
     IngestGitHubTest(),
-    IngestAllReposTest()
+    IngestAllReposTest(),
+    SubmitIngestionJobTest(),
+    ListIngestionJobsTest(),
+    WebhookSignatureTest()
 ]